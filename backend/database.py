@@ -1,14 +1,93 @@
 from supabase import create_client, Client
+from postgrest import APIError
 import os
-from typing import List, Optional, Dict, Any
+from abc import ABC, abstractmethod
+from typing import List, Optional, Dict, Any, AsyncIterator
 from models import TrackedObject, TrackedObjectCreate
 from dotenv import load_dotenv
 import asyncio
 from datetime import datetime
+from services.location_buffer import LOCATION_FIELDS, location_buffer
+from utils.deadline import check_deadline
+from utils.tenancy import current_household
 
 load_dotenv()
 
-class DatabaseManager:
+# Postgres error code raised when the unique index on tracked_objects (household_id, name) is hit
+UNIQUE_VIOLATION = "23505"
+
+class BaseDatabaseManager(ABC):
+    """Storage interface shared by the Supabase and SQLite backends.
+
+    Reads, creates and deletes are scoped to the current household
+    (``utils.tenancy``); location updates address rows by id, which is
+    unique across households. A backend missing any abstract method fails
+    when it is constructed, not on the first call.
+    """
+
+    @abstractmethod
+    async def create_tracked_object(self, obj: TrackedObjectCreate) -> TrackedObject:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_tracked_objects(self, objects: List[TrackedObjectCreate],
+                                     update_existing: bool = False) -> List[Dict[str, Any]]:
+        """Insert a batch of objects in one round-trip, handling conflicts on (household, name).
+
+        Returns one ``{"name", "status", "id"}`` dict per input object, in order.
+        Callers must de-duplicate names within a batch.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_tracked_objects(self) -> List[TrackedObject]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_tracked_objects(self, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw object rows in id order without loading the whole table"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_matching_objects(self, query: str) -> List[TrackedObject]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_object_location(self, object_id: int, video_no: str,
+                                   location: str, confidence: float,
+                                   timestamp: int) -> bool:
+        raise NotImplementedError
+
+    async def bulk_update_object_locations(self, updates: List[Dict[str, Any]]) -> int:
+        """Write many location updates; backends override this with a single round-trip"""
+        written = 0
+        for update in updates:
+            if await self.update_object_location(
+                object_id=update["id"],
+                video_no=update["video_no"],
+                location=update["location_phrase"],
+                confidence=update["confidence"],
+                timestamp=update["last_seen_timestamp"]
+            ):
+                written += 1
+        return written
+
+    @abstractmethod
+    async def delete_tracked_object(self, object_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def ping(self):
+        """Cheapest possible round trip; raises if the database is unreachable"""
+        raise NotImplementedError
+
+    def _with_pending(self, objects: List[TrackedObject]) -> List[TrackedObject]:
+        """Overlay location updates still waiting in the write-behind buffer"""
+        return location_buffer.apply_pending(objects)
+
+class DatabaseManager(BaseDatabaseManager):
+    """Supabase (PostgREST) backend"""
+
     def __init__(self):
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_ANON_KEY")
@@ -21,18 +100,10 @@ class DatabaseManager:
     async def create_tracked_object(self, obj: TrackedObjectCreate) -> TrackedObject:
         """Create a new tracked object"""
         try:
-            # Check if object already exists
-            existing = self.client.table("tracked_objects")\
-                .select("*")\
-                .eq("name", obj.name.lower())\
-                .execute()
-            
-            if existing.data:
-                raise ValueError(f"Object '{obj.name}' already exists")
-            
-            # Insert new object
+            # Single insert; the unique index on name rejects duplicates atomically
             result = self.client.table("tracked_objects")\
                 .insert({
+                    "household_id": current_household(),
                     "name": obj.name.lower(),
                     "alias": obj.alias
                 })\
@@ -43,34 +114,98 @@ class DatabaseManager:
             else:
                 raise Exception("Failed to create object")
                 
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                raise ValueError(f"Object '{obj.name}' already exists")
+            print(f"Database error creating object: {e}")
+            raise
         except Exception as e:
             print(f"Database error creating object: {e}")
             raise
     
+    async def upsert_tracked_objects(self, objects: List[TrackedObjectCreate],
+                                     update_existing: bool = False) -> List[Dict[str, Any]]:
+        """Insert a batch of objects with ON CONFLICT (household_id, name) handling"""
+        if not objects:
+            return []
+        household = current_household()
+        rows = [{"household_id": household, "name": obj.name.lower(), "alias": obj.alias} for obj in objects]
+        
+        existing = set()
+        if update_existing:
+            # PostgREST does not say whether an upserted row was new, so look first
+            found = self.client.table("tracked_objects")\
+                .select("name")\
+                .eq("household_id", household)\
+                .in_("name", [row["name"] for row in rows])\
+                .execute()
+            existing = {row["name"] for row in found.data}
+        
+        # With ignore_duplicates PostgREST only returns the rows it inserted
+        result = self.client.table("tracked_objects")\
+            .upsert(rows, on_conflict="household_id,name", ignore_duplicates=not update_existing)\
+            .execute()
+        
+        saved = {row["name"]: row for row in result.data}
+        statuses = []
+        for row in rows:
+            match = saved.get(row["name"])
+            if match is None:
+                statuses.append({"name": row["name"], "status": "skipped", "id": None})
+            else:
+                status = "updated" if row["name"] in existing else "created"
+                statuses.append({"name": row["name"], "status": status, "id": match["id"]})
+        return statuses
+    
     async def get_tracked_objects(self) -> List[TrackedObject]:
         """Get all tracked objects"""
+        # The Supabase client is synchronous and can't be interrupted, so don't start late work
+        check_deadline()
         try:
             result = self.client.table("tracked_objects")\
                 .select("*")\
+                .eq("household_id", current_household())\
                 .order("created_at", desc=True)\
                 .execute()
             
-            return [TrackedObject(**obj) for obj in result.data]
+            return self._with_pending([TrackedObject(**obj) for obj in result.data])
             
         except Exception as e:
             print(f"Database error fetching objects: {e}")
             return []
     
+    async def iter_tracked_objects(self, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Stream rows using keyset pagination on id"""
+        household = current_household()
+        last_id = 0
+        while True:
+            result = self.client.table("tracked_objects")\
+                .select("*")\
+                .eq("household_id", household)\
+                .gt("id", last_id)\
+                .order("id")\
+                .limit(batch_size)\
+                .execute()
+            
+            for row in result.data:
+                yield location_buffer.overlay_row(row)
+            
+            if len(result.data) < batch_size:
+                return
+            last_id = result.data[-1]["id"]
+    
     async def find_matching_objects(self, query: str) -> List[TrackedObject]:
         """Find objects that match the search query"""
+        check_deadline()
         try:
             # Search in both name and alias fields
             result = self.client.table("tracked_objects")\
                 .select("*")\
+                .eq("household_id", current_household())\
                 .or_(f"name.ilike.%{query}%,alias.ilike.%{query}%")\
                 .execute()
             
-            return [TrackedObject(**obj) for obj in result.data]
+            return self._with_pending([TrackedObject(**obj) for obj in result.data])
             
         except Exception as e:
             print(f"Database error searching objects: {e}")
@@ -97,12 +232,42 @@ class DatabaseManager:
             print(f"Database error updating location: {e}")
             return False
     
+    async def bulk_update_object_locations(self, updates: List[Dict[str, Any]]) -> int:
+        """Write many location updates; UPDATE only, so rows deleted meanwhile stay deleted.
+
+        Rows already holding a newer sighting (flushed earlier, or by another
+        worker) are left alone.
+        """
+        if not updates:
+            return 0
+        
+        def write_all() -> int:
+            written = 0
+            for update in updates:
+                # Only the last-seen fields: an upsert would re-insert deleted rows and
+                # overwrite name/alias with whatever they were when the update was queued
+                result = self.client.table("tracked_objects")\
+                    .update({key: update[key] for key in LOCATION_FIELDS})\
+                    .eq("id", update["id"])\
+                    .eq("household_id", update["household_id"])\
+                    .or_(f"last_seen_timestamp.is.null,last_seen_timestamp.lte.{int(update['last_seen_timestamp'])}")\
+                    .execute()
+                written += len(result.data)
+            return written
+        
+        # PostgREST has no multi-row UPDATE; the per-row calls run off the event loop
+        return await asyncio.to_thread(write_all)
+    
     async def delete_tracked_object(self, object_id: int) -> bool:
         """Delete a tracked object"""
+        household = current_household()
+        # Discard first so reads stop overlaying a location for the deleted id
+        location_buffer.discard(object_id, household)
         try:
             result = self.client.table("tracked_objects")\
                 .delete()\
                 .eq("id", object_id)\
+                .eq("household_id", household)\
                 .execute()
             
             return len(result.data) > 0
@@ -110,12 +275,30 @@ class DatabaseManager:
         except Exception as e:
             print(f"Database error deleting object: {e}")
             return False
+    
+    async def ping(self):
+        """Single-row read used by readiness probes"""
+        # postgrest's execute() is blocking; in a thread the probe timeout can still fire
+        await asyncio.to_thread(self.client.table("tracked_objects").select("id").limit(1).execute)
 
 # Global database instance (will be created when needed)
 db = None
 
+def create_database_manager() -> BaseDatabaseManager:
+    """Build the storage backend selected by DATABASE_BACKEND (supabase | sqlite)"""
+    backend = os.getenv("DATABASE_BACKEND", "supabase").lower()
+    if backend == "sqlite":
+        from database_sqlite import SQLiteDatabaseManager
+        return SQLiteDatabaseManager(
+            os.getenv("SQLITE_PATH", "object_finder.db"),
+            read_pool_size=int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+        )
+    if backend != "supabase":
+        raise ValueError(f"Unknown DATABASE_BACKEND '{backend}'")
+    return DatabaseManager()
+
 def get_db():
     global db
     if db is None:
-        db = DatabaseManager()
-    return db
\ No newline at end of file
+        db = create_database_manager()
+    return db
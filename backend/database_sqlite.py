@@ -0,0 +1,373 @@
+import asyncio
+import sqlite3
+import threading
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar
+
+from database import BaseDatabaseManager
+from services.location_buffer import location_buffer
+from utils.deadline import DeadlineExceeded, remaining
+from utils.tenancy import current_household
+from models import TrackedObject, TrackedObjectCreate
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked_objects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    household_id TEXT NOT NULL DEFAULT 'default',
+    name TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    last_seen_timestamp INTEGER,
+    location_phrase TEXT,
+    video_no TEXT,
+    confidence REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracked_objects_last_seen ON tracked_objects(last_seen_timestamp);
+-- household_id leads every index so a household's reads touch only its own rows
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tracked_objects_household_name ON tracked_objects(household_id, name);
+CREATE INDEX IF NOT EXISTS idx_tracked_objects_household_created ON tracked_objects(household_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_tracked_objects_household_id ON tracked_objects(household_id, id);
+
+-- Trigram FTS5 index gives substring matching over name/alias without a table scan
+CREATE VIRTUAL TABLE IF NOT EXISTS tracked_objects_fts USING fts5(
+    name, alias, content='tracked_objects', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS tracked_objects_ai AFTER INSERT ON tracked_objects BEGIN
+    INSERT INTO tracked_objects_fts(rowid, name, alias) VALUES (new.id, new.name, new.alias);
+END;
+CREATE TRIGGER IF NOT EXISTS tracked_objects_ad AFTER DELETE ON tracked_objects BEGIN
+    INSERT INTO tracked_objects_fts(tracked_objects_fts, rowid, name, alias)
+    VALUES ('delete', old.id, old.name, old.alias);
+END;
+CREATE TRIGGER IF NOT EXISTS tracked_objects_au AFTER UPDATE OF name, alias ON tracked_objects BEGIN
+    INSERT INTO tracked_objects_fts(tracked_objects_fts, rowid, name, alias)
+    VALUES ('delete', old.id, old.name, old.alias);
+    INSERT INTO tracked_objects_fts(rowid, name, alias) VALUES (new.id, new.name, new.alias);
+END;
+
+-- Change log read by every worker's change feed. prune_changes keeps only the newest N rows,
+-- whether or not every worker has read them; a feed that finds a gap in seq resyncs
+CREATE TABLE IF NOT EXISTS object_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    object_id INTEGER NOT NULL,
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+CREATE TRIGGER IF NOT EXISTS object_changes_ai AFTER INSERT ON tracked_objects BEGIN
+    INSERT INTO object_changes(op, object_id) VALUES ('insert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS object_changes_au AFTER UPDATE ON tracked_objects BEGIN
+    INSERT INTO object_changes(op, object_id) VALUES ('update', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS object_changes_ad AFTER DELETE ON tracked_objects BEGIN
+    INSERT INTO object_changes(op, object_id) VALUES ('delete', old.id);
+END;
+"""
+
+# Trigram tokens need at least three characters; shorter queries fall back to LIKE
+FTS_MIN_QUERY_LENGTH = 3
+
+class SQLiteDatabaseManager(BaseDatabaseManager):
+    """Embedded SQLite backend for small or offline deployments.
+
+    One writer connection guarded by a lock plus a small pool of reader
+    connections; WAL mode lets the readers run alongside the writer. Every
+    query runs in a worker thread, and waiting for a pooled reader is an
+    await, so neither a slow query nor an exhausted pool blocks the loop.
+    """
+
+    def __init__(self, path: str = "object_finder.db", read_pool_size: int = 4):
+        if path == ":memory:":
+            # A named shared-cache database so the pooled readers see the writer's data
+            self.path = f"file:object_finder_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        else:
+            self.path = path
+        self._uri = self.path.startswith("file:")
+
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.executescript(SCHEMA)
+        self._writer.commit()
+
+        self._readers = [self._connect() for _ in range(max(1, read_pool_size))]
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, uri=self._uri, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _idle_pool(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._idle_readers is None or self._pool_loop is not loop:
+            # asyncio queues belong to one loop; rebuilt if another loop takes over
+            self._pool_loop = loop
+            self._idle_readers = asyncio.Queue()
+            for conn in self._readers:
+                self._idle_readers.put_nowait(conn)
+        return self._idle_readers
+
+    @asynccontextmanager
+    async def _reader(self):
+        idle = self._idle_pool()
+        # Waiting for a pooled connection counts against the request deadline
+        left = remaining()
+        try:
+            conn = await asyncio.wait_for(idle.get(), timeout=None if left is None else max(0.0, left))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Request deadline exceeded waiting for a database connection")
+        try:
+            yield conn
+        finally:
+            idle.put_nowait(conn)
+
+    async def _read(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `query` on a pooled reader in a worker thread"""
+        async with self._reader() as conn:
+            work = asyncio.ensure_future(asyncio.to_thread(query, conn))
+            try:
+                return await asyncio.shield(work)
+            except asyncio.CancelledError:
+                # Abort the statement, and hold the connection until the thread lets go of it
+                conn.interrupt()
+                await asyncio.wait([work])
+                raise
+
+    def _write_sync(self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        with self._writer_cursor() as conn:
+            return statements(conn)
+
+    async def _write(self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `statements` in one writer transaction in a worker thread"""
+        return await asyncio.to_thread(self._write_sync, statements)
+
+    @contextmanager
+    def _writer_cursor(self):
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    @staticmethod
+    def _to_model(row: sqlite3.Row) -> TrackedObject:
+        return TrackedObject(**dict(row))
+
+    async def create_tracked_object(self, obj: TrackedObjectCreate) -> TrackedObject:
+        """Create a new tracked object"""
+        values = (current_household(), obj.name.lower(), obj.alias, datetime.now().isoformat())
+        try:
+            row = await self._write(lambda conn: conn.execute(
+                """INSERT INTO tracked_objects (household_id, name, alias, created_at)
+                   VALUES (?, ?, ?, ?) RETURNING *""",
+                values
+            ).fetchone())
+            return self._to_model(row)
+
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Object '{obj.name}' already exists")
+        except Exception as e:
+            print(f"Database error creating object: {e}")
+            raise
+
+    async def upsert_tracked_objects(self, objects: List[TrackedObjectCreate],
+                                     update_existing: bool = False) -> List[Dict[str, Any]]:
+        """Insert a batch of objects with ON CONFLICT (household_id, name) handling in one transaction"""
+        if not objects:
+            return []
+        household = current_household()
+        now = datetime.now().isoformat()
+        rows = [(household, obj.name.lower(), obj.alias, now) for obj in objects]
+        if update_existing:
+            sql = """INSERT INTO tracked_objects (household_id, name, alias, created_at) VALUES (?, ?, ?, ?)
+                     ON CONFLICT(household_id, name) DO UPDATE SET alias = excluded.alias RETURNING id"""
+        else:
+            sql = """INSERT INTO tracked_objects (household_id, name, alias, created_at) VALUES (?, ?, ?, ?)
+                     ON CONFLICT(household_id, name) DO NOTHING RETURNING id"""
+
+        def write(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+            statuses = []
+            names = [row[1] for row in rows]
+            placeholders = ",".join("?" * len(names))
+            existing = {
+                row["name"]: row["id"]
+                for row in conn.execute(
+                    f"SELECT id, name FROM tracked_objects WHERE household_id = ? AND name IN ({placeholders})",
+                    [household, *names]
+                )
+            }
+            for row in rows:
+                name = row[1]
+                returned = conn.execute(sql, row).fetchone()
+                if name not in existing:
+                    statuses.append({"name": name, "status": "created", "id": returned["id"]})
+                elif update_existing:
+                    statuses.append({"name": name, "status": "updated", "id": returned["id"]})
+                else:
+                    statuses.append({"name": name, "status": "skipped", "id": existing[name]})
+            return statuses
+
+        return await self._write(write)
+
+    async def get_tracked_objects(self) -> List[TrackedObject]:
+        """Get all tracked objects"""
+        household = current_household()
+        try:
+            rows = await self._read(lambda conn: conn.execute(
+                "SELECT * FROM tracked_objects WHERE household_id = ? ORDER BY created_at DESC",
+                (household,)
+            ).fetchall())
+            return self._with_pending([self._to_model(row) for row in rows])
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Database error fetching objects: {e}")
+            return []
+
+    async def iter_tracked_objects(self, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Stream rows using keyset pagination on id, ``batch_size`` rows at a time.
+
+        Each page is fetched and its reader returned to the pool before any row
+        is yielded, so a slow consumer never holds a pooled connection.
+        """
+        household = current_household()
+        last_id = 0
+        while True:
+            rows = await self._read(lambda conn: conn.execute(
+                "SELECT * FROM tracked_objects WHERE household_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (household, last_id, batch_size)
+            ).fetchall())
+            for row in rows:
+                yield location_buffer.overlay_row(dict(row))
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    async def find_matching_objects(self, query: str) -> List[TrackedObject]:
+        """Find objects whose name or alias contains the query"""
+        household = current_household()
+        if len(query) >= FTS_MIN_QUERY_LENGTH:
+            phrase = '"' + query.replace('"', '""') + '"'
+            # CROSS JOIN keeps the FTS match as the outer loop; otherwise the
+            # planner walks the household's rows and probes FTS for each one
+            sql = """SELECT t.* FROM tracked_objects_fts f
+                     CROSS JOIN tracked_objects t ON t.id = f.rowid
+                     WHERE tracked_objects_fts MATCH ? AND t.household_id = ?"""
+            params = (phrase, household)
+        else:
+            pattern = f"%{query}%"
+            sql = "SELECT * FROM tracked_objects WHERE household_id = ? AND (name LIKE ? OR alias LIKE ?)"
+            params = (household, pattern, pattern)
+        try:
+            rows = await self._read(lambda conn: conn.execute(sql, params).fetchall())
+            return self._with_pending([self._to_model(row) for row in rows])
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Database error searching objects: {e}")
+            return []
+
+    async def update_object_location(self, object_id: int, video_no: str,
+                                   location: str, confidence: float,
+                                   timestamp: int) -> bool:
+        """Update object's last seen location"""
+        try:
+            cursor = await self._write(lambda conn: conn.execute(
+                """UPDATE tracked_objects
+                   SET last_seen_timestamp = ?, location_phrase = ?, video_no = ?, confidence = ?
+                   WHERE id = ?""",
+                (timestamp, location, video_no, confidence, object_id)
+            ))
+            return cursor.rowcount > 0
+
+        except Exception as e:
+            print(f"Database error updating location: {e}")
+            return False
+
+    async def bulk_update_object_locations(self, updates: List[Dict[str, Any]]) -> int:
+        """Write many location updates in a single transaction; older sightings never replace newer ones"""
+        if not updates:
+            return 0
+        # rowcount, unlike total_changes, leaves out the change log rows written by triggers
+        cursor = await self._write(lambda conn: conn.executemany(
+            """UPDATE tracked_objects
+               SET last_seen_timestamp = :last_seen_timestamp, location_phrase = :location_phrase,
+                   video_no = :video_no, confidence = :confidence
+               WHERE id = :id AND household_id = :household_id
+                 AND (last_seen_timestamp IS NULL OR last_seen_timestamp <= :last_seen_timestamp)""",
+            updates
+        ))
+        return cursor.rowcount
+
+    async def delete_tracked_object(self, object_id: int) -> bool:
+        """Delete a tracked object"""
+        household = current_household()
+        location_buffer.discard(object_id, household)
+        try:
+            cursor = await self._write(lambda conn: conn.execute(
+                "DELETE FROM tracked_objects WHERE id = ? AND household_id = ?", (object_id, household)
+            ))
+            return cursor.rowcount > 0
+
+        except Exception as e:
+            print(f"Database error deleting object: {e}")
+            return False
+
+    async def latest_change_seq(self) -> int:
+        """Sequence number of the newest change log entry (0 when empty)"""
+        row = await self._read(
+            lambda conn: conn.execute("SELECT COALESCE(MAX(seq), 0) FROM object_changes").fetchone()
+        )
+        return row[0]
+
+    async def changes_since(self, seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """Change log entries after ``seq`` with the current row of each changed object"""
+        def read(conn: sqlite3.Connection):
+            changes = [dict(row) for row in conn.execute(
+                "SELECT seq, op, object_id FROM object_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, limit)
+            )]
+            ids = sorted({change["object_id"] for change in changes if change["op"] != "delete"})
+            records = {}
+            if ids:
+                placeholders = ",".join("?" * len(ids))
+                records = {
+                    row["id"]: dict(row)
+                    for row in conn.execute(f"SELECT * FROM tracked_objects WHERE id IN ({placeholders})", ids)
+                }
+            return changes, records
+
+        changes, records = await self._read(read)
+        for change in changes:
+            change["record"] = records.get(change["object_id"])
+        return changes
+
+    async def prune_changes(self, keep: int) -> int:
+        """Drop all but the newest ``keep`` change log entries"""
+        cursor = await self._write(lambda conn: conn.execute(
+            "DELETE FROM object_changes WHERE seq <= (SELECT MAX(seq) FROM object_changes) - ?",
+            (keep,)
+        ))
+        return cursor.rowcount
+
+    async def ping(self):
+        """Single-row read used by readiness probes"""
+        await self._read(lambda conn: conn.execute("SELECT id FROM tracked_objects LIMIT 1").fetchall())
+
+    def close(self):
+        """Close every pooled connection"""
+        for conn in self._readers:
+            conn.close()
+        self._writer.close()
@@ -1,30 +1,115 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
 import uvicorn
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
+import time
 
 # Import routers and utilities
-from routers import upload, objects, search, admin
+from routers import upload, objects, search, admin, webhooks
 from utils.error_handler import ErrorHandler
+from utils.admission import AdmissionMiddleware, admission_controller
+from utils.deadline import DeadlineExceeded, DeadlineMiddleware
+from utils.upload_guard import UploadGuardMiddleware
+from utils.tenancy import HouseholdMiddleware
+from utils.compression import CompressionMiddleware, PrecomputedJSON
+from utils.drain import DrainMiddleware, drain_on_signal, request_drainer
+from services.location_buffer import location_buffer
+from services.sightings import sighting_store
+from services.video_catalog import video_catalog
+from services.prewarm import prewarmer
+from services.answer_synthesis import answer_synthesizer
+from services.health import health_prober
+from services.change_feed import start_change_feed, stop_change_feed
+from services.snapshot import state_snapshot
+from services.transcode import transcode_stage
+from utils.profiling import loop_lag_monitor
+from utils.performance import answer_cache
 
 load_dotenv()
 
+# Seconds shutdown waits for in-flight requests and background work before cancelling them
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "25"))
+
+async def drain_requests():
+    """Refuse new work and let accepted requests finish, while the server still serves them"""
+    request_drainer.begin()
+    # Open metric streams never finish by themselves
+    await admin.metrics_broadcaster.stop()
+    await request_drainer.wait_idle(DRAIN_TIMEOUT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start warm: cached searches, prewarmed answers and latency baselines from the last process
+    state_snapshot.load()
+    request_drainer.reset()
+    await location_buffer.start()
+    prewarmer.start()
+    health_prober.start()
+    loop_lag_monitor.start()
+    await start_change_feed()
+    # Drain on SIGTERM/SIGINT, before the server closes its sockets and connections
+    restore_signals = drain_on_signal(drain_requests)
+    yield
+    restore_signals()
+    # Already done if a signal started the shutdown; background work gets its own budget
+    drain_deadline = time.monotonic() + DRAIN_TIMEOUT
+    await drain_requests()
+    await stop_change_feed()
+    await loop_lag_monitor.stop()
+    await health_prober.stop()
+    await prewarmer.stop(grace=drain_deadline - time.monotonic())
+    await answer_synthesizer.stop(grace=drain_deadline - time.monotonic())
+    await answer_cache.stop(grace=drain_deadline - time.monotonic())
+    transcode_stage.shutdown()
+    # Guarantee queued location updates reach the database before exit
+    await location_buffer.stop()
+    sighting_store.close()
+    video_catalog.close()
+    state_snapshot.save()
+
 app = FastAPI(
     title="Object Finder API",
     description="AI-powered object location service using Memories.ai",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add exception handlers
 app.add_exception_handler(HTTPException, ErrorHandler.http_exception_handler)
 app.add_exception_handler(RequestValidationError, ErrorHandler.validation_exception_handler)
+app.add_exception_handler(DeadlineExceeded, ErrorHandler.deadline_exceeded_handler)
 app.add_exception_handler(Exception, ErrorHandler.general_exception_handler)
 
+# Scope every request to its household (X-Household-Id) for storage, upstream calls and caches
+app.add_middleware(HouseholdMiddleware,
+                   required=os.getenv("HOUSEHOLD_REQUIRED", "false").lower() in ("1", "true", "yes"))
+
+# Admission control: shed overload before it queues in the event loop.
+# Added before CORS so shed responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+# Request deadlines wrap admission so time spent queued counts against the budget
+app.add_middleware(DeadlineMiddleware)
+
+# Reject oversized or non-video uploads while they stream, before admission or spooling
+app.add_middleware(UploadGuardMiddleware, paths=("/api/upload",), max_file_size=upload.MAX_FILE_SIZE)
+app.add_middleware(UploadGuardMiddleware, paths=("/api/upload/batch",), max_file_size=upload.MAX_FILE_SIZE,
+                   max_files=upload.UPLOAD_BATCH_MAX_FILES)
+
+# Compress JSON/NDJSON/text responses (zstd, brotli or gzip); SSE and small bodies pass through
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# Outside everything but CORS: once shutdown begins, new requests are turned away
+# before they queue, and the ones already inside are counted until they finish
+app.add_middleware(DrainMiddleware, drainer=request_drainer)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,26 +124,38 @@ app.include_router(upload.router)
 app.include_router(objects.router)
 app.include_router(search.router)
 app.include_router(admin.router)
+app.include_router(webhooks.router)
+
+ROOT_PAYLOAD = PrecomputedJSON({
+    "message": "Object Finder API is running!",
+    "docs": "Visit /docs for API documentation",
+    "health": "Visit /health for health check",
+    "version": "1.0.0",
+    "status": "active"
+})
 
 @app.get("/")
-async def root():
-    return {
-        "message": "Object Finder API is running!",
-        "docs": "Visit /docs for API documentation",
-        "health": "Visit /health for health check",
-        "version": "1.0.0",
-        "status": "active"
-    }
+async def root(request: Request):
+    return ROOT_PAYLOAD.response(request)
+
+@app.get("/livez")
+async def liveness():
+    """Process is up and the event loop is responsive; no I/O"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Last background probe of each dependency; never touches them itself"""
+    snapshot = health_prober.snapshot()
+    if request_drainer.draining:
+        # Take this worker out of rotation as soon as it starts shutting down
+        snapshot = {**snapshot, "ready": False, "draining": True}
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
 
 @app.get("/health")
 async def health_check():
-    try:
-        # Test database connection
-        from database import db
-        await db.get_tracked_objects()
-        db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
+    # Served from the background prober so frequent probes add no database load
+    db_status = health_prober.status_of("database")
     
     return {
         "status": "healthy",
@@ -70,10 +167,13 @@ async def health_check():
             "objects": "/api/objects",
             "search": "/api/search",
             "health": "/health",
+            "liveness": "/livez",
+            "readiness": "/readyz",
             "docs": "/docs"
         },
         "timestamp": "2025-10-13T12:00:00Z"
     }
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True,
+                timeout_graceful_shutdown=int(DRAIN_TIMEOUT) + 5)
@@ -22,6 +22,10 @@ class TrackedObject(BaseModel):
 
 class SearchQuery(BaseModel):
     query: str = Field(..., min_length=1, max_length=200)
+    # Only consider footage from this room and/or uploaded within this window
+    room: Optional[str] = Field(None, max_length=50)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
 
 class SearchResult(BaseModel):
     found: bool
@@ -31,6 +35,10 @@ class SearchResult(BaseModel):
     confidence: Optional[float] = None
     message: Optional[str] = None
     object_info: Optional[TrackedObject] = None
+    room: Optional[str] = None
+    # Seconds since the answer was worked out; stale answers are being refreshed in the background
+    age: Optional[float] = None
+    stale: bool = False
 
 class UploadResponse(BaseModel):
     success: bool
@@ -38,6 +46,20 @@ class UploadResponse(BaseModel):
     message: str
     file_name: str
     file_size: int
+    room: Optional[str] = None
+
+class BatchUploadItem(BaseModel):
+    file_name: str
+    success: bool
+    video_no: Optional[str] = None
+    message: str
+    file_size: int = 0
+
+class BatchUploadResponse(BaseModel):
+    uploaded: int
+    failed: int
+    elapsed_seconds: float
+    results: List[BatchUploadItem]
 
 class APIResponse(BaseModel):
     success: bool
@@ -48,4 +70,14 @@ class ProcessingStatus(str, Enum):
     UPLOADING = "uploading"
     PROCESSING = "processing" 
     COMPLETED = "completed"
-    FAILED = "failed"
\ No newline at end of file
+    FAILED = "failed"
+
+class VideoRecord(BaseModel):
+    video_no: str
+    household_id: Optional[str] = None
+    file_name: Optional[str] = None
+    room: Optional[str] = None
+    status: ProcessingStatus = ProcessingStatus.PROCESSING
+    uploaded_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+    error: Optional[str] = None
@@ -1,6 +1,28 @@
-from fastapi import APIRouter, Depends
-from utils.performance import perf_monitor, search_cache
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from utils.performance import answer_cache, perf_monitor, search_cache
+from services.location_buffer import location_buffer
+from services.sightings import sighting_store
+from services.video_catalog import video_catalog
+from services.prewarm import prewarmer
+from services.answer_synthesis import answer_synthesizer
+from services.memories_api import memories_api
+from services.object_index import object_index
+from services.object_resolver import object_resolver
+from services.change_feed import get_change_feed_stats
+from services.snapshot import state_snapshot
+from services.transcode import transcode_stage
+from utils.events import event_bus
+from utils.admission import admission_controller
+from utils.deadline import deadline_stats
+from utils.compression import get_compression_stats
+from utils.drain import request_drainer
+from services.metrics_stream import MetricsBroadcaster
+from utils.profiling import sampling_profiler, loop_lag_monitor, memory_tracker
 from typing import Dict, Any
+import asyncio
+import os
+import threading
 import time
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -8,26 +30,92 @@ router = APIRouter(prefix="/api/admin", tags=["admin"])
 # Store app start time for uptime calculation
 app_start_time = time.time()
 
-@router.get("/metrics")
-async def get_performance_metrics() -> Dict[str, Any]:
-    """Get performance metrics for monitoring"""
+def collect_metrics() -> Dict[str, Any]:
+    """Everything the dashboard shows, shared by the polling and streaming endpoints"""
     return {
         "performance_metrics": perf_monitor.get_metrics(),
         "cache_stats": {
-            "search_cache_size": len(search_cache.cache),
+            "search_cache_size": len(search_cache),
             "search_cache_max_size": search_cache.max_size,
-            "search_cache_ttl": search_cache.ttl_seconds
+            "search_cache_ttl": search_cache.ttl_seconds,
+            "search_cache_households": len(search_cache.shards),
+            "search_cache_evictions": search_cache.evictions,
+            "answer_cache": answer_cache.get_stats()
         },
+        "location_write_buffer": location_buffer.get_stats(),
+        "sightings": sighting_store.get_stats(),
+        "video_catalog": video_catalog.get_stats(),
+        "prewarm": prewarmer.get_stats(),
+        "answer_synthesis": answer_synthesizer.get_stats(),
+        "upstream_hedging": memories_api.hedger.get_stats(),
+        "object_index": object_index.get_stats(),
+        "resolver": object_resolver.get_stats(),
+        "change_feed": get_change_feed_stats(),
+        "compression": get_compression_stats(),
+        "transcoding": transcode_stage.get_stats(),
+        "drain": request_drainer.get_stats(),
+        "state_snapshot": state_snapshot.get_stats(),
+        "events": event_bus.get_stats(),
+        "admission": admission_controller.get_stats(),
+        "deadlines": dict(deadline_stats),
+        "metrics_stream": metrics_broadcaster.get_stats(),
+        "loop_lag": loop_lag_monitor.get_stats(limit=0),
         "system_info": {
             "timestamp": time.time(),
             "uptime_seconds": time.time() - app_start_time
         }
     }
 
+@router.get("/metrics")
+async def get_performance_metrics() -> Dict[str, Any]:
+    """Get performance metrics for monitoring"""
+    return collect_metrics()
+
+# Shared producer behind /metrics/stream
+metrics_broadcaster = MetricsBroadcaster(
+    collect_metrics,
+    interval=float(os.getenv("METRICS_STREAM_INTERVAL", "2")),
+    queue_size=int(os.getenv("METRICS_STREAM_QUEUE_SIZE", "8")),
+    max_subscribers=int(os.getenv("METRICS_STREAM_MAX_CLIENTS", "16"))
+)
+
+@router.get("/metrics/stream")
+async def stream_performance_metrics():
+    """
+    Server-sent events with live metrics
+    
+    Sends a `snapshot` event with the full metrics document, then `delta` events
+    holding a JSON merge patch (RFC 7396) of what changed since the previous one.
+    A client that falls behind receives a fresh `snapshot` instead of a backlog.
+    """
+    try:
+        subscriber = metrics_broadcaster.subscribe()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    async def events():
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                if message is None:
+                    # Broadcaster stopped: the server is shutting down
+                    return
+                yield message
+        finally:
+            metrics_broadcaster.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/cache/clear")
 async def clear_cache():
     """Clear all caches"""
     search_cache.clear()
+    answer_cache.clear()
+    object_index.invalidate()
     return {"message": "Cache cleared successfully"}
 
 @router.post("/metrics/reset")
@@ -35,3 +123,58 @@ async def reset_metrics():
     """Reset performance metrics"""
     perf_monitor.reset_metrics()
     return {"message": "Metrics reset successfully"}
+
+@router.post("/profile")
+async def run_sampling_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+    all_threads: bool = False,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$")
+):
+    """
+    Sample stacks for `seconds` and return them collapsed (flamegraph.pl / speedscope input)
+    
+    By default only the event-loop thread is sampled; `all_threads=true` includes
+    worker threads too. `format=json` returns the top stacks with counts instead.
+    """
+    thread_id = None if all_threads else (loop_lag_monitor.loop_thread_id or threading.get_ident())
+    try:
+        profile = await asyncio.to_thread(sampling_profiler.sample, seconds, interval_ms / 1000, thread_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if format == "json":
+        return {
+            "samples": profile["samples"],
+            "interval_ms": interval_ms,
+            "top_stacks": [{"stack": stack, "count": count} for stack, count in profile["stacks"].most_common(50)]
+        }
+    return PlainTextResponse(
+        sampling_profiler.collapsed(profile),
+        headers={"Content-Disposition": f'attachment; filename="profile-{int(time.time())}.collapsed"'}
+    )
+
+@router.get("/loop-lag")
+async def get_loop_lag(limit: int = Query(20, ge=0, le=100)):
+    """Event-loop stalls longer than LOOP_LAG_THRESHOLD_MS, newest first, with the blocking stack"""
+    return loop_lag_monitor.get_stats(limit=limit)
+
+@router.post("/memory/snapshot")
+async def take_memory_baseline(limit: int = Query(20, ge=1, le=200)):
+    """Start tracemalloc (if needed) and record a baseline heap snapshot"""
+    return await asyncio.to_thread(memory_tracker.start_baseline, limit)
+
+@router.get("/memory/diff")
+async def get_memory_diff(limit: int = Query(20, ge=1, le=200),
+                          group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+    """Allocation growth since the baseline snapshot, largest first"""
+    try:
+        return await asyncio.to_thread(memory_tracker.diff, limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/memory/snapshot")
+async def stop_memory_tracking():
+    """Drop the baseline and stop tracemalloc (tracing slows allocations)"""
+    memory_tracker.stop()
+    return {"message": "Memory tracking stopped"}
@@ -1,10 +1,125 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from database import get_db
+from services.object_index import object_index
+from services.sightings import sighting_store
+from utils.compression import PrecomputedJSON
+from utils.deadline import DeadlineExceeded
+from utils.tenancy import current_household
+from utils.events import event_bus, OBJECT_CREATED, OBJECT_DELETED, OBJECT_CHANGED
 from models import TrackedObjectCreate, TrackedObject, APIResponse
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, AsyncIterator
+from collections import Counter
+from datetime import datetime
+import json
 
 router = APIRouter(prefix="/api/objects", tags=["objects"])
 
+# Objects written per upsert round-trip during bulk import / read per export page
+BULK_BATCH_SIZE = 500
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Constant payload, serialized and compressed once at import
+COMMON_OBJECTS = PrecomputedJSON({
+    "common_objects": [
+        {"name": "keys", "alias": "car keys, house keys, office keys, keychain, key ring"},
+        {"name": "wallet", "alias": "leather wallet, purse, billfold, money clip"},
+        {"name": "phone", "alias": "iPhone, smartphone, mobile phone, cell phone"},
+        {"name": "glasses", "alias": "reading glasses, sunglasses, eyeglasses, spectacles"},
+        {"name": "airpods", "alias": "AirPods, earbuds, wireless earphones, headphones"},
+        {"name": "remote", "alias": "TV remote, remote control, controller"},
+        {"name": "charger", "alias": "phone charger, USB cable, charging cable, power cord"},
+        {"name": "watch", "alias": "wristwatch, smartwatch, Apple Watch, fitness tracker"}
+    ],
+    "tips": [
+        "Use specific descriptions in the alias field",
+        "Include colors, brands, or distinguishing features",
+        "Add multiple ways you might refer to the object",
+        "Be descriptive but concise"
+    ]
+})
+
+async def _iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed request body into non-empty lines"""
+    remainder = b""
+    async for chunk in chunks:
+        remainder += chunk
+        *lines, remainder = remainder.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+class BulkImporter:
+    """Validates bulk import items and writes them in batched upserts"""
+
+    def __init__(self, db, update_existing: bool):
+        self.db = db
+        self.update_existing = update_existing
+        self.batch: List[tuple] = []
+        self.seen_names = set()
+        self.results: List[Dict[str, Any]] = []
+
+    async def add(self, index: int, item: Any):
+        if not isinstance(item, dict):
+            self.results.append({"index": index, "status": "invalid", "error": "Item must be a JSON object"})
+            return
+        try:
+            obj = TrackedObjectCreate(**item)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+            self.results.append({"index": index, "name": item.get("name"), "status": "invalid", "error": error})
+            return
+        if not obj.name.strip() or not obj.alias.strip():
+            self.results.append({"index": index, "name": obj.name, "status": "invalid",
+                                 "error": "Object name and description cannot be empty"})
+            return
+
+        name = obj.name.lower()
+        if name in self.seen_names:
+            self.results.append({"index": index, "name": name, "status": "duplicate",
+                                 "error": "Name appears earlier in this import"})
+            return
+        self.seen_names.add(name)
+        self.batch.append((index, obj))
+        if len(self.batch) >= BULK_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        try:
+            statuses = await self.db.upsert_tracked_objects(
+                [obj for _, obj in batch], update_existing=self.update_existing
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error bulk importing {len(batch)} objects: {e}")
+            statuses = [{"name": obj.name.lower(), "status": "error", "id": None,
+                         "error": "Database write failed"} for _, obj in batch]
+        for (index, obj), status in zip(batch, statuses):
+            self.results.append({"index": index, **status})
+            if status["status"] == "created":
+                await event_bus.emit(OBJECT_CREATED, {"object": TrackedObject(
+                    id=status["id"], name=status["name"], alias=obj.alias, created_at=datetime.now()
+                )})
+            elif status["status"] == "updated":
+                # household_id routes the change to this household's index partition
+                await event_bus.emit(OBJECT_CHANGED, {
+                    "op": "update", "object_id": status["id"], "old_record": None, "source": "local",
+                    "record": {"id": status["id"], "household_id": current_household(),
+                               "name": status["name"], "alias": obj.alias},
+                })
+
+    def summary(self) -> Dict[str, Any]:
+        self.results.sort(key=lambda result: result["index"])
+        counts = Counter(result["status"] for result in self.results)
+        return {"total": len(self.results), "counts": dict(counts), "results": self.results}
+
 @router.post("/", response_model=TrackedObject)
 async def create_tracked_object(obj: TrackedObjectCreate):
     """
@@ -24,11 +139,14 @@ async def create_tracked_object(obj: TrackedObjectCreate):
         # Create object in database
         db = get_db()
         new_object = await db.create_tracked_object(obj)
+        await event_bus.emit(OBJECT_CREATED, {"object": new_object})
         return new_object
         
     except ValueError as e:
         # Object already exists or validation error
         raise HTTPException(status_code=409, detail=str(e))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error creating tracked object: {e}")
         raise HTTPException(status_code=500, detail="Failed to create tracked object")
@@ -45,11 +163,10 @@ async def get_tracked_objects(
     - **search**: Search term to filter objects by name or alias
     """
     try:
-        db = get_db()
         if search:
-            objects = await db.find_matching_objects(search.strip())
+            objects = await get_db().find_matching_objects(search.strip())
         else:
-            objects = await db.get_tracked_objects()
+            objects = await object_index.all()
         
         # Apply limit if specified
         if limit and len(objects) > limit:
@@ -57,29 +174,136 @@ async def get_tracked_objects(
             
         return objects
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error fetching tracked objects: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch tracked objects")
 
+@router.post("/bulk")
+async def bulk_import_objects(
+    request: Request,
+    on_conflict: str = Query("skip", pattern="^(skip|update)$",
+                             description="What to do when a name already exists: skip or update its alias")
+):
+    """
+    Import many tracked objects at once
+    
+    Accepts a JSON array of `{"name", "alias"}` objects, or an NDJSON stream
+    (`Content-Type: application/x-ndjson`) with one object per line. Objects are
+    written in batched upserts and a status is reported per item.
+    """
+    db = get_db()
+    importer = BulkImporter(db, update_existing=on_conflict == "update")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    
+    try:
+        if content_type in NDJSON_CONTENT_TYPES:
+            index = 0
+            async for line in _iter_ndjson_lines(request.stream()):
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    importer.results.append({"index": index, "status": "invalid", "error": "Invalid JSON"})
+                else:
+                    await importer.add(index, item)
+                index += 1
+        else:
+            try:
+                items = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+            if not isinstance(items, list):
+                raise HTTPException(status_code=400, detail="Request body must be a JSON array of objects")
+            for index, item in enumerate(items):
+                await importer.add(index, item)
+        
+        await importer.flush()
+        return importer.summary()
+        
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        print(f"Error bulk importing objects: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import objects")
+
+@router.get("/export")
+async def export_objects():
+    """Stream every tracked object as NDJSON, one object per line"""
+    db = get_db()
+    
+    async def ndjson_lines():
+        lines = []
+        async for row in db.iter_tracked_objects(batch_size=BULK_BATCH_SIZE):
+            lines.append(json.dumps(row, default=str))
+            if len(lines) >= BULK_BATCH_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=tracked_objects.ndjson"}
+    )
+
 @router.get("/{object_id}", response_model=TrackedObject)
 async def get_tracked_object(object_id: int):
     """Get details for a specific tracked object"""
     try:
-        db = get_db()
-        objects = await db.get_tracked_objects()
-        obj = next((o for o in objects if o.id == object_id), None)
+        obj = await object_index.get(object_id)
         
         if not obj:
             raise HTTPException(status_code=404, detail="Object not found")
         
         return obj
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         print(f"Error fetching object {object_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch object")
 
+@router.get("/{object_id}/sightings")
+async def get_object_sightings(
+    object_id: int,
+    start: int = Query(0, ge=0, description="Range start (epoch milliseconds)"),
+    end: Optional[int] = Query(None, ge=0, description="Range end (epoch milliseconds), default now"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum sightings to return")
+):
+    """
+    Where an object was seen within a time range, newest first
+    
+    e.g. "where were my keys yesterday": pass yesterday's midnight-to-midnight as start/end
+    """
+    end = end if end is not None else 2**62
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if await object_index.get(object_id) is None:
+        raise HTTPException(status_code=404, detail="Object not found")
+    
+    sightings = sighting_store.query(object_id, start, end, limit)
+    return {"object_id": object_id, "start": start, "end": end,
+            "count": len(sightings), "sightings": sightings}
+
+@router.get("/{object_id}/sightings/frequent")
+async def get_frequent_locations(
+    object_id: int,
+    start: int = Query(0, ge=0, description="Range start (epoch milliseconds)"),
+    end: Optional[int] = Query(None, ge=0, description="Range end (epoch milliseconds), default now"),
+    k: int = Query(5, ge=1, le=50, description="Number of locations to return")
+):
+    """Most frequent locations for an object within a time range"""
+    end = end if end is not None else 2**62
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if await object_index.get(object_id) is None:
+        raise HTTPException(status_code=404, detail="Object not found")
+    
+    return {"object_id": object_id, "start": start, "end": end,
+            "locations": sighting_store.frequent_locations(object_id, start, end, k)}
+
 @router.delete("/{object_id}", response_model=APIResponse)
 async def delete_tracked_object(object_id: int):
     """Delete a tracked object"""
@@ -90,35 +314,20 @@ async def delete_tracked_object(object_id: int):
         if not success:
             raise HTTPException(status_code=404, detail="Object not found")
         
+        sighting_store.forget(object_id)
+        await event_bus.emit(OBJECT_DELETED, {"object_id": object_id})
         return APIResponse(
             success=True,
             message=f"Object {object_id} deleted successfully"
         )
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         print(f"Error deleting object {object_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete object")
 
 @router.get("/suggestions/common")
-async def get_common_objects():
+async def get_common_objects(request: Request):
     """Get suggestions for commonly tracked objects"""
-    return {
-        "common_objects": [
-            {"name": "keys", "alias": "car keys, house keys, office keys, keychain, key ring"},
-            {"name": "wallet", "alias": "leather wallet, purse, billfold, money clip"},
-            {"name": "phone", "alias": "iPhone, smartphone, mobile phone, cell phone"},
-            {"name": "glasses", "alias": "reading glasses, sunglasses, eyeglasses, spectacles"},
-            {"name": "airpods", "alias": "AirPods, earbuds, wireless earphones, headphones"},
-            {"name": "remote", "alias": "TV remote, remote control, controller"},
-            {"name": "charger", "alias": "phone charger, USB cable, charging cable, power cord"},
-            {"name": "watch", "alias": "wristwatch, smartwatch, Apple Watch, fitness tracker"}
-        ],
-        "tips": [
-            "Use specific descriptions in the alias field",
-            "Include colors, brands, or distinguishing features",
-            "Add multiple ways you might refer to the object",
-            "Be descriptive but concise"
-        ]
-    }
+    return COMMON_OBJECTS.response(request)
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from database import get_db
 from services.memories_api import memories_api
-from models import SearchQuery, SearchResult
+from services.location_buffer import location_buffer
+from services.object_index import object_index
+from services.object_resolver import resolve_query
+from services.sightings import sighting_store
+from services.prewarm import prewarmer
+from services.answer_synthesis import answer_synthesizer
+from services.video_catalog import normalize_room, video_catalog
+from models import SearchQuery, SearchResult, TrackedObject
+from utils.deadline import DeadlineExceeded
+from utils.performance import answer_cache, search_cache
+from utils.tenancy import current_household
+import os
 import re
+import time
 from typing import Dict, Any
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
+# searchAI hits fetched per search; more when a room/time scope may filter some out
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "5"))
+SEARCH_SCOPED_CANDIDATES = int(os.getenv("SEARCH_SCOPED_CANDIDATES", "15"))
+
 class SearchEnhancer:
     """Enhance search queries for better results"""
     
@@ -48,7 +64,13 @@ async def search_for_object(search_query: SearchQuery):
     Search for an object in uploaded videos
     
     - **query**: Natural language search query (e.g., "Where are my keys?")
+    - **room**: Only use footage tagged with this room at upload
+    - **since** / **until**: Only use footage uploaded within this window
     
+    Candidate videos are ranked by search score blended with how recently they
+    were uploaded, so the latest sighting wins over older footage. Answers are
+    cached stale-while-revalidate: `age` is how many seconds old the answer is,
+    and `stale: true` means a fresh one is being fetched in the background.
     Returns location information if found, or helpful message if not found
     """
     try:
@@ -56,15 +78,21 @@ async def search_for_object(search_query: SearchQuery):
             raise HTTPException(status_code=400, detail="Search query cannot be empty")
         
         query = search_query.query.strip()
+        scope = {"room": search_query.room, "since": search_query.since, "until": search_query.until}
+        # Webhooks delivered to other workers invalidate this worker's cached answers as they are applied
+        video_catalog.sync()
         print(f"Searching for: {query}")
         
-        # Extract object name from natural language query
-        object_name = SearchEnhancer.extract_object_name(query)
-        print(f"Extracted object: {object_name}")
-        
-        # Find matching tracked objects
-        db = get_db()
-        tracked_objects = await db.find_matching_objects(object_name)
+        # Rank every tracked object against the whole query
+        resolution = await resolve_query(query)
+        if resolution.matches:
+            tracked_objects = [obj for obj, _ in resolution.matches]
+            print(f"Resolved '{resolution.terms}' -> {resolution.best.name} ({resolution.matches[0][1]:.2f})")
+        else:
+            # Nothing similar enough; fall back to a substring match on the main word
+            object_name = SearchEnhancer.extract_object_name(query)
+            print(f"Extracted object: {object_name}")
+            tracked_objects = await get_db().find_matching_objects(object_name)
         
         if not tracked_objects:
             return SearchResult(
@@ -76,55 +104,21 @@ async def search_for_object(search_query: SearchQuery):
         tracked_obj = tracked_objects[0]
         print(f"Found tracked object: {tracked_obj.name}")
         
-        # Create enhanced search query using object aliases
-        enhanced_query = SearchEnhancer.enhance_search_query(tracked_obj.name, tracked_obj.alias)
-        print(f"Enhanced query: {enhanced_query}")
-        
-        # Search in uploaded videos using Memories.ai
-        search_results = await memories_api.search_videos(enhanced_query, limit=3)
-        
-        if not search_results or len(search_results) == 0:
-            return SearchResult(
-                found=False,
-                message=f"No videos found containing '{tracked_obj.name}'. Try uploading more videos of your spaces."
-            )
-        
-        # Get the best result
-        best_result = search_results[0]
-        print(f"Best result: {best_result}")
-        
-        # Get detailed location description using video chat
-        location_query = SearchEnhancer.create_location_query(tracked_obj.name)
-        chat_response = await memories_api.chat_with_video(
-            best_result.get("videoNo") or best_result.get("video_no", "unknown"),
-            location_query
-        )
+        async def answer_for(refresh: bool) -> Dict[str, Any]:
+            return (await locate_object(tracked_obj, scope, refresh)).model_dump(mode="json")
         
-        location_description = chat_response.get("response", "Location details not available")
-        confidence = best_result.get("score", best_result.get("confidence", 0.8))
-        timestamp = best_result.get("timestamp", best_result.get("time"))
-        video_no = best_result.get("videoNo") or best_result.get("video_no")
-        
-        # Update database with last seen information
-        if timestamp and video_no:
-            await db.update_object_location(
-                object_id=tracked_obj.id,
-                video_no=video_no,
-                location=location_description,
-                confidence=confidence,
-                timestamp=timestamp
+        if resolution.matches:
+            # Every phrasing that resolves to this object (in this scope) shares one answer
+            answer_key = f"{resolution.cache_key}|{normalize_room(scope['room'])}|{scope['since']}|{scope['until']}"
+            answer, age, stale = await answer_cache.get_or_compute(
+                answer_key, answer_for, cache_if=lambda answer: answer["found"]
             )
+        else:
+            answer, age, stale = await answer_for(False), 0.0, False
         
-        return SearchResult(
-            found=True,
-            location=location_description,
-            timestamp=timestamp,
-            video_no=video_no,
-            confidence=confidence,
-            object_info=tracked_obj
-        )
+        return SearchResult(**{**answer, "age": round((answer["age"] or 0) + age, 1), "stale": stale})
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         print(f"Search error: {e}")
@@ -133,13 +127,117 @@ async def search_for_object(search_query: SearchQuery):
             detail="Search failed. Please try again."
         )
 
+async def locate_object(tracked_obj: TrackedObject, scope: Dict[str, Any], refresh: bool = False) -> SearchResult:
+    """
+    Where `tracked_obj` was last seen within `scope` (room, since, until)
+    
+    With `refresh` the cached searchAI hits are skipped, so a background refresh
+    sees footage processed since the answer was first computed.
+    """
+    scoped = any(value is not None for value in scope.values())
+    # Answer from the location precomputed when the latest video was processed,
+    # unless a search has since seen the object in newer footage
+    precomputed = prewarmer.answer_for(tracked_obj.id)
+    precomputed_record = video_catalog.get(precomputed["video_no"]) if precomputed else None
+    if precomputed and video_catalog.in_scope(precomputed_record, **scope):
+        return SearchResult(
+            found=True,
+            location=precomputed["location"],
+            timestamp=precomputed["timestamp"],
+            video_no=precomputed["video_no"],
+            confidence=precomputed["confidence"],
+            object_info=tracked_obj,
+            room=precomputed_record.room if precomputed_record else None,
+            age=round(time.time() - precomputed["computed_at"], 1)
+        )
+    
+    # Create enhanced search query using object aliases
+    enhanced_query = SearchEnhancer.enhance_search_query(tracked_obj.name, tracked_obj.alias)
+    print(f"Enhanced query: {enhanced_query}")
+    if refresh:
+        # Re-ask searchAI rather than re-rank the hits the stale answer came from
+        search_cache.invalidate(lambda key, value: key.startswith(f"search_{enhanced_query}_"), current_household())
+    
+    # Search in uploaded videos using Memories.ai
+    search_results = await memories_api.search_videos(
+        enhanced_query, limit=SEARCH_SCOPED_CANDIDATES if scoped else SEARCH_CANDIDATES
+    )
+    
+    if not search_results or len(search_results) == 0:
+        return SearchResult(
+            found=False,
+            message=f"No videos found containing '{tracked_obj.name}'. Try uploading more videos of your spaces."
+        )
+    
+    # Prefer recent footage, and drop hits outside the requested room/time window,
+    # before spending a chat call on one of them
+    ranked = video_catalog.rank_hits(search_results, **scope)
+    if not ranked:
+        return SearchResult(
+            found=False,
+            message=f"No videos in the selected room or time range show '{tracked_obj.name}'."
+        )
+    
+    # Get the best result
+    best_result, best_record = ranked[0]
+    print(f"Best result: {best_result}")
+    
+    location_query = SearchEnhancer.create_location_query(tracked_obj.name)
+    confidence = best_result.get("score", best_result.get("confidence", 0.8))
+    # Same clock as prewarmed answers: the video's upload time, the hit's own timestamp only if unknown here
+    timestamp = video_catalog.seen_at(best_record, best_result.get("timestamp", best_result.get("time")))
+    video_no = best_result.get("videoNo") or best_result.get("video_no")
+    
+    # Answer from the hit's own snippet when it already says where the object is;
+    # the chat call then only refines the stored location in the background
+    synthesized = answer_synthesizer.answer(best_result, tracked_obj)
+    if synthesized:
+        location_description = synthesized[0]
+        if timestamp and video_no and not scoped:
+            answer_synthesizer.refine_later(tracked_obj, video_no, location_query, timestamp, confidence)
+    else:
+        # Get detailed location description using video chat
+        chat_response = await memories_api.chat_with_video(video_no or "unknown", location_query)
+        location_description = chat_response.get("response", "Location details not available")
+    
+    if timestamp and video_no:
+        sighting_store.record(tracked_obj.id, video_no, location_description, confidence, timestamp)
+        if not scoped:
+            # Only an unscoped search sees the newest footage, so only it moves the object's
+            # last seen location; the write-behind buffer persists it off the request path
+            location_buffer.enqueue(
+                tracked_obj,
+                video_no=video_no,
+                location=location_description,
+                confidence=confidence,
+                timestamp=timestamp
+            )
+    
+    return SearchResult(
+        found=True,
+        location=location_description,
+        timestamp=timestamp,
+        video_no=video_no,
+        confidence=confidence,
+        object_info=tracked_obj,
+        room=best_record.room if best_record else None
+    )
+
+@router.get("/resolve")
+async def resolve_search_query(
+    q: str = Query(..., min_length=1, max_length=200, description="Natural language query"),
+    limit: int = Query(5, ge=1, le=50, description="Maximum matches to return")
+):
+    """Show which tracked objects a query resolves to, with similarity scores"""
+    resolution = await resolve_query(q, limit)
+    return resolution.to_dict()
+
 @router.get("/history")
 async def get_search_history():
     """Get recently found objects with their locations"""
     try:
         # Get objects that have been found (have location data)
-        db = get_db()
-        all_objects = await db.get_tracked_objects()
+        all_objects = await object_index.all()
         found_objects = [
             obj for obj in all_objects 
             if obj.last_seen_timestamp and obj.location_phrase
@@ -168,8 +266,7 @@ async def get_search_history():
 async def get_search_suggestions():
     """Get search query suggestions based on tracked objects"""
     try:
-        db = get_db()
-        tracked_objects = await db.get_tracked_objects()
+        tracked_objects = await object_index.all()
         
         suggestions = []
         for obj in tracked_objects:
@@ -190,9 +287,10 @@ async def get_search_suggestions():
         
         return {
             "suggestions": suggestions[:8],  # Limit to 8 suggestions
-            "tracked_objects_count": len(tracked_objects)
+            "tracked_objects_count": len(tracked_objects),
+            "rooms": video_catalog.rooms()
         }
         
     except Exception as e:
         print(f"Error fetching suggestions: {e}")
-        return {"suggestions": [], "tracked_objects_count": 0}
+        return {"suggestions": [], "tracked_objects_count": 0, "rooms": []}
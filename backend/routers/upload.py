@@ -1,8 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
 from services.memories_api import memories_api
-from models import UploadResponse
+from services.video_catalog import normalize_room, video_catalog
+from models import UploadResponse, BatchUploadItem, BatchUploadResponse, ProcessingStatus, VideoRecord
+from utils.events import event_bus, VIDEO_UPLOADED
+from utils.upload_guard import SNIFF_BYTES, sniff_container
+from utils.deadline import DeadlineExceeded
+from utils.compression import PrecomputedJSON
+from utils.tenancy import current_household
+import asyncio
 import os
-from typing import List
+import time
+from typing import List, Optional
 import mimetypes
 
 router = APIRouter(prefix="/api", tags=["upload"])
@@ -15,40 +23,67 @@ ALLOWED_VIDEO_TYPES = [
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
+# Batch uploads: files per request and concurrent transfers to Memories.ai
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "20"))
+UPLOAD_BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "4"))
+
 def validate_video_file(file: UploadFile) -> None:
     """Validate uploaded video file"""
     
-    # Check file type
-    if file.content_type not in ALLOWED_VIDEO_TYPES:
-        # Also check by file extension as backup
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        if file_ext not in ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.mkv']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Supported formats: MP4, AVI, MOV, WMV, FLV, WebM, MKV"
-            )
+    # Check filename
+    if not file.filename or len(file.filename.strip()) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid filename"
+        )
     
-    # Check file size
-    if file.size and file.size > MAX_FILE_SIZE:
-        size_mb = file.size / (1024 * 1024)
+    # Check the container from the file's own bytes rather than the client's content type
+    head = file.file.read(SNIFF_BYTES)
+    file.file.seek(0)
+    if sniff_container(head) is None:
         raise HTTPException(
             status_code=400,
-            detail=f"File too large ({size_mb:.1f}MB). Maximum allowed size is 50MB."
+            detail=f"Invalid file type. Supported formats: MP4, AVI, MOV, WMV, FLV, WebM, MKV"
         )
     
-    # Check filename
-    if not file.filename or len(file.filename.strip()) == 0:
+    # Check file size (UploadGuardMiddleware already stops oversized bodies while streaming)
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(0)
+    if size > MAX_FILE_SIZE:
+        size_mb = size / (1024 * 1024)
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large ({size_mb:.1f}MB). Maximum allowed size is 50MB."
+        )
+
+MAX_ROOM_LENGTH = 50
+
+def validate_room(room: Optional[str]) -> Optional[str]:
+    """Normalised room tag for an upload, or None when none was given"""
+    room = normalize_room(room)
+    if room is not None and len(room) > MAX_ROOM_LENGTH:
         raise HTTPException(
             status_code=400,
-            detail="Invalid filename"
+            detail=f"Room name too long. Maximum is {MAX_ROOM_LENGTH} characters."
         )
+    return room
+
+async def register_uploaded_video(video_no: str, file_name: str, room: Optional[str] = None):
+    """Record a finished upload in the catalog and announce it"""
+    # Mock uploads have nothing to process; real ones complete via the webhook
+    status = ProcessingStatus.COMPLETED if video_no.startswith("mock_") else ProcessingStatus.PROCESSING
+    record = video_catalog.register_upload(video_no, file_name, status, room=room)
+    await event_bus.emit(VIDEO_UPLOADED, {"video_no": record.video_no, "record": record})
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_video(file: UploadFile = File(...)):
+async def upload_video(file: UploadFile = File(...), room: Optional[str] = Form(None)):
     """
     Upload a video file to Memories.ai for processing
     
     - **file**: Video file (MP4, AVI, MOV, etc.) - Max 50MB
+    - **room**: Optional room the footage shows (e.g. "kitchen"), used to scope searches
     
     Returns upload confirmation with video ID for future operations
     """
@@ -56,6 +91,7 @@ async def upload_video(file: UploadFile = File(...)):
     try:
         # Validate the uploaded file
         validate_video_file(file)
+        room = validate_room(room)
         
         # Get file info before upload (file.size might be None after reading)
         file_size = file.size or 0
@@ -63,17 +99,19 @@ async def upload_video(file: UploadFile = File(...)):
         
         # Upload to Memories.ai
         result = await memories_api.upload_video(file)
+        await register_uploaded_video(result["video_no"], file_name, room)
         
         return UploadResponse(
             success=True,
             video_no=result["video_no"],
             message=result["message"],
             file_name=file_name,
-            file_size=file_size
+            file_size=file_size,
+            room=room
         )
         
-    except HTTPException:
-        # Re-raise HTTP exceptions as-is
+    except (HTTPException, DeadlineExceeded):
+        # Re-raise HTTP exceptions as-is; deadlines become 504s
         raise
     except Exception as e:
         print(f"Unexpected upload error: {e}")
@@ -82,38 +120,124 @@ async def upload_video(file: UploadFile = File(...)):
             detail="Internal server error during upload"
         )
 
+async def _upload_batch_item(file: UploadFile, semaphore: asyncio.Semaphore,
+                             room: Optional[str] = None) -> BatchUploadItem:
+    file_name = file.filename or "unnamed"
+    try:
+        validate_video_file(file)
+    except HTTPException as e:
+        return BatchUploadItem(file_name=file_name, success=False, message=e.detail)
+    
+    file_size = file.size or 0
+    async with semaphore:
+        try:
+            result = await memories_api.upload_video(file)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Batch upload error for {file_name}: {e}")
+            return BatchUploadItem(file_name=file_name, success=False,
+                                   message="Upload failed", file_size=file_size)
+    
+    await register_uploaded_video(result["video_no"], file_name, room)
+    return BatchUploadItem(
+        file_name=file_name,
+        success=True,
+        video_no=result["video_no"],
+        message=result["message"],
+        file_size=file_size
+    )
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_video_batch(files: List[UploadFile] = File(...), room: Optional[str] = Form(None)):
+    """
+    Upload several video files in one request
+    
+    - **files**: Up to UPLOAD_BATCH_MAX_FILES video files, each at most 50MB
+    - **room**: Optional room tag applied to every file in the batch
+    
+    Files are validated individually and sent to Memories.ai concurrently
+    (UPLOAD_BATCH_CONCURRENCY at a time); the response reports each file's outcome.
+    If the request deadline runs out, the transfers still running are cancelled.
+    """
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. At most {UPLOAD_BATCH_MAX_FILES} can be uploaded at once."
+        )
+    
+    room = validate_room(room)
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(UPLOAD_BATCH_CONCURRENCY)
+    tasks = [asyncio.ensure_future(_upload_batch_item(file, semaphore, room)) for file in files]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # An item ran out of time (or the request went away): stop the others uploading upstream
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    failed = next((task for task in done if not task.cancelled() and task.exception()), None)
+    if failed is not None:
+        raise failed.exception()
+    results = [task.result() for task in tasks]
+    uploaded = sum(1 for item in results if item.success)
+    
+    return BatchUploadResponse(
+        uploaded=uploaded,
+        failed=len(results) - uploaded,
+        elapsed_seconds=round(time.monotonic() - started, 3),
+        results=results
+    )
+
+STATUS_MESSAGES = {
+    ProcessingStatus.UPLOADING: "Video is uploading",
+    ProcessingStatus.PROCESSING: "Video is being processed by AI",
+    ProcessingStatus.COMPLETED: "Video processed successfully",
+    ProcessingStatus.FAILED: "Video processing failed",
+}
+
 @router.get("/upload/status/{video_no}")
 async def get_upload_status(video_no: str):
     """
     Get processing status for an uploaded video
     
     - **video_no**: Video ID returned from upload endpoint
+    
+    Served from the local video catalog, which the Memories.ai webhook keeps current.
     """
-    # In a real implementation, you'd check Memories.ai API for status
-    # For now, return mock status based on video ID pattern
+    record = video_catalog.get(video_no)
+    if record is not None and record.household_id not in (None, current_household()):
+        # Another household's upload; don't confirm it exists
+        record = None
+    if record is None:
+        if video_no.startswith("mock_"):
+            # Mock uploads are "processed" instantly; answered without creating a record
+            record = VideoRecord(video_no=video_no, status=ProcessingStatus.COMPLETED)
+        else:
+            raise HTTPException(status_code=404, detail=f"Unknown video '{video_no}'")
     
-    if video_no.startswith("mock_"):
-        return {
-            "video_no": video_no,
-            "status": "completed",
-            "message": "Video processed successfully (mock)",
-            "processed_at": "2025-10-07T12:00:00Z"
-        }
-    else:
-        return {
-            "video_no": video_no,
-            "status": "processing", 
-            "message": "Video is being processed by AI",
-            "estimated_completion": "2-5 minutes"
-        }
+    return {
+        "video_no": record.video_no,
+        "status": record.status.value,
+        "message": STATUS_MESSAGES[record.status],
+        "file_name": record.file_name,
+        "room": record.room,
+        "uploaded_at": record.uploaded_at,
+        "processed_at": record.processed_at,
+        "error": record.error
+    }
 
 # Health check for upload service
+UPLOAD_HEALTH = PrecomputedJSON({
+    "service": "upload",
+    "status": "healthy",
+    "max_file_size_mb": MAX_FILE_SIZE // (1024 * 1024),
+    "max_batch_files": UPLOAD_BATCH_MAX_FILES,
+    "allowed_types": ALLOWED_VIDEO_TYPES
+})
+
 @router.get("/upload/health")
-async def upload_health_check():
+async def upload_health_check(request: Request):
     """Health check for upload service"""
-    return {
-        "service": "upload",
-        "status": "healthy",
-        "max_file_size_mb": MAX_FILE_SIZE // (1024 * 1024),
-        "allowed_types": ALLOWED_VIDEO_TYPES
-    }
+    return UPLOAD_HEALTH.response(request)
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException, Request
+from models import ProcessingStatus
+from services.video_catalog import video_catalog
+from utils.events import event_bus, VIDEO_PROCESSED, VIDEO_FAILED
+from utils.performance import answer_cache, search_cache
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import hmac
+import json
+import os
+import time
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+SIGNATURE_HEADER = "X-Memories-Signature"
+TIMESTAMP_HEADER = "X-Memories-Timestamp"
+
+# Reject callbacks signed more than this many seconds ago (replay protection)
+MAX_SIGNATURE_AGE = 300
+
+STATUS_ALIASES = {
+    "completed": ProcessingStatus.COMPLETED,
+    "complete": ProcessingStatus.COMPLETED,
+    "success": ProcessingStatus.COMPLETED,
+    "parse": ProcessingStatus.COMPLETED,
+    "done": ProcessingStatus.COMPLETED,
+    "failed": ProcessingStatus.FAILED,
+    "fail": ProcessingStatus.FAILED,
+    "error": ProcessingStatus.FAILED,
+    "processing": ProcessingStatus.PROCESSING,
+    "uploading": ProcessingStatus.UPLOADING,
+}
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """HMAC-SHA256 over "<timestamp>.<body>", as sent in X-Memories-Signature"""
+    message = timestamp.encode() + b"." + body
+    return "sha256=" + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+def verify_signature(secret: str, timestamp: Optional[str], signature: Optional[str], body: bytes) -> bool:
+    if not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > MAX_SIGNATURE_AGE:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+def _references_video(video_no: str):
+    def predicate(key: str, value: Any) -> bool:
+        if not isinstance(value, list):
+            return False
+        return any(
+            isinstance(hit, dict) and (hit.get("videoNo") or hit.get("video_no")) == video_no
+            for hit in value
+        )
+    return predicate
+
+def invalidate_search_cache(video_no: str, status: ProcessingStatus, household: Optional[str] = None) -> int:
+    """Drop cached search answers a processing outcome could change (in every household when unknown)"""
+    if status == ProcessingStatus.COMPLETED:
+        # New footage can change the best hit for any query
+        return search_cache.invalidate(lambda key, value: key.startswith("search_"), household)
+    return search_cache.invalidate(_references_video(video_no), household)
+
+def invalidate_caches(video_no: str, status: ProcessingStatus, household: Optional[str] = None) -> Tuple[int, int]:
+    """(entries dropped, answers marked stale) for a processing outcome, on this worker"""
+    invalidated = invalidate_search_cache(video_no, status, household)
+    if status == ProcessingStatus.COMPLETED:
+        # Still worth showing while the answer is re-checked against the new footage
+        return invalidated, answer_cache.mark_stale(lambda key, answer: True, household)
+    invalidated += answer_cache.invalidate(lambda key, answer: answer.get("video_no") == video_no, household)
+    return invalidated, 0
+
+# Outcomes delivered to another worker reach this one through the shared catalog log
+video_catalog.on_outcome(lambda record: invalidate_caches(record.video_no, record.status, record.household_id))
+
+@router.post("/memories")
+async def memories_processing_callback(request: Request) -> Dict[str, Any]:
+    """
+    Receive processing callbacks from Memories.ai
+
+    Requests must carry `X-Memories-Timestamp` and an `X-Memories-Signature` of
+    `sha256=<hex HMAC of "<timestamp>.<raw body>">` keyed with MEMORIES_WEBHOOK_SECRET.
+    """
+    secret = os.getenv("MEMORIES_WEBHOOK_SECRET")
+    if not secret:
+        raise HTTPException(status_code=503, detail="Webhook receiver is not configured")
+
+    body = await request.body()
+    if not verify_signature(secret, request.headers.get(TIMESTAMP_HEADER),
+                            request.headers.get(SIGNATURE_HEADER), body):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Webhook body must be a JSON object")
+
+    video_no = payload.get("videoNo") or payload.get("video_no")
+    raw_status = str(payload.get("status", "")).lower()
+    status = STATUS_ALIASES.get(raw_status)
+    if not video_no or status is None:
+        raise HTTPException(status_code=400, detail="Webhook must include videoNo and a known status")
+
+    error = (payload.get("error") or payload.get("message")) if status == ProcessingStatus.FAILED else None
+    record = video_catalog.mark_status(video_no, status, error=error)
+    invalidated, answers_marked_stale = invalidate_caches(video_no, status, record.household_id)
+
+    if status == ProcessingStatus.COMPLETED:
+        await event_bus.emit(VIDEO_PROCESSED, {"video_no": video_no, "record": record})
+    elif status == ProcessingStatus.FAILED:
+        await event_bus.emit(VIDEO_FAILED, {"video_no": video_no, "record": record})
+
+    return {
+        "received": True,
+        "video_no": video_no,
+        "status": status.value,
+        "cache_entries_invalidated": invalidated,
+        "answers_marked_stale": answers_marked_stale
+    }
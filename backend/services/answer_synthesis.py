@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from models import TrackedObject
+from services.location_buffer import location_buffer
+from services.memories_api import memories_api
+from services.prewarm import estimate_answer_confidence
+from utils.deadline import detached_context
+from utils.drain import wait_for_tasks
+
+logger = logging.getLogger(__name__)
+
+# Fields of a searchAI hit that may describe what the clip shows
+SNIPPET_FIELDS = ("snippet", "description", "caption", "summary", "text", "content")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+class AnswerSynthesizer:
+    """Builds the location answer straight from a search hit when the hit already says where.
+
+    A sentence from the hit's snippet/description that names the object and
+    places it somewhere is scored with the same heuristic as chat answers;
+    above ``min_confidence`` it is returned without a chat call. The chat
+    question still runs in the background, only to refine the stored
+    ``location_phrase``.
+    """
+
+    def __init__(self, enabled: bool = True, min_confidence: float = 0.8, refine: bool = True,
+                 unnamed_penalty: float = 0.7):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.refine = refine
+        self.unnamed_penalty = unnamed_penalty
+        self.stats = {"attempts": 0, "answered_from_snippet": 0, "refinements": 0, "refined": 0, "refine_errors": 0}
+        self._tasks = set()
+
+    def extract(self, hit: Dict[str, Any], obj: TrackedObject) -> Optional[Tuple[str, float]]:
+        """Best location sentence in the hit and its confidence, if any"""
+        names = {obj.name.lower()} | {alias.strip().lower() for alias in obj.alias.split(",") if alias.strip()}
+        best: Optional[Tuple[str, float]] = None
+        for field in SNIPPET_FIELDS:
+            text = hit.get(field)
+            if not isinstance(text, str) or not text.strip():
+                continue
+            for sentence in SENTENCE_SPLIT.split(text.strip()):
+                sentence = sentence.strip()
+                confidence = estimate_answer_confidence(sentence)
+                if not confidence:
+                    continue
+                lowered = sentence.lower()
+                if not any(name in lowered for name in names):
+                    confidence *= self.unnamed_penalty
+                if best is None or confidence > best[1]:
+                    best = (sentence, round(confidence, 2))
+        return best
+
+    def answer(self, hit: Dict[str, Any], obj: TrackedObject) -> Optional[Tuple[str, float]]:
+        """Location usable as the search answer, or None when the chat call is still needed"""
+        if not self.enabled:
+            return None
+        self.stats["attempts"] += 1
+        extracted = self.extract(hit, obj)
+        if extracted is None or extracted[1] < self.min_confidence:
+            return None
+        self.stats["answered_from_snippet"] += 1
+        return extracted
+
+    def refine_later(self, obj: TrackedObject, video_no: str, question: str, timestamp: int, confidence: float):
+        """Ask the chat question off the request path and store a better answer if it has one"""
+        if not self.refine:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self.refine_location(obj, video_no, question, timestamp, confidence), context=detached_context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def refine_location(self, obj: TrackedObject, video_no: str, question: str,
+                              timestamp: int, confidence: float) -> bool:
+        self.stats["refinements"] += 1
+        try:
+            response = await memories_api.chat_with_video(video_no, question)
+        except Exception as e:
+            self.stats["refine_errors"] += 1
+            logger.error(f"❌ Refining location of {obj.name} in {video_no} failed: {e}")
+            return False
+        answer = response.get("response", "")
+        if estimate_answer_confidence(answer) < 0.5:
+            return False
+        # Same timestamp as the snippet answer, so this replaces it rather than competing with it
+        location_buffer.enqueue(obj, video_no=video_no, location=answer, confidence=confidence, timestamp=timestamp)
+        self.stats["refined"] += 1
+        return True
+
+    async def stop(self, grace: float = 0.0):
+        """Cancel refinements still running after `grace` seconds"""
+        await wait_for_tasks(self._tasks, grace)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "min_confidence": self.min_confidence,
+            "refining": len(self._tasks),
+        }
+
+# Global answer synthesizer
+answer_synthesizer = AnswerSynthesizer(
+    enabled=os.getenv("SNIPPET_ANSWERS", "true").lower() in ("1", "true", "yes"),
+    min_confidence=float(os.getenv("SNIPPET_MIN_CONFIDENCE", "0.8")),
+    refine=os.getenv("SNIPPET_REFINE", "true").lower() in ("1", "true", "yes")
+)
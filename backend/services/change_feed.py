@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from utils.deadline import detached_context
+from utils.events import event_bus, OBJECT_CHANGED, CHANGE_FEED_STATUS
+
+logger = logging.getLogger(__name__)
+
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+# Changes may have been missed (feed reconnected or fell behind); rebuild derived state
+RESYNC = "resync"
+
+class ChangeFeed(ABC):
+    """Delivers row changes to tracked_objects made by any worker as OBJECT_CHANGED events.
+
+    Every change is normalised to ``{"op", "object_id", "record", "old_record",
+    "source"}`` so subscribers don't care where it came from. Changes made by
+    this worker come back through the feed too; handlers must be idempotent.
+    """
+
+    source = "none"
+
+    def __init__(self):
+        self.live = False
+        self.stats = {"changes": 0, "resyncs": 0, "errors": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, op: str, object_id: Optional[int] = None,
+                      record: Optional[Dict[str, Any]] = None,
+                      old_record: Optional[Dict[str, Any]] = None):
+        if op == RESYNC:
+            self.stats["resyncs"] += 1
+        else:
+            self.stats["changes"] += 1
+        await event_bus.emit(OBJECT_CHANGED, {
+            "op": op,
+            "object_id": object_id,
+            "record": record,
+            "old_record": old_record,
+            "source": self.source,
+        })
+
+    async def _set_live(self, live: bool):
+        if live != self.live:
+            self.live = live
+            await event_bus.emit(CHANGE_FEED_STATUS, {"live": live, "source": self.source})
+
+    @abstractmethod
+    async def start(self):
+        """Begin delivering changes"""
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._set_live(False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "source": self.source, "live": self.live}
+
+class SQLiteChangeFeed(ChangeFeed):
+    """Polls the trigger-maintained ``object_changes`` log of a shared SQLite file.
+
+    Each worker keeps its own cursor, starting at the newest entry when it
+    boots. A gap in sequence numbers means entries were pruned before this
+    worker read them, which is reported as a resync.
+    """
+
+    source = "sqlite"
+
+    def __init__(self, db, poll_interval: float = 0.5, retain: int = 10000, batch_size: int = 500):
+        super().__init__()
+        self.db = db
+        self.poll_interval = poll_interval
+        self.retain = retain
+        self.batch_size = batch_size
+        self.cursor = 0
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self.cursor = await self.db.latest_change_seq()
+        self._task = asyncio.get_running_loop().create_task(self._run(), context=detached_context())
+        await self._set_live(True)
+
+    async def poll(self) -> int:
+        """Publish every change logged since the last poll; returns how many were read"""
+        changes = await self.db.changes_since(self.cursor, self.batch_size)
+        if changes and changes[0]["seq"] > self.cursor + 1:
+            await self.publish(RESYNC)
+        for change in changes:
+            await self.publish(change["op"], change["object_id"], change["record"])
+            self.cursor = change["seq"]
+        return len(changes)
+
+    async def _run(self):
+        polls = 0
+        while True:
+            try:
+                while await self.poll() >= self.batch_size:
+                    pass
+                polls += 1
+                if polls % 100 == 0:
+                    await self.db.prune_changes(self.retain)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Change feed poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+class SupabaseRealtimeFeed(ChangeFeed):
+    """Subscribes to Postgres changes on tracked_objects through Supabase Realtime.
+
+    The table must be in the ``supabase_realtime`` publication, with
+    ``REPLICA IDENTITY FULL`` so deletes carry the old row.
+    """
+
+    source = "supabase"
+
+    def __init__(self, url: str, key: str, table: str = "tracked_objects"):
+        super().__init__()
+        self.url = re.sub(r"^http", "ws", url.rstrip("/")) + "/realtime/v1"
+        self.key = key
+        self.table = table
+        self.client = None
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        # Connecting retries with backoff; don't hold up startup while it does
+        self._task = asyncio.get_running_loop().create_task(self._connect(), context=detached_context())
+
+    async def _connect(self):
+        from realtime import AsyncRealtimeClient
+
+        loop = asyncio.get_running_loop()
+        try:
+            self.client = AsyncRealtimeClient(self.url, token=self.key, params={"apikey": self.key})
+            await self.client.connect()
+            channel = self.client.channel(f"{self.table}_changes")
+            channel.on_postgres_changes(
+                "*", lambda payload: loop.create_task(self._on_change(payload)),
+                table=self.table, schema="public"
+            )
+            await channel.subscribe(lambda state, error: loop.create_task(self._on_state(state, error)))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Could not subscribe to {self.table} changes: {e}")
+
+    async def _on_state(self, state, error: Optional[Exception]):
+        subscribed = getattr(state, "value", state) == "SUBSCRIBED"
+        if subscribed:
+            # Anything that changed while we were not subscribed was missed
+            await self.publish(RESYNC)
+        elif error:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Change feed subscription {getattr(state, 'value', state)}: {error}")
+        await self._set_live(subscribed)
+
+    async def _on_change(self, payload: Dict[str, Any]):
+        data = payload.get("data", {})
+        op = str(data.get("type", "")).lower()
+        record = data.get("record") or None
+        old_record = data.get("old_record") or None
+        object_id = (record or old_record or {}).get("id")
+        if op not in (INSERT, UPDATE, DELETE) or object_id is None:
+            return
+        await self.publish(op, object_id, record, old_record)
+
+    async def stop(self):
+        if self.client is not None:
+            try:
+                await self.client.close()
+            except Exception as e:
+                logger.warning(f"⚠️  Closing realtime client failed: {e}")
+            self.client = None
+        await super().stop()
+
+def create_change_feed(db) -> Optional[ChangeFeed]:
+    """Feed matching the storage backend, or None when CHANGE_FEED=off"""
+    if os.getenv("CHANGE_FEED", "auto").lower() in ("off", "false", "0"):
+        return None
+    if hasattr(db, "changes_since"):
+        return SQLiteChangeFeed(
+            db,
+            poll_interval=float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "0.5")),
+            retain=int(os.getenv("CHANGE_FEED_RETAIN", "10000"))
+        )
+    if getattr(db, "url", None) and getattr(db, "key", None):
+        return SupabaseRealtimeFeed(db.url, db.key)
+    return None
+
+# Global change feed, created at startup once the database backend is known
+change_feed: Optional[ChangeFeed] = None
+
+async def start_change_feed():
+    global change_feed
+    from database import get_db
+    try:
+        change_feed = create_change_feed(get_db())
+        if change_feed is not None:
+            await change_feed.start()
+            logger.info(f"🔔 Change feed started ({change_feed.source})")
+    except Exception as e:
+        logger.error(f"❌ Change feed unavailable, caches fall back to short TTLs: {e}")
+
+async def stop_change_feed():
+    if change_feed is not None:
+        await change_feed.stop()
+
+def get_change_feed_stats() -> Dict[str, Any]:
+    if change_feed is None:
+        return {"source": "none", "live": False}
+    return change_feed.get_stats()
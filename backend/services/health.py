@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.memories_api import memories_api
+from utils.deadline import detached_context
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """Probes dependencies in the background and serves the last result.
+
+    /readyz reads the cached snapshot, so probe traffic costs the same no
+    matter how often the orchestrator polls. Only `required` checks decide
+    readiness; the others (Memories.ai, which has mock fallbacks) are reported.
+    """
+
+    def __init__(self, interval: float = 10.0, timeout: float = 3.0, stale_after: Optional[float] = None):
+        self.interval = interval
+        self.timeout = timeout
+        # A snapshot older than this is treated as unknown
+        self.stale_after = stale_after or interval * 3
+        self.checks: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self.required = set()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: Callable[[], Awaitable[Any]], required: bool = True):
+        self.checks[name] = check
+        if required:
+            self.required.add(name)
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[Any]]):
+        started = time.perf_counter()
+        previous = self.results.get(name, {})
+        try:
+            detail = await asyncio.wait_for(check(), timeout=self.timeout)
+            result = {"ok": True, "detail": detail or "ok", "consecutive_failures": 0}
+        except Exception as e:
+            result = {
+                "ok": False,
+                "detail": str(e) or type(e).__name__,
+                "consecutive_failures": previous.get("consecutive_failures", 0) + 1,
+            }
+            if result["consecutive_failures"] == 1:
+                logger.warning(f"⚠️  Health check {name} failed: {result['detail']}")
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = time.time()
+        self.results[name] = result
+
+    async def probe_all(self):
+        await asyncio.gather(*(self._probe(name, check) for name, check in self.checks.items()))
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=detached_context())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cached readiness with per-check staleness"""
+        now = time.time()
+        checks = {}
+        ready = True
+        for name in self.checks:
+            result = self.results.get(name)
+            if result is None:
+                checks[name] = {"ok": None, "detail": "not probed yet", "required": name in self.required}
+                ready = ready and name not in self.required
+                continue
+            age = now - result["checked_at"]
+            stale = age > self.stale_after
+            checks[name] = {**result, "age_seconds": round(age, 2), "stale": stale,
+                            "required": name in self.required}
+            if name in self.required and (stale or not result["ok"]):
+                ready = False
+        return {"ready": ready, "checks": checks, "probe_interval_seconds": self.interval}
+
+    def status_of(self, name: str) -> str:
+        result = self.results.get(name)
+        if result is None:
+            return "unknown"
+        return "connected" if result["ok"] else f"error: {result['detail']}"
+
+async def _ping_database():
+    from database import get_db
+    await get_db().ping()
+
+# Global prober
+health_prober = HealthProber(
+    interval=float(os.getenv("HEALTH_PROBE_INTERVAL", "10")),
+    timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+)
+health_prober.register("database", _ping_database)
+health_prober.register("memories_api", memories_api.ping, required=False)
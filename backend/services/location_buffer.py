@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from models import TrackedObject
+from utils.deadline import detached_context
+from utils.events import event_bus, LOCATIONS_FLUSHED
+from utils.tenancy import current_household
+
+logger = logging.getLogger(__name__)
+
+LOCATION_FIELDS = ("last_seen_timestamp", "location_phrase", "video_no", "confidence")
+
+class LocationWriteBuffer:
+    """Write-behind buffer for last-seen location updates.
+
+    Updates are coalesced per object id (the newest timestamp wins) and
+    written as one bulk update when ``max_pending`` objects are waiting or
+    every ``flush_interval`` seconds, whichever comes first. Only the
+    last-seen fields are written, and never to a row that has since been
+    deleted, so a flush can't resurrect an object or revert a rename.
+    """
+
+    def __init__(self, max_pending: int = 100, flush_interval: float = 2.0):
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        self.in_flight: Dict[int, Dict[str, Any]] = {}
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "flush_errors": 0,
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def enqueue(self, obj: TrackedObject, video_no: str, location: str,
+                confidence: float, timestamp: int):
+        """Queue a location update; never blocks on the database"""
+        self.stats["enqueued"] += 1
+        existing = self.pending.get(obj.id)
+        if existing:
+            self.stats["coalesced"] += 1
+            if existing["last_seen_timestamp"] > timestamp:
+                return
+
+        self.pending[obj.id] = {
+            "id": obj.id,
+            # The object was read in this household's scope, so the row belongs to it
+            "household_id": current_household(),
+            "last_seen_timestamp": timestamp,
+            "location_phrase": location,
+            "video_no": video_no,
+            "confidence": confidence,
+        }
+
+        self._ensure_running()
+        if len(self.pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def discard(self, object_id: int, household_id: Optional[str] = None):
+        """Drop queued updates for an object that no longer exists (only if it is `household_id`'s)"""
+        for queued in (self.pending, self.in_flight):
+            update = queued.get(object_id)
+            if update and (household_id is None or update.get("household_id") == household_id):
+                del queued[object_id]
+
+    def pending_for(self, object_id: int) -> Optional[Dict[str, Any]]:
+        return self.pending.get(object_id) or self.in_flight.get(object_id)
+
+    def apply_pending(self, objects: List[TrackedObject]) -> List[TrackedObject]:
+        """Overlay queued-but-unwritten locations onto freshly read objects"""
+        if not self.pending and not self.in_flight:
+            return objects
+
+        merged = []
+        for obj in objects:
+            update = self.pending_for(obj.id)
+            if update and update["last_seen_timestamp"] >= (obj.last_seen_timestamp or 0):
+                obj = obj.model_copy(update={key: update[key] for key in LOCATION_FIELDS})
+            merged.append(obj)
+        return merged
+
+    def overlay_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Same as apply_pending for a raw database row"""
+        update = self.pending_for(row["id"])
+        if update and update["last_seen_timestamp"] >= (row.get("last_seen_timestamp") or 0):
+            row.update({key: update[key] for key in LOCATION_FIELDS})
+        return row
+
+    async def flush(self) -> int:
+        """Write everything queued so far as one bulk update"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            self.in_flight, self.pending = self.pending, {}
+            rows = list(self.in_flight.values())
+            try:
+                from database import get_db
+                written = await get_db().bulk_update_object_locations(rows)
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += written
+                await event_bus.emit(LOCATIONS_FLUSHED, {"rows": rows})
+                return written
+            except Exception as e:
+                # Put the batch back unless a newer update arrived meanwhile
+                self.stats["flush_errors"] += 1
+                logger.error(f"❌ Location flush failed for {len(rows)} objects: {e}")
+                for object_id, row in self.in_flight.items():
+                    newer = self.pending.get(object_id)
+                    if not newer or newer["last_seen_timestamp"] < row["last_seen_timestamp"]:
+                        self.pending[object_id] = row
+                return 0
+            finally:
+                self.in_flight = {}
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            # Started lazily from a request; the flush loop must outlive its deadline
+            self._task = loop.create_task(self._run(), context=detached_context())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        self._ensure_running()
+
+    async def stop(self):
+        """Stop the background flusher and write out anything still queued"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self.pending),
+            "max_pending": self.max_pending,
+            "flush_interval": self.flush_interval,
+        }
+
+# Global write-behind buffer
+location_buffer = LocationWriteBuffer(
+    max_pending=int(os.getenv("LOCATION_FLUSH_MAX_PENDING", "100")),
+    flush_interval=float(os.getenv("LOCATION_FLUSH_INTERVAL", "2.0"))
+)
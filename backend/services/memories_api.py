@@ -1,20 +1,34 @@
 import aiohttp
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from fastapi import UploadFile
 import asyncio
 import json
 from datetime import datetime
 from utils.performance import perf_monitor, search_cache
+from utils.deadline import client_timeout, raise_if_deadline_caused
+from utils.hedging import RequestHedger
+from utils.tenancy import current_household
+from services.transcode import transcode_stage
 import logging
 
 logger = logging.getLogger(__name__)
 
+def upstream_failed(response: Tuple[int, Any]) -> bool:
+    """A 5xx from _post_json; a hedged duplicate may still succeed, so it must not win the race"""
+    return response[0] >= 500
+
 class MemoriesAPIClient:
     def __init__(self):
         self.api_key = os.getenv("MEMORIES_AI_API_KEY")
-        self.base_url = "https://mavi-backend.memories.ai/api/serve"
-        self.timeout = aiohttp.ClientTimeout(total=300)  # 5 minute timeout
+        self.base_url = os.getenv("MEMORIES_AI_BASE_URL", "https://mavi-backend.memories.ai/api/serve")
+        self.timeout = aiohttp.ClientTimeout(total=300)  # 5 minute ceiling; requests cap it at their deadline
+        # Search and chat only read, so a slow call can safely be raced by a duplicate
+        self.hedger = RequestHedger(
+            enabled=os.getenv("MEMORIES_HEDGING", "true").lower() in ("1", "true", "yes"),
+            budget_percent=float(os.getenv("MEMORIES_HEDGE_BUDGET_PERCENT", "5")),
+            default_delay=float(os.getenv("MEMORIES_HEDGE_DEFAULT_DELAY", "2"))
+        )
         
         if not self.api_key:
             print("⚠️  WARNING: MEMORIES_AI_API_KEY not found. Using mock responses.")
@@ -26,48 +40,48 @@ class MemoriesAPIClient:
             if not self.api_key:
                 return self._mock_upload_response(file)
             
-            # Read file content
-            file_content = await file.read()
-            
-            # Reset file position for potential re-use
-            await file.seek(0)
-            
-            # Prepare multipart form data
-            data = aiohttp.FormData()
-            data.add_field('file', 
-                          file_content, 
-                          filename=file.filename,
-                          content_type=file.content_type)
-            
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(
-                    f"{self.base_url}/video/upload",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    data=data
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        return {
-                            "video_no": result.get("videoNo") or result.get("id") or f"video_{int(datetime.now().timestamp())}",
-                            "status": result.get("status", "processing"),
-                            "message": "Upload successful"
-                        }
-                    else:
-                        error_text = await response.text()
-                        print(f"Memories.ai API Error: {response.status} - {error_text}")
-                        return self._mock_upload_response(file)
+            # Shrink the video first when a transcoder is configured; either way the
+            # chosen file is streamed from disk rather than read into memory
+            async with transcode_stage.prepare(file) as upload:
+                data = aiohttp.FormData()
+                data.add_field('file', 
+                              upload.stream, 
+                              filename=upload.filename,
+                              content_type=upload.content_type)
+                # Memories.ai keeps each unique_id's videos apart, one namespace per household
+                data.add_field('unique_id', current_household())
+                
+                async with aiohttp.ClientSession(timeout=client_timeout(self.timeout)) as session:
+                    async with session.post(
+                        f"{self.base_url}/video/upload",
+                        headers={"Authorization": f"Bearer {self.api_key}"},
+                        data=data
+                    ) as response:
+                        
+                        if response.status == 200:
+                            result = await response.json()
+                            return {
+                                "video_no": result.get("videoNo") or result.get("id") or f"video_{int(datetime.now().timestamp())}",
+                                "status": result.get("status", "processing"),
+                                "message": "Upload successful"
+                            }
+                        else:
+                            error_text = await response.text()
+                            print(f"Memories.ai API Error: {response.status} - {error_text}")
+                            return self._mock_upload_response(file)
                         
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
+            raise_if_deadline_caused(e)
             print("Upload timeout - using mock response")
             return self._mock_upload_response(file)
         except Exception as e:
+            raise_if_deadline_caused(e)
             print(f"Upload error: {e}")
             return self._mock_upload_response(file)
     
     @perf_monitor.time_function("memories_api_search")
     async def search_videos(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Search for objects in uploaded videos"""
+        """Search for objects in the current household's uploaded videos"""
         cache_key = f"search_{query}_{limit}"
         cached_result = search_cache.get(cache_key)
         if cached_result:
@@ -80,28 +94,23 @@ class MemoriesAPIClient:
             
             payload = {
                 "query": query,
-                "limit": limit
+                "limit": limit,
+                "unique_id": current_household()
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(
-                    f"{self.base_url}/video/searchAI",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json=payload
-                ) as response:
-                    
-                    if response.status == 200:
-                        results = await response.json()
-                        return results if isinstance(results, list) else []
-                    else:
-                        error_text = await response.text()
-                        print(f"Search API Error: {response.status} - {error_text}")
-                        return self._mock_search_response(query)
+            status, body = await self.hedger.run("search", lambda: self._post_json("/video/searchAI", payload),
+                                                 failed=upstream_failed)
+            if status == 200:
+                results = body if isinstance(body, list) else []
+                # Safe to keep: processing webhooks invalidate entries on every worker (via the shared catalog log)
+                search_cache.set(cache_key, results)
+                return results
+            else:
+                print(f"Search API Error: {status} - {body}")
+                return self._mock_search_response(query)
                
         except Exception as e:
+            raise_if_deadline_caused(e)
             print(f"Search error: {e}")
             return []
     
@@ -114,33 +123,50 @@ class MemoriesAPIClient:
             
             payload = {
                 "videoNos": [video_no],
-                "query": query
+                "query": query,
+                "unique_id": current_household()
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(
-                    f"{self.base_url}/video/chat",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json=payload
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        return {
-                            "response": result.get("response") or result.get("answer", "Location details not available")
-                        }
-                    else:
-                        error_text = await response.text()
-                        print(f"Chat API Error: {response.status} - {error_text}")
-                        return self._mock_chat_response(video_no, query)
+            status, result = await self.hedger.run("chat", lambda: self._post_json("/video/chat", payload),
+                                                   failed=upstream_failed)
+            if status == 200:
+                return {
+                    "response": result.get("response") or result.get("answer", "Location details not available")
+                }
+            else:
+                print(f"Chat API Error: {status} - {result}")
+                return self._mock_chat_response(video_no, query)
                         
         except Exception as e:
+            raise_if_deadline_caused(e)
             print(f"Chat error: {e}")
             return self._mock_chat_response(video_no, query)
     
+    async def _post_json(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        """POST a JSON payload; returns the status and the decoded body (text on errors)"""
+        async with aiohttp.ClientSession(timeout=client_timeout(self.timeout)) as session:
+            async with session.post(
+                f"{self.base_url}{path}",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json=payload
+            ) as response:
+                if response.status == 200:
+                    return response.status, await response.json()
+                return response.status, await response.text()
+    
+    async def ping(self) -> str:
+        """HEAD request against the API host; any non-5xx answer means it is reachable"""
+        if not self.api_key:
+            return "mock"
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+            async with session.head(self.base_url, headers={"Authorization": f"Bearer {self.api_key}"}) as response:
+                if response.status >= 500:
+                    raise Exception(f"Memories.ai returned {response.status}")
+                return "reachable"
+    
     def _mock_upload_response(self, file: UploadFile) -> Dict[str, Any]:
         """Mock response for development/testing"""
         timestamp = int(datetime.now().timestamp())
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+from utils.deadline import detached_context
+
+logger = logging.getLogger(__name__)
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON Merge Patch (RFC 7396) turning `old` into `new`; removed keys map to None"""
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested = merge_patch(old[key], value)
+            if nested:
+                patch[key] = nested
+        elif old[key] != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+def sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+class MetricsSubscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+class MetricsBroadcaster:
+    """One producer task turning metric snapshots into SSE deltas for every subscriber.
+
+    Each tick the snapshot is collected and serialized once, diffed against the
+    previous one, and the same encoded delta is queued for all subscribers. A
+    subscriber whose bounded queue is full has its backlog dropped and gets a
+    full snapshot instead, since later deltas would not apply to what it has.
+    """
+
+    def __init__(self, source: Callable[[], Dict[str, Any]], interval: float = 2.0,
+                 queue_size: int = 8, max_subscribers: int = 16):
+        self.source = source
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[MetricsSubscriber] = set()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.encoded_snapshot: Optional[str] = None
+        self.stats = {"ticks": 0, "deltas_sent": 0, "unchanged_ticks": 0, "resyncs": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def _collect(self):
+        # Round-trip through JSON so later in-place metric updates can't alter our copy
+        self.encoded_snapshot = json.dumps(self.source(), default=str, separators=(",", ":"))
+        previous, self.snapshot = self.snapshot, json.loads(self.encoded_snapshot)
+        return previous
+
+    def subscribe(self) -> MetricsSubscriber:
+        if len(self.subscribers) >= self.max_subscribers:
+            raise RuntimeError("Too many metrics stream subscribers")
+        subscriber = MetricsSubscriber(self.queue_size)
+        if self.snapshot is None or self._task is None:
+            self._collect()
+        subscriber.queue.put_nowait(sse_event("snapshot", self.encoded_snapshot))
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=detached_context())
+        return subscriber
+
+    def unsubscribe(self, subscriber: MetricsSubscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._task:
+            # Nobody is watching; stop collecting until the next subscriber arrives
+            self._task.cancel()
+            self._task = None
+
+    def _publish(self, message: str):
+        for subscriber in self.subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and resynchronise with a full snapshot
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(sse_event("snapshot", self.encoded_snapshot))
+                subscriber.resyncs += 1
+                self.stats["resyncs"] += 1
+
+    def tick(self):
+        previous = self._collect()
+        self.stats["ticks"] += 1
+        patch = merge_patch(previous or {}, self.snapshot)
+        if not patch:
+            self.stats["unchanged_ticks"] += 1
+            return
+        self._publish(sse_event("delta", json.dumps(patch, separators=(",", ":"))))
+        self.stats["deltas_sent"] += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"❌ Metrics stream tick failed: {e}")
+
+    async def stop(self):
+        """Stop collecting and end every open stream (they never finish by themselves)"""
+        for subscriber in list(self.subscribers):
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "subscribers": len(self.subscribers), "interval_seconds": self.interval}
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from models import TrackedObject
+from services.location_buffer import location_buffer, LOCATION_FIELDS
+from utils.events import (event_bus, OBJECT_CREATED, OBJECT_DELETED, OBJECT_CHANGED,
+                          LOCATIONS_FLUSHED, CHANGE_FEED_STATUS)
+from utils.tenancy import DEFAULT_HOUSEHOLD, current_household, household_scope
+
+logger = logging.getLogger(__name__)
+
+class ObjectIndex:
+    """Worker-local copy of one household's tracked_objects, patched from change events.
+
+    Reads that need the whole table (listings, history, suggestions, prewarm)
+    are answered from memory. While a change feed is live every write from
+    any worker patches the copy, so it is only reloaded after ``ttl``
+    seconds; without a feed ``fallback_ttl`` bounds how stale it can get.
+    """
+
+    def __init__(self, ttl: float = 3600, fallback_ttl: float = 5, household: str = DEFAULT_HOUSEHOLD,
+                 owners: Optional[Dict[int, str]] = None):
+        self.household = household
+        # object id -> household, shared by every partition so id-only events can be routed
+        self.owners = owners if owners is not None else {}
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.live = False
+        self.objects: Dict[int, TrackedObject] = {}
+        self.loaded_at: Optional[float] = None
+        # Bumped on every load and patch so dependants can tell when to resync
+        self.version = 0
+        self.stats = {"loads": 0, "hits": 0, "patches": 0, "resyncs": 0}
+        self._source = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._deferred: List[Callable[[], None]] = []
+
+    def _fresh(self, db) -> bool:
+        if self.loaded_at is None or db is not self._source:
+            return False
+        ttl = self.ttl if self.live else self.fallback_ttl
+        return time.monotonic() - self.loaded_at < ttl
+
+    async def ensure_loaded(self):
+        from database import get_db
+        db = get_db()
+        if self._fresh(db):
+            self.stats["hits"] += 1
+            return
+        loop = asyncio.get_running_loop()
+        if self._load_task is None or self._load_task.done() or self._load_task.get_loop() is not loop:
+            self._load_task = loop.create_task(self._load(db))
+        # Shielded so one caller timing out doesn't abort the load for everyone
+        try:
+            await asyncio.shield(self._load_task)
+        except Exception as e:
+            if db is not self._source:
+                # Nothing loaded from this database yet; read as empty and retry next time
+                for object_id in self.objects:
+                    self.owners.pop(object_id, None)
+                self.objects = {}
+                self._source = None
+                self.loaded_at = None
+                self.version += 1
+                logger.error(f"❌ Object index load failed: {e}")
+                return
+            # Keep serving the last good copy and retry on the next read
+            logger.warning(f"⚠️  Object index reload failed, serving stale copy: {e}")
+
+    async def _load(self, db):
+        try:
+            with household_scope(self.household):
+                rows = [row async for row in db.iter_tracked_objects()]
+            for object_id in self.objects:
+                self.owners.pop(object_id, None)
+            self.objects = {row["id"]: TrackedObject(**row) for row in rows}
+            self.owners.update((object_id, self.household) for object_id in self.objects)
+            # Replay changes that arrived while the table was being read
+            for patch in self._deferred:
+                patch()
+            self._source = db
+            self.loaded_at = time.monotonic()
+            self.version += 1
+            self.stats["loads"] += 1
+        finally:
+            self._deferred = []
+            self._load_task = None
+
+    def _apply(self, patch: Callable[[], None]):
+        self.stats["patches"] += 1
+        self.version += 1
+        if self._load_task is not None:
+            self._deferred.append(patch)
+        patch()
+
+    async def all(self) -> List[TrackedObject]:
+        """Every tracked object, newest first, with queued locations applied"""
+        await self.ensure_loaded()
+        objects = sorted(self.objects.values(), key=lambda obj: (obj.created_at.timestamp(), obj.id), reverse=True)
+        return location_buffer.apply_pending(objects)
+
+    async def get(self, object_id: int) -> Optional[TrackedObject]:
+        await self.ensure_loaded()
+        obj = self.objects.get(object_id)
+        return location_buffer.apply_pending([obj])[0] if obj else None
+
+    def upsert(self, row: Dict[str, Any]):
+        def patch():
+            current = self.objects.get(row["id"])
+            if current is None:
+                if {"name", "alias", "created_at"} <= row.keys():
+                    self.objects[row["id"]] = TrackedObject(**row)
+                    self.owners[row["id"]] = self.household
+                return
+            update = {key: value for key, value in row.items() if key in TrackedObject.model_fields}
+            if (current.last_seen_timestamp or 0) > (update.get("last_seen_timestamp") or 0):
+                # Changes can arrive out of order; never go back to an older sighting
+                for key in LOCATION_FIELDS:
+                    update.pop(key, None)
+            self.objects[row["id"]] = TrackedObject(**{**current.model_dump(), **update})
+        self._apply(patch)
+
+    def remove(self, object_id: int):
+        def patch():
+            if self.objects.pop(object_id, None) is not None:
+                self.owners.pop(object_id, None)
+        self._apply(patch)
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def _on_object_created(self, event: Dict[str, Any]):
+        self.upsert(event["object"].model_dump())
+
+    async def _on_object_deleted(self, event: Dict[str, Any]):
+        self.remove(event["object_id"])
+
+    async def _on_object_changed(self, event: Dict[str, Any]):
+        op = event["op"]
+        if op == "resync":
+            self.stats["resyncs"] += 1
+            self.invalidate()
+        elif op == "delete":
+            self.remove(event["object_id"])
+        elif event.get("record"):
+            self.upsert(event["record"])
+
+    async def _on_locations_flushed(self, event: Dict[str, Any]):
+        for row in event["rows"]:
+            self.upsert({key: row[key] for key in ("id", *LOCATION_FIELDS)})
+
+    async def _on_feed_status(self, event: Dict[str, Any]):
+        self.live = event["live"]
+        if not self.live:
+            # Changes from other workers are no longer arriving
+            self.invalidate()
+
+    def subscribe(self):
+        event_bus.subscribe(OBJECT_CREATED, self._on_object_created)
+        event_bus.subscribe(OBJECT_DELETED, self._on_object_deleted)
+        event_bus.subscribe(OBJECT_CHANGED, self._on_object_changed)
+        event_bus.subscribe(LOCATIONS_FLUSHED, self._on_locations_flushed)
+        event_bus.subscribe(CHANGE_FEED_STATUS, self._on_feed_status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "objects": len(self.objects),
+            "live": self.live,
+            "age_seconds": None if self.loaded_at is None else round(time.monotonic() - self.loaded_at, 1),
+            "ttl_seconds": self.ttl if self.live else self.fallback_ttl,
+        }
+
+class HouseholdObjectIndex:
+    """One ObjectIndex partition per household, loaded on the household's first read.
+
+    Reads go to the current household's partition, so a listing or a
+    resolver sync costs only that household's objects. Change events are
+    routed by the record's household_id, or by object id for events that
+    only carry an id.
+    """
+
+    def __init__(self, ttl: float = 3600, fallback_ttl: float = 5):
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.live = False
+        self.partitions: Dict[str, ObjectIndex] = {}
+        self.owners: Dict[int, str] = {}
+
+    def partition(self, household: Optional[str] = None) -> ObjectIndex:
+        household = household or current_household()
+        partition = self.partitions.get(household)
+        if partition is None:
+            partition = ObjectIndex(self.ttl, self.fallback_ttl, household=household, owners=self.owners)
+            partition.live = self.live
+            self.partitions[household] = partition
+        return partition
+
+    def _owner_of(self, object_id: int) -> Optional[ObjectIndex]:
+        household = self.owners.get(object_id)
+        return self.partitions.get(household) if household else None
+
+    @property
+    def version(self) -> int:
+        return self.partition().version
+
+    async def ensure_loaded(self) -> ObjectIndex:
+        partition = self.partition()
+        await partition.ensure_loaded()
+        return partition
+
+    async def all(self) -> List[TrackedObject]:
+        return await self.partition().all()
+
+    async def get(self, object_id: int) -> Optional[TrackedObject]:
+        return await self.partition().get(object_id)
+
+    def invalidate(self):
+        for partition in self.partitions.values():
+            partition.invalidate()
+
+    async def _on_object_created(self, event: Dict[str, Any]):
+        # Emitted by the request that created it, so the current household owns it
+        partition = self.partitions.get(current_household())
+        if partition is not None:
+            await partition._on_object_created(event)
+
+    async def _on_object_deleted(self, event: Dict[str, Any]):
+        partition = self._owner_of(event["object_id"])
+        if partition is not None:
+            await partition._on_object_deleted(event)
+
+    async def _on_object_changed(self, event: Dict[str, Any]):
+        if event["op"] == "resync":
+            for partition in self.partitions.values():
+                await partition._on_object_changed(event)
+            return
+        record = event.get("record")
+        if record and event["op"] != "delete":
+            # Partitions not loaded yet will read the row when they load
+            partition = self.partitions.get(record.get("household_id") or DEFAULT_HOUSEHOLD)
+        else:
+            partition = self._owner_of(event["object_id"])
+        if partition is not None:
+            await partition._on_object_changed(event)
+
+    async def _on_locations_flushed(self, event: Dict[str, Any]):
+        rows_by_partition: Dict[str, List[Dict[str, Any]]] = {}
+        for row in event["rows"]:
+            household = self.owners.get(row["id"])
+            if household in self.partitions:
+                rows_by_partition.setdefault(household, []).append(row)
+        for household, rows in rows_by_partition.items():
+            await self.partitions[household]._on_locations_flushed({"rows": rows})
+
+    async def _on_feed_status(self, event: Dict[str, Any]):
+        self.live = event["live"]
+        for partition in self.partitions.values():
+            await partition._on_feed_status(event)
+
+    def subscribe(self):
+        event_bus.subscribe(OBJECT_CREATED, self._on_object_created)
+        event_bus.subscribe(OBJECT_DELETED, self._on_object_deleted)
+        event_bus.subscribe(OBJECT_CHANGED, self._on_object_changed)
+        event_bus.subscribe(LOCATIONS_FLUSHED, self._on_locations_flushed)
+        event_bus.subscribe(CHANGE_FEED_STATUS, self._on_feed_status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals = {"loads": 0, "hits": 0, "patches": 0, "resyncs": 0}
+        for partition in self.partitions.values():
+            for key in totals:
+                totals[key] += partition.stats[key]
+        return {
+            **totals,
+            "households": len(self.partitions),
+            "objects": len(self.owners),
+            "live": self.live,
+            "ttl_seconds": self.ttl if self.live else self.fallback_ttl,
+        }
+
+# Global object index; subscribed at import so writes on this worker always patch it
+object_index = HouseholdObjectIndex(
+    ttl=float(os.getenv("OBJECT_INDEX_TTL", "3600")),
+    fallback_ttl=float(os.getenv("OBJECT_INDEX_FALLBACK_TTL", "5"))
+)
+object_index.subscribe()
@@ -0,0 +1,245 @@
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models import TrackedObject
+from services.location_buffer import location_buffer
+from utils.tenancy import current_household
+
+# Words that say how someone asks, not what they are looking for
+QUERY_STOPWORDS = frozenset("""
+    where are is my the a an did i put leave left place placed find found can cant can't cannot
+    seen see have has you lost misplaced last saw it its of to in on at for me please help
+    locate show tell what which was were do does wheres whats im
+""".split())
+WORD = re.compile(r"[a-z0-9]+")
+
+class Resolution:
+    """Ranked objects for a query plus a cache key shared by every phrasing that resolves the same way"""
+
+    def __init__(self, query: str, terms: str, matches: List[Tuple[TrackedObject, float]]):
+        self.query = query
+        self.terms = terms
+        self.matches = matches
+
+    @property
+    def best(self) -> Optional[TrackedObject]:
+        return self.matches[0][0] if self.matches else None
+
+    @property
+    def cache_key(self) -> str:
+        if not self.matches:
+            return f"query:{self.terms}"
+        # The alias digest changes the key when the object's description is edited
+        obj = self.matches[0][0]
+        return f"object:{obj.id}:{zlib.crc32(f'{obj.name}|{obj.alias}'.encode()):08x}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "terms": self.terms,
+            "cache_key": self.cache_key,
+            "matches": [{"object": obj, "score": round(score, 4)} for obj, score in self.matches],
+        }
+
+class ObjectResolver:
+    """Matches free-text queries to tracked objects by character n-gram TF-IDF.
+
+    Each object's name (weighted up) and alias are split into padded
+    trigrams, so "car key" still finds "keys" with alias "car keys". Term
+    counts are kept per object and only recomputed for objects whose
+    name/alias changed; the postings are re-packed lazily as column-sorted
+    NumPy arrays, and a query is scored against every object with one
+    sparse matrix-vector product (gather + bincount) and cosine normalisation.
+    """
+
+    def __init__(self, min_score: float = 0.25, ngram: int = 3, name_weight: int = 2):
+        self.min_score = min_score
+        self.ngram = ngram
+        self.name_weight = name_weight
+        self.objects: Dict[int, TrackedObject] = {}
+        # object id -> ((name, alias), vocabulary columns, term counts)
+        self.docs: Dict[int, Tuple[Tuple[str, str], np.ndarray, np.ndarray]] = {}
+        self.vocab: Dict[str, int] = {}
+        self.stats = {"resolutions": 0, "resolved": 0, "unresolved": 0, "rebuilds": 0, "reindexed_objects": 0}
+        self._synced_version: Optional[int] = None
+        self._dirty = True
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._col_ptr = np.zeros(1, dtype=np.int64)
+        self._post_rows = np.zeros(0, dtype=np.int32)
+        self._post_tf = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._doc_norms = np.zeros(0, dtype=np.float32)
+
+    def _grams(self, text: str) -> List[str]:
+        grams = []
+        for word in WORD.findall(text.lower()):
+            padded = f" {word} "
+            grams.extend(padded[i:i + self.ngram] for i in range(max(1, len(padded) - self.ngram + 1)))
+        return grams
+
+    def query_terms(self, query: str) -> str:
+        words = WORD.findall(query.lower().replace("'", ""))
+        meaningful = [word for word in words if word not in QUERY_STOPWORDS]
+        return " ".join(meaningful or words)
+
+    def _vectorize(self, obj: TrackedObject) -> Tuple[np.ndarray, np.ndarray]:
+        counts = Counter(self._grams(obj.alias))
+        for gram in self._grams(obj.name):
+            counts[gram] += self.name_weight
+        cols = np.fromiter((self.vocab.setdefault(gram, len(self.vocab)) for gram in counts),
+                           dtype=np.int32, count=len(counts))
+        # Sublinear term frequency so a repeated word doesn't dominate
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        return cols, tf.astype(np.float32)
+
+    def update(self, obj: TrackedObject):
+        self.objects[obj.id] = obj
+        signature = (obj.name, obj.alias)
+        current = self.docs.get(obj.id)
+        if current is None or current[0] != signature:
+            self.docs[obj.id] = (signature, *self._vectorize(obj))
+            self.stats["reindexed_objects"] += 1
+            self._dirty = True
+
+    def remove(self, object_id: int):
+        self.objects.pop(object_id, None)
+        if self.docs.pop(object_id, None) is not None:
+            self._dirty = True
+
+    def sync(self, objects: Iterable[TrackedObject], version: Optional[int] = None):
+        """Bring the index in line with `objects`, re-tokenising only what changed"""
+        if version is not None and version == self._synced_version:
+            return
+        seen = set()
+        for obj in objects:
+            seen.add(obj.id)
+            self.update(obj)
+        for object_id in [object_id for object_id in self.docs if object_id not in seen]:
+            self.remove(object_id)
+        self._synced_version = version
+
+    def _compile(self):
+        ids = list(self.docs)
+        n_docs, n_terms = len(ids), len(self.vocab)
+        if n_docs:
+            lengths = np.fromiter((len(self.docs[i][1]) for i in ids), dtype=np.int64, count=n_docs)
+            rows = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+            cols = np.concatenate([self.docs[i][1] for i in ids])
+            tf = np.concatenate([self.docs[i][2] for i in ids])
+        else:
+            rows = np.zeros(0, dtype=np.int32)
+            cols = np.zeros(0, dtype=np.int32)
+            tf = np.zeros(0, dtype=np.float32)
+
+        df = np.bincount(cols, minlength=n_terms)
+        self._idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = tf * self._idf[cols]
+        self._doc_norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+
+        # Column-major postings: the rows and weights holding each n-gram are contiguous
+        order = np.argsort(cols, kind="stable")
+        self._post_rows = rows[order]
+        self._post_tf = weights[order]
+        self._col_ptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self._row_ids = np.array(ids, dtype=np.int64)
+        self._dirty = False
+        self.stats["rebuilds"] += 1
+
+    def scores(self, terms: str) -> np.ndarray:
+        """Cosine similarity of `terms` against every object, in row order"""
+        if self._dirty:
+            self._compile()
+        n_docs = len(self._row_ids)
+        counts = Counter(self._grams(terms))
+        if not counts or not n_docs:
+            return np.zeros(n_docs, dtype=np.float32)
+
+        # Unknown n-grams still count towards the query norm, at the rarest-term idf
+        unseen_idf = math.log(1.0 + n_docs) + 1.0
+        query_norm = 0.0
+        spans, factors = [], []
+        for gram, count in counts.items():
+            weight = 1.0 + math.log(count)
+            col = self.vocab.get(gram)
+            idf = self._idf[col] if col is not None and col < len(self._idf) else unseen_idf
+            query_norm += (weight * idf) ** 2
+            if col is not None and col < len(self._idf):
+                start, end = self._col_ptr[col], self._col_ptr[col + 1]
+                if end > start:
+                    spans.append(np.arange(start, end))
+                    factors.append(np.full(end - start, weight * idf, dtype=np.float32))
+        if not spans:
+            return np.zeros(n_docs, dtype=np.float32)
+
+        postings = np.concatenate(spans)
+        dots = np.bincount(self._post_rows[postings],
+                           weights=self._post_tf[postings] * np.concatenate(factors), minlength=n_docs)
+        norms = self._doc_norms * math.sqrt(query_norm)
+        return np.divide(dots, norms, out=np.zeros(n_docs), where=norms > 0)
+
+    def resolve(self, query: str, limit: int = 5) -> Resolution:
+        self.stats["resolutions"] += 1
+        terms = self.query_terms(query)
+        scores = self.scores(terms)
+        matches: List[Tuple[TrackedObject, float]] = []
+        if len(scores):
+            count = min(limit, len(scores))
+            top = np.argpartition(-scores, count - 1)[:count]
+            for row in top[np.argsort(-scores[top], kind="stable")]:
+                if scores[row] < self.min_score:
+                    break
+                matches.append((self.objects[int(self._row_ids[row])], float(scores[row])))
+        if matches:
+            # Queued-but-unwritten sightings are the freshest location we have
+            overlaid = location_buffer.apply_pending([obj for obj, _ in matches])
+            matches = [(obj, score) for obj, (_, score) in zip(overlaid, matches)]
+        self.stats["resolved" if matches else "unresolved"] += 1
+        return Resolution(query, terms, matches)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "objects": len(self.docs),
+            "vocabulary": len(self.vocab),
+            "postings": int(len(self._post_rows)),
+            "min_score": self.min_score,
+        }
+
+class HouseholdResolvers:
+    """One ObjectResolver per household, each synced from that household's index partition"""
+
+    def __init__(self, min_score: float = 0.25):
+        self.min_score = min_score
+        self.resolvers: Dict[str, ObjectResolver] = {}
+
+    def for_household(self, household: Optional[str] = None) -> ObjectResolver:
+        household = household or current_household()
+        resolver = self.resolvers.get(household)
+        if resolver is None:
+            resolver = self.resolvers[household] = ObjectResolver(min_score=self.min_score)
+        return resolver
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals: Dict[str, Any] = {"households": len(self.resolvers), "min_score": self.min_score}
+        for resolver in self.resolvers.values():
+            for key, value in resolver.get_stats().items():
+                if key != "min_score":
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+async def resolve_query(query: str, limit: int = 5) -> Resolution:
+    """Resolve against the current household's objects, syncing its resolver if they changed"""
+    from services.object_index import object_index
+    partition = await object_index.ensure_loaded()
+    resolver = object_resolver.for_household(partition.household)
+    resolver.sync(partition.objects.values(), partition.version)
+    return resolver.resolve(query, limit)
+
+# Global resolvers over the object index, one per household
+object_resolver = HouseholdResolvers(min_score=float(os.getenv("RESOLVER_MIN_SCORE", "0.25")))
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import ProcessingStatus, TrackedObject
+from services.location_buffer import location_buffer
+from services.memories_api import memories_api
+from services.sightings import sighting_store
+from services.video_catalog import video_catalog
+from utils.deadline import detached_context
+from utils.drain import wait_for_tasks
+from utils.tenancy import set_household
+from utils.events import event_bus, VIDEO_PROCESSED, OBJECT_CREATED, OBJECT_DELETED, OBJECT_CHANGED
+
+logger = logging.getLogger(__name__)
+
+# Answers like "I can't see any keys in this video" mean the object isn't there
+NEGATIVE_ANSWER = re.compile(
+    r"\b(not (visible|present|shown|found|seen)|(can ?not|can't|cannot|don't|do not|unable to) (see|find|locate|identify)"
+    r"|no (sign|trace) of|does not appear|doesn't appear|not in (this|the) video)\b",
+    re.IGNORECASE
+)
+SPATIAL_PHRASE = re.compile(r"\b(on|in|under|inside|beside|next to|near|behind|between|on top of)\s+(the|a|an|your)\b",
+                            re.IGNORECASE)
+
+def estimate_answer_confidence(answer: str) -> float:
+    """Rough confidence that a chat answer actually places the object somewhere"""
+    if not answer or NEGATIVE_ANSWER.search(answer):
+        return 0.0
+    confidence = 0.6
+    if SPATIAL_PHRASE.search(answer):
+        confidence += 0.25
+    if len(answer) > 300:
+        # Long rambling answers are usually hedged descriptions
+        confidence -= 0.15
+    return round(confidence, 2)
+
+class TokenBucket:
+    """Async token bucket limiting upstream calls per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class LocationPrewarmer:
+    """Asks the location question for every tracked object as soon as a video is processed.
+
+    Answers above ``min_confidence`` are kept per object so /api/search can
+    answer known objects from local data instead of two upstream calls.
+    """
+
+    def __init__(self, rate_per_second: float = 2.0, concurrency: int = 4,
+                 min_confidence: float = 0.5, serve_confidence: float = 0.7,
+                 backfill_videos: int = 5):
+        self.rate_per_second = rate_per_second
+        self.concurrency = concurrency
+        self.min_confidence = min_confidence
+        self.serve_confidence = serve_confidence
+        self.backfill_videos = backfill_videos
+        self.precomputed: Dict[int, Dict[str, Any]] = {}
+        self.stats = {"questions": 0, "answers_stored": 0, "negative_answers": 0, "errors": 0, "served": 0,
+                      "superseded": 0}
+        self._bucket: Optional[TokenBucket] = None
+        self._tasks = set()
+
+    def lookup(self, object_id: int) -> Optional[Dict[str, Any]]:
+        return self.precomputed.get(object_id)
+
+    def answer_for(self, object_id: int) -> Optional[Dict[str, Any]]:
+        """Precomputed location confident enough to answer a search directly"""
+        entry = self.precomputed.get(object_id)
+        if entry and sighting_store.query(object_id, start=entry["timestamp"] + 1, limit=1):
+            # A search (on any worker) has since seen the object in newer footage
+            self.precomputed.pop(object_id, None)
+            self.stats["superseded"] += 1
+            return None
+        if entry and entry["confidence"] >= self.serve_confidence:
+            self.stats["served"] += 1
+            return entry
+        return None
+
+    def forget(self, object_id: int):
+        self.precomputed.pop(object_id, None)
+
+    def _schedule(self, coro, household: Optional[str] = None):
+        # Runs after the triggering request has answered, so it must not inherit its deadline
+        context = detached_context()
+        if household:
+            context.run(set_household, household)
+        task = asyncio.get_running_loop().create_task(coro, context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _on_video_processed(self, event: Dict[str, Any]):
+        # The webhook carries no household; the video's owner was recorded at upload
+        record = event.get("record")
+        self._schedule(self.prewarm_video(event["video_no"]), household=record.household_id if record else None)
+
+    async def _on_object_created(self, event: Dict[str, Any]):
+        self._schedule(self.backfill_object(event["object"]))
+
+    async def _on_object_deleted(self, event: Dict[str, Any]):
+        self.forget(event["object_id"])
+
+    async def _on_object_changed(self, event: Dict[str, Any]):
+        # Deletes made on another worker; inserts are backfilled by the worker that made them
+        if event["op"] == "delete":
+            self.forget(event["object_id"])
+            location_buffer.discard(event["object_id"])
+
+    async def prewarm_video(self, video_no: str):
+        """Locate every tracked object in a newly processed video"""
+        from services.object_index import object_index
+        objects = await object_index.all()
+        await self._run([(obj, video_no) for obj in objects])
+
+    async def backfill_object(self, obj: TrackedObject):
+        """Locate a newly created object in the most recent processed videos"""
+        videos = video_catalog.recent(ProcessingStatus.COMPLETED, limit=self.backfill_videos)
+        await self._run([(obj, record.video_no) for record in videos])
+
+    async def _run(self, pairs: List[Tuple[TrackedObject, str]]):
+        # Batches of `concurrency` calls, each call also paced by the token bucket
+        for start in range(0, len(pairs), self.concurrency):
+            batch = pairs[start:start + self.concurrency]
+            await asyncio.gather(*(self._ask(obj, video_no) for obj, video_no in batch))
+
+    async def _ask(self, obj: TrackedObject, video_no: str):
+        from routers.search import SearchEnhancer
+
+        if self._bucket is None:
+            self._bucket = TokenBucket(self.rate_per_second, burst=self.concurrency)
+        await self._bucket.acquire()
+        self.stats["questions"] += 1
+        try:
+            response = await memories_api.chat_with_video(video_no, SearchEnhancer.create_location_query(obj.name))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Prewarm failed for {obj.name} in {video_no}: {e}")
+            return
+
+        answer = response.get("response", "")
+        confidence = estimate_answer_confidence(answer)
+        if confidence < self.min_confidence:
+            self.stats["negative_answers"] += 1
+            return
+
+        timestamp = video_catalog.seen_at(video_catalog.get(video_no)) or int(time.time() * 1000)
+
+        current = self.precomputed.get(obj.id)
+        if current and current["timestamp"] > timestamp:
+            # Keep the answer from newer footage
+            return
+
+        self.precomputed[obj.id] = {
+            "location": answer,
+            "confidence": confidence,
+            "video_no": video_no,
+            "timestamp": timestamp,
+            "computed_at": time.time(),
+        }
+        self.stats["answers_stored"] += 1
+        location_buffer.enqueue(obj, video_no=video_no, location=answer, confidence=confidence, timestamp=timestamp)
+        sighting_store.record(obj.id, video_no, answer, confidence, timestamp)
+
+    def start(self):
+        event_bus.subscribe(VIDEO_PROCESSED, self._on_video_processed)
+        event_bus.subscribe(OBJECT_CREATED, self._on_object_created)
+        event_bus.subscribe(OBJECT_DELETED, self._on_object_deleted)
+        event_bus.subscribe(OBJECT_CHANGED, self._on_object_changed)
+
+    async def stop(self, grace: float = 0.0):
+        """Stop prewarming; questions already asked get up to `grace` seconds to finish"""
+        event_bus.unsubscribe(VIDEO_PROCESSED, self._on_video_processed)
+        event_bus.unsubscribe(OBJECT_CREATED, self._on_object_created)
+        event_bus.unsubscribe(OBJECT_DELETED, self._on_object_deleted)
+        event_bus.unsubscribe(OBJECT_CHANGED, self._on_object_changed)
+        await wait_for_tasks(self._tasks, grace)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        return {str(object_id): entry for object_id, entry in self.precomputed.items()}
+
+    def restore_state(self, entries: Dict[str, Any], max_age: float) -> int:
+        """Reload answers computed within `max_age` seconds, keeping any newer one already held"""
+        now = time.time()
+        restored = 0
+        for object_id, entry in entries.items():
+            current = self.precomputed.get(int(object_id))
+            if now - entry["computed_at"] > max_age or (current and current["timestamp"] >= entry["timestamp"]):
+                continue
+            self.precomputed[int(object_id)] = entry
+            restored += 1
+        return restored
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "precomputed_objects": len(self.precomputed),
+            "in_progress": len(self._tasks),
+            "rate_per_second": self.rate_per_second,
+        }
+
+# Global prewarmer
+prewarmer = LocationPrewarmer(
+    rate_per_second=float(os.getenv("PREWARM_RATE_PER_SEC", "2")),
+    concurrency=int(os.getenv("PREWARM_CONCURRENCY", "4")),
+    min_confidence=float(os.getenv("PREWARM_MIN_CONFIDENCE", "0.5")),
+    serve_confidence=float(os.getenv("PREWARM_SERVE_CONFIDENCE", "0.7")),
+    backfill_videos=int(os.getenv("PREWARM_BACKFILL_VIDEOS", "5"))
+)
@@ -0,0 +1,285 @@
+import bisect
+import logging
+import os
+import random
+import struct
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One day per partition; timestamps are epoch milliseconds like the search results
+DEFAULT_PARTITION_MS = 24 * 60 * 60 * 1000
+
+# Append-only log records. Each names the process that wrote it and carries its
+# strings inline, so workers sharing one log never depend on each other's intern ids.
+_SIGHTING_RECORD = struct.Struct("<cIqqfHH")  # + phrase and video bytes
+_FORGET_RECORD = struct.Struct("<cIq")
+_SIGHTING, _FORGET = b"R", b"D"
+
+class StringInterner:
+    """Maps repeated strings (location phrases, video ids) to small integers"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> Tuple[int, bool]:
+        """Return (id, is_new)"""
+        existing = self.ids.get(value)
+        if existing is not None:
+            return existing, False
+        self.ids[value] = len(self.values)
+        self.values.append(value)
+        return self.ids[value], True
+
+    def __len__(self):
+        return len(self.values)
+
+class SightingPartition:
+    """Column arrays for every sighting that falls in one time bucket"""
+
+    __slots__ = ("timestamps", "object_ids", "phrase_ids", "video_ids", "confidences", "by_object")
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.object_ids = array("q")
+        self.phrase_ids = array("I")
+        self.video_ids = array("I")
+        self.confidences = array("f")
+        # object id -> row offsets in this partition, ordered by timestamp
+        self.by_object: Dict[int, array] = {}
+
+    def append(self, timestamp: int, object_id: int, phrase_id: int, video_id: int, confidence: float):
+        offset = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        self.object_ids.append(object_id)
+        self.phrase_ids.append(phrase_id)
+        self.video_ids.append(video_id)
+        self.confidences.append(confidence)
+
+        offsets = self.by_object.get(object_id)
+        if offsets is None:
+            offsets = self.by_object[object_id] = array("I")
+        if not offsets or self.timestamps[offsets[-1]] <= timestamp:
+            offsets.append(offset)
+        else:
+            # Out-of-order sighting (older video searched later)
+            position = bisect.bisect_right(offsets, timestamp, key=self.timestamps.__getitem__)
+            offsets.insert(position, offset)
+
+    def offsets_in_range(self, object_id: int, start: int, end: int) -> array:
+        offsets = self.by_object.get(object_id)
+        if not offsets:
+            return array("I")
+        lo = bisect.bisect_left(offsets, start, key=self.timestamps.__getitem__)
+        hi = bisect.bisect_right(offsets, end, key=self.timestamps.__getitem__)
+        return offsets[lo:hi]
+
+class SightingStore:
+    """Append-only, time-partitioned log of where objects were seen.
+
+    Rows live in per-partition column arrays, location phrases and video ids
+    are interned in memory, and every partition keeps a per-object index
+    sorted by time so range queries only touch the matching rows.
+
+    Several workers can share one log: every record is appended with a single
+    unbuffered write, and before answering a query each store reads what the
+    others appended since it last looked.
+    """
+
+    def __init__(self, path: Optional[str] = None, partition_ms: int = DEFAULT_PARTITION_MS):
+        self.path = path
+        self.partition_ms = partition_ms
+        self.partitions: Dict[int, SightingPartition] = {}
+        self.partition_keys: List[int] = []
+        self.phrases = StringInterner()
+        self.videos = StringInterner()
+        self.count = 0
+        self._lock = threading.Lock()
+        self._log = None
+        # Tags this process's records so catching up skips what it already applied
+        self._writer = random.getrandbits(32)
+        # Bytes of the shared log already applied
+        self._offset = 0
+
+        if self.path:
+            self._load()
+            self._log = open(self.path, "ab", buffering=0)
+
+    def _partition(self, timestamp: int) -> SightingPartition:
+        key = timestamp // self.partition_ms
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = self.partitions[key] = SightingPartition()
+            bisect.insort(self.partition_keys, key)
+        return partition
+
+    def _append(self, timestamp: int, object_id: int, location: str, video_no: str, confidence: float):
+        phrase_id, _ = self.phrases.intern(location)
+        video_id, _ = self.videos.intern(video_no)
+        self._partition(timestamp).append(timestamp, object_id, phrase_id, video_id, confidence)
+        self.count += 1
+
+    def record(self, object_id: int, video_no: str, location: str, confidence: float, timestamp: int):
+        """Append one sighting"""
+        timestamp = int(timestamp)
+        confidence = float(confidence or 0.0)
+        with self._lock:
+            self._append(timestamp, object_id, location, video_no, confidence)
+            if self._log:
+                phrase = location.encode("utf-8")[:65535]
+                video = video_no.encode("utf-8")[:65535]
+                # One write per record: O_APPEND keeps other workers' records from landing inside it
+                self._log.write(_SIGHTING_RECORD.pack(
+                    _SIGHTING, self._writer, timestamp, object_id, confidence, len(phrase), len(video)
+                ) + phrase + video)
+
+    def _partitions_between(self, start: int, end: int):
+        lo = bisect.bisect_left(self.partition_keys, start // self.partition_ms)
+        hi = bisect.bisect_right(self.partition_keys, end // self.partition_ms)
+        return [self.partitions[key] for key in self.partition_keys[lo:hi]]
+
+    def query(self, object_id: int, start: int = 0, end: int = 2**62,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """Sightings of an object in [start, end], newest first"""
+        self._catch_up()
+        results = []
+        for partition in reversed(self._partitions_between(start, end)):
+            offsets = partition.offsets_in_range(object_id, start, end)
+            for offset in reversed(offsets):
+                results.append({
+                    "timestamp": partition.timestamps[offset],
+                    "location": self.phrases.values[partition.phrase_ids[offset]],
+                    "video_no": self.videos.values[partition.video_ids[offset]],
+                    "confidence": round(partition.confidences[offset], 4),
+                })
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def frequent_locations(self, object_id: int, start: int = 0, end: int = 2**62,
+                           k: int = 5) -> List[Dict[str, Any]]:
+        """Most common location phrases for an object in [start, end]"""
+        self._catch_up()
+        counts = Counter()
+        last_seen: Dict[int, int] = {}
+        for partition in self._partitions_between(start, end):
+            offsets = partition.offsets_in_range(object_id, start, end)
+            if not offsets:
+                continue
+            phrase_ids = [partition.phrase_ids[offset] for offset in offsets]
+            counts.update(phrase_ids)
+            for offset, phrase_id in zip(offsets, phrase_ids):
+                last_seen[phrase_id] = max(last_seen.get(phrase_id, 0), partition.timestamps[offset])
+
+        total = sum(counts.values())
+        return [
+            {
+                "location": self.phrases.values[phrase_id],
+                "count": count,
+                "share": round(count / total, 4),
+                "last_seen": last_seen[phrase_id],
+            }
+            for phrase_id, count in counts.most_common(k)
+        ]
+
+    def forget(self, object_id: int):
+        """Stop returning sightings for a deleted object"""
+        with self._lock:
+            self._forget(object_id)
+            if self._log:
+                self._log.write(_FORGET_RECORD.pack(_FORGET, self._writer, object_id))
+
+    def _forget(self, object_id: int):
+        for partition in self.partitions.values():
+            offsets = partition.by_object.pop(object_id, None)
+            if offsets is not None:
+                self.count -= len(offsets)
+
+    def _apply(self, data: bytes, skip_writer: Optional[int] = None) -> Tuple[int, bool]:
+        """Apply the complete records in `data`; returns (bytes consumed, hit a corrupt record)"""
+        position = 0
+        while position < len(data):
+            kind = data[position:position + 1]
+            if kind == _SIGHTING:
+                if position + _SIGHTING_RECORD.size > len(data):
+                    break
+                _, writer, timestamp, object_id, confidence, phrase_length, video_length = \
+                    _SIGHTING_RECORD.unpack_from(data, position)
+                end = position + _SIGHTING_RECORD.size + phrase_length + video_length
+                if end > len(data):
+                    break
+                if writer != skip_writer:
+                    strings = data[position + _SIGHTING_RECORD.size:end]
+                    self._append(timestamp, object_id,
+                                 strings[:phrase_length].decode("utf-8", errors="replace"),
+                                 strings[phrase_length:].decode("utf-8", errors="replace"), confidence)
+                position = end
+            elif kind == _FORGET:
+                if position + _FORGET_RECORD.size > len(data):
+                    break
+                _, writer, object_id = _FORGET_RECORD.unpack_from(data, position)
+                position += _FORGET_RECORD.size
+                if writer != skip_writer:
+                    self._forget(object_id)
+            else:
+                return position, True
+        return position, False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        position, corrupt = self._apply(data)
+        if corrupt:
+            logger.warning(f"⚠️  Sightings log {self.path} is corrupt at byte {position}, ignoring the rest")
+        if position < len(data):
+            # Drop a torn trailing record so new appends stay aligned
+            with open(self.path, "r+b") as f:
+                f.truncate(position)
+        self._offset = position
+        logger.info(f"📍 Loaded {self.count} sightings from {self.path}")
+
+    def _catch_up(self):
+        """Apply records other workers appended to the shared log since we last looked"""
+        if not self._log:
+            return
+        with self._lock:
+            if os.path.getsize(self.path) <= self._offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # A record still being written is left for next time
+            position, corrupt = self._apply(data, skip_writer=self._writer)
+            if corrupt:
+                logger.warning(f"⚠️  Sightings log {self.path} is corrupt at byte {self._offset + position}, "
+                               f"skipping to its end")
+                position = len(data)
+            self._offset += position
+
+    def flush(self):
+        if self._log:
+            self._log.flush()
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._catch_up()
+        return {
+            "sightings": self.count,
+            "partitions": len(self.partitions),
+            "distinct_locations": len(self.phrases),
+            "distinct_videos": len(self.videos),
+        }
+
+# Global sightings log
+sighting_store = SightingStore(path=os.getenv("SIGHTINGS_LOG_PATH") or None)
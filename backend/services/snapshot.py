@@ -0,0 +1,136 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.memories_api import memories_api
+from services.prewarm import prewarmer
+from utils.admission import admission_controller
+from utils.performance import answer_cache, perf_monitor, search_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+class StateSnapshot:
+    """Carries warm caches and metric baselines across a restart.
+
+    On shutdown the search and answer caches, prewarmed answers, function
+    timings, hedge latency windows and admission service times are written
+    to one gzipped JSON file (atomically, via a temp file and rename). The next process
+    loads it on startup: cache entries keep their original write times so
+    they still expire on schedule, and a snapshot older than ``max_age`` is
+    ignored entirely. With several workers sharing a path, the last one to
+    stop wins, and every worker starts from that copy.
+    """
+
+    def __init__(self, path: str, max_age: float = 3600):
+        self.path = path
+        self.max_age = max_age
+        self.stats = {"saved": 0, "loaded": 0, "save_errors": 0, "load_errors": 0, "skipped_stale": 0}
+        self.last_save: Optional[Dict[str, Any]] = None
+        self.last_load: Optional[Dict[str, Any]] = None
+
+    def _sections(self) -> Dict[str, Tuple[Callable[[], Any], Callable[[Any], Any]]]:
+        # name -> (collect, restore); restore may return how many entries it kept
+        return {
+            "search_cache": (search_cache.snapshot_state, search_cache.restore_state),
+            # Entries carry absolute soft/hard expiry times, so staleness survives the restart too
+            "answer_cache": (answer_cache.entries.snapshot_state, answer_cache.entries.restore_state),
+            "prewarmed": (prewarmer.snapshot_state,
+                          lambda entries: prewarmer.restore_state(entries, self.max_age)),
+            "perf_metrics": (perf_monitor.snapshot_state, perf_monitor.restore_state),
+            "hedge_latencies": (memories_api.hedger.snapshot_state, memories_api.hedger.restore_state),
+            "admission": (admission_controller.snapshot_state, admission_controller.restore_state),
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def save(self) -> bool:
+        if not self.enabled:
+            return False
+        started = time.monotonic()
+        document = {"version": SNAPSHOT_VERSION, "written_at": time.time()}
+        for name, (collect, _) in self._sections().items():
+            document[name] = collect()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as out:
+                    out.write(json.dumps(document, separators=(",", ":"), default=str).encode())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            self.stats["save_errors"] += 1
+            logger.error(f"❌ Failed to write state snapshot to {self.path}: {e}")
+            return False
+
+        self.stats["saved"] += 1
+        self.last_save = {
+            "bytes": os.path.getsize(self.path),
+            "search_cache_entries": sum(len(items) for items in document["search_cache"].values()),
+            "seconds": round(time.monotonic() - started, 4),
+        }
+        logger.info(f"💾 Saved state snapshot to {self.path} ({self.last_save['bytes']} bytes)")
+        return True
+
+    def load(self) -> Dict[str, Any]:
+        """Restore whatever the snapshot still has that is fresh; returns what was restored per section"""
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        try:
+            with gzip.open(self.path, "rb") as f:
+                document = json.loads(f.read())
+        except Exception as e:
+            self.stats["load_errors"] += 1
+            logger.warning(f"⚠️ Ignoring unreadable state snapshot {self.path}: {e}")
+            return {}
+
+        age = time.time() - document.get("written_at", 0)
+        if document.get("version") != SNAPSHOT_VERSION or age > self.max_age:
+            self.stats["skipped_stale"] += 1
+            logger.info(f"💾 Ignoring state snapshot from {age:.0f}s ago (version {document.get('version')})")
+            return {}
+
+        restored: Dict[str, Any] = {}
+        for name, (_, restore) in self._sections().items():
+            if name not in document:
+                continue
+            try:
+                result = restore(document[name])
+                restored[name] = result if result is not None else len(document[name])
+            except Exception as e:
+                # A section from an older layout shouldn't keep the rest from loading
+                self.stats["load_errors"] += 1
+                logger.warning(f"⚠️ Skipping {name} from state snapshot: {e}")
+
+        self.stats["loaded"] += 1
+        self.last_load = {"age_seconds": round(age, 1), "restored": restored}
+        logger.info(f"💾 Restored state snapshot from {age:.0f}s ago: {restored}")
+        return restored
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_age_seconds": self.max_age,
+            "last_save": self.last_save,
+            "last_load": self.last_load,
+        }
+
+# Global snapshot; an empty STATE_SNAPSHOT_PATH disables it
+state_snapshot = StateSnapshot(
+    path=os.getenv("STATE_SNAPSHOT_PATH", "state_snapshot.json.gz"),
+    max_age=float(os.getenv("STATE_SNAPSHOT_MAX_AGE", "3600"))
+)
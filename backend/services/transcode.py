@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class NoopTranscoder:
+    """Uploads every video as it arrived"""
+
+    name = "none"
+    enabled = False
+
+    def command(self, source: str, target: str) -> Optional[List[str]]:
+        return None
+
+class FFmpegTranscoder:
+    """Re-encodes to H.264/AAC MP4 with the short side, frame rate and bitrate capped.
+
+    Capping the short side keeps portrait phone clips and landscape ones at
+    the same detail; smaller or slower sources are never scaled up.
+    """
+
+    name = "ffmpeg"
+    enabled = True
+
+    def __init__(self, binary: str = "ffmpeg", max_short_side: int = 720, max_fps: int = 30,
+                 video_bitrate: str = "2M", audio_bitrate: str = "96k", preset: str = "veryfast"):
+        self.binary = binary
+        self.max_short_side = max_short_side
+        self.max_fps = max_fps
+        self.video_bitrate = video_bitrate
+        self.audio_bitrate = audio_bitrate
+        self.preset = preset
+
+    def command(self, source: str, target: str) -> Optional[List[str]]:
+        side = self.max_short_side
+        scale = f"scale='if(gt(iw,ih),-2,min(iw,{side}))':'if(gt(iw,ih),min(ih,{side}),-2)'"
+        return [
+            self.binary, "-hide_banner", "-loglevel", "error", "-y", "-i", source,
+            "-vf", scale, "-fpsmax", str(self.max_fps),
+            "-c:v", "libx264", "-preset", self.preset,
+            "-b:v", self.video_bitrate, "-maxrate", self.video_bitrate, "-bufsize", self.video_bitrate,
+            "-c:a", "aac", "-b:a", self.audio_bitrate,
+            "-movflags", "+faststart", target,
+        ]
+
+class PreparedUpload:
+    """What actually goes to Memories.ai: an open file to stream plus its name and type"""
+
+    def __init__(self, stream: BinaryIO, filename: Optional[str], content_type: Optional[str],
+                 original_bytes: int, upload_bytes: int):
+        self.stream = stream
+        self.filename = filename
+        self.content_type = content_type
+        self.original_bytes = original_bytes
+        self.upload_bytes = upload_bytes
+
+def _size_of(stream: BinaryIO) -> int:
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+class TranscodeStage:
+    """Optional pre-upload step that shrinks videos before they are sent upstream.
+
+    Object localisation doesn't need 4K/60fps, and upload and upstream
+    processing time grow with the bytes sent. Files of at least
+    ``min_bytes`` are spooled to disk and re-encoded by the transcoder's
+    command as a child process (``workers`` at a time), off the event loop.
+    The result is streamed to the upload from disk; if it fails, times out
+    or isn't smaller, the original is uploaded instead.
+    """
+
+    def __init__(self, transcoder=None, workers: int = 2, min_bytes: int = 5 * 1024 * 1024,
+                 timeout: float = 60.0):
+        self.transcoder = transcoder or NoopTranscoder()
+        self.workers = workers
+        self.min_bytes = min_bytes
+        self.timeout = timeout
+        self.stats = {"uploads": 0, "transcoded": 0, "kept_original": 0, "skipped_small": 0, "failures": 0,
+                      "bytes_in": 0, "bytes_out": 0, "bytes_saved": 0, "transcode_seconds": 0.0}
+        self._running: Set[asyncio.subprocess.Process] = set()
+        # Rebuilt per event loop, like the SQLite reader pool
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, self.workers))
+            self._loop = loop
+        return self._slots
+
+    async def _run(self, args: List[str]) -> Optional[str]:
+        """Run the transcoder's command, returning its error output on failure.
+
+        The child is killed if it outlives ``timeout`` or the upload waiting
+        for it is cancelled, so an abandoned request never leaves an encoder
+        running.
+        """
+        async with self._semaphore():
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *args, stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                )
+            except OSError as e:
+                return str(e)
+            self._running.add(process)
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                return f"timed out after {self.timeout:.0f}s"
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    # Reap it; shielded so a second cancellation can't leave a zombie behind
+                    await asyncio.shield(process.wait())
+                self._running.discard(process)
+        if process.returncode != 0:
+            return stderr.decode(errors="replace")[-500:] or f"exit code {process.returncode}"
+        return None
+
+    async def _transcode(self, file, source_path: str, target_path: str) -> Optional[str]:
+        with open(source_path, "wb") as spool:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, spool, 1024 * 1024)
+        file.file.seek(0)
+        args = self.transcoder.command(source_path, target_path)
+        if args is None:
+            return "transcoder gave no command"
+        return await self._run(args)
+
+    @asynccontextmanager
+    async def prepare(self, file) -> AsyncIterator[PreparedUpload]:
+        """Yield the upload to send for `file` (an UploadFile); temporary files are removed afterwards"""
+        original_bytes = file.size if file.size is not None else _size_of(file.file)
+        self.stats["uploads"] += 1
+        self.stats["bytes_in"] += original_bytes
+        file.file.seek(0)
+        original = PreparedUpload(file.file, file.filename, file.content_type, original_bytes, original_bytes)
+
+        enabled = getattr(self.transcoder, "enabled", True)
+        if not enabled or original_bytes < self.min_bytes:
+            if enabled:
+                self.stats["skipped_small"] += 1
+            self.stats["bytes_out"] += original_bytes
+            yield original
+            return
+
+        workdir = tempfile.mkdtemp(prefix="transcode-")
+        source_path = os.path.join(workdir, "source")
+        target_path = os.path.join(workdir, "upload.mp4")
+        try:
+            started = time.monotonic()
+            error = await self._transcode(file, source_path, target_path)
+            self.stats["transcode_seconds"] += time.monotonic() - started
+            upload_bytes = os.path.getsize(target_path) if error is None and os.path.exists(target_path) else None
+
+            if error is not None or not upload_bytes:
+                self.stats["failures"] += 1
+                logger.warning(f"⚠️ Transcoding {file.filename} failed, uploading the original: {error}")
+                prepared = original
+            elif upload_bytes >= original_bytes:
+                self.stats["kept_original"] += 1
+                prepared = original
+            else:
+                self.stats["transcoded"] += 1
+                self.stats["bytes_saved"] += original_bytes - upload_bytes
+                logger.info(f"🎞️ Transcoded {file.filename}: {original_bytes} -> {upload_bytes} bytes")
+                stem = os.path.splitext(file.filename or "video")[0]
+                prepared = PreparedUpload(open(target_path, "rb"), f"{stem}.mp4", "video/mp4",
+                                          original_bytes, upload_bytes)
+
+            self.stats["bytes_out"] += prepared.upload_bytes
+            try:
+                yield prepared
+            finally:
+                if prepared is not original:
+                    prepared.stream.close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def shutdown(self):
+        """Kill any transcoder still running"""
+        for process in list(self._running):
+            if process.returncode is None:
+                process.kill()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "transcode_seconds": round(self.stats["transcode_seconds"], 3),
+            "transcoder": self.transcoder.name,
+            "workers": self.workers,
+            "min_bytes": self.min_bytes,
+            "saved_percent": round(100 * self.stats["bytes_saved"] / self.stats["bytes_in"], 1)
+                             if self.stats["bytes_in"] else 0.0,
+        }
+
+def build_transcoder(name: str):
+    """Transcoder for TRANSCODER: "none" (the default), "ffmpeg", or "auto" (ffmpeg when it is installed)"""
+    binary = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    if name == "auto":
+        name = "ffmpeg" if shutil.which(binary) else "none"
+    if name == "ffmpeg":
+        # Uploads are no longer sent byte-for-byte; say so once at startup
+        logger.info(f"🎞️ Re-encoding uploads with {binary} before sending them to Memories.ai")
+        return FFmpegTranscoder(
+            binary=binary,
+            max_short_side=int(os.getenv("TRANSCODE_MAX_SHORT_SIDE", "720")),
+            max_fps=int(os.getenv("TRANSCODE_MAX_FPS", "30")),
+            video_bitrate=os.getenv("TRANSCODE_VIDEO_BITRATE", "2M"),
+        )
+    if name != "none":
+        logger.warning(f"⚠️ Unknown TRANSCODER '{name}', uploading videos unchanged")
+    return NoopTranscoder()
+
+# Global pre-upload stage
+transcode_stage = TranscodeStage(
+    transcoder=build_transcoder(os.getenv("TRANSCODER", "none").lower()),
+    workers=int(os.getenv("TRANSCODE_WORKERS", "2")),
+    min_bytes=int(os.getenv("TRANSCODE_MIN_BYTES", str(5 * 1024 * 1024))),
+    timeout=float(os.getenv("TRANSCODE_TIMEOUT", "60"))
+)
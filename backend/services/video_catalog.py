@@ -0,0 +1,252 @@
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import ProcessingStatus, VideoRecord
+from utils.tenancy import DEFAULT_HOUSEHOLD, current_household
+
+logger = logging.getLogger(__name__)
+
+ROOM_SEPARATORS = re.compile(r"[\s_-]+")
+
+def normalize_room(room: Optional[str]) -> Optional[str]:
+    """Canonical room tag ("Living_Room " -> "living room"), or None when blank"""
+    if room is None:
+        return None
+    room = ROOM_SEPARATORS.sub(" ", room).strip().lower()
+    return room or None
+
+def _local_naive(moment: Optional[datetime]) -> Optional[datetime]:
+    # Upload times are naive local time; bring timezone-aware bounds onto the same clock
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+class VideoCatalog:
+    """Local record of uploaded videos and their processing status.
+
+    Filled in by the upload endpoint and the Memories.ai webhook, so status
+    reads never have to poll upstream. Upload times and room tags also let
+    search re-rank upstream hits towards recent footage and scope a query
+    to one room or time window without another upstream call.
+
+    With a ``path``, every change is also appended to a JSON-lines log that
+    several workers can share: each reads what the others appended before
+    answering, so a status read or search on any worker sees uploads and
+    webhook callbacks handled by another. A processing outcome read from
+    another worker's line is passed to the ``on_outcome`` listeners, so
+    every worker drops the cached answers it could change. Without a path
+    the catalog lives in this process only, which is only correct with a
+    single worker.
+    """
+
+    def __init__(self, recency_weight: float = 0.3, recency_half_life_hours: float = 24.0,
+                 path: Optional[str] = None):
+        self.videos: Dict[str, VideoRecord] = {}
+        self.recency_weight = recency_weight
+        self.recency_half_life_hours = recency_half_life_hours
+        self.path = path
+        self.stats = {"ranked_searches": 0, "reordered": 0, "filtered_hits": 0, "log_records_applied": 0}
+        self._lock = threading.Lock()
+        self._log = None
+        # Bytes of the shared log already applied
+        self._offset = 0
+        self._listeners: List[Callable[[VideoRecord], Any]] = []
+
+        if self.path:
+            self._catch_up()
+            logger.info(f"🎞️ Loaded {len(self.videos)} videos from {self.path}")
+            self._log = open(self.path, "ab", buffering=0)
+
+    def _save(self, record: VideoRecord):
+        self.videos[record.video_no] = record
+        if self._log:
+            # One write per line: O_APPEND keeps other workers' lines from landing inside it
+            self._log.write((record.model_dump_json() + "\n").encode())
+
+    def on_outcome(self, listener: Callable[[VideoRecord], Any]):
+        """Call `listener(record)` when another worker's log line finishes or fails a video"""
+        self._listeners.append(listener)
+
+    def sync(self):
+        """Catch up with the shared log now, rather than on the next read that needs it"""
+        self._catch_up()
+
+    def _catch_up(self):
+        """Apply records appended to the shared log (by any worker) since we last looked"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        outcomes = []
+        with self._lock:
+            if os.path.getsize(self.path) <= self._offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # A line still being written is left for next time
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                try:
+                    record = VideoRecord.model_validate_json(line)
+                except ValueError:
+                    logger.warning(f"⚠️  Skipping unreadable line in video catalog {self.path}")
+                    continue
+                # File order is the same for every worker, so the last line for a video wins everywhere
+                previous = self.videos.get(record.video_no)
+                self.videos[record.video_no] = record
+                self.stats["log_records_applied"] += 1
+                # Our own lines were applied when written, so their status is already known here
+                if record.status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED) and \
+                        (previous is None or previous.status != record.status):
+                    outcomes.append(record)
+            self._offset += complete
+        for record in outcomes:
+            for listener in self._listeners:
+                listener(record)
+
+    def register_upload(self, video_no: str, file_name: Optional[str],
+                        status: ProcessingStatus = ProcessingStatus.PROCESSING,
+                        room: Optional[str] = None) -> VideoRecord:
+        record = VideoRecord(
+            video_no=video_no,
+            household_id=current_household(),
+            file_name=file_name,
+            room=normalize_room(room),
+            status=status,
+            uploaded_at=datetime.now(),
+            processed_at=datetime.now() if status == ProcessingStatus.COMPLETED else None,
+        )
+        self._save(record)
+        return record
+
+    def mark_status(self, video_no: str, status: ProcessingStatus,
+                    error: Optional[str] = None) -> VideoRecord:
+        """Record a processing outcome, creating the entry if the upload came from elsewhere"""
+        self._catch_up()
+        record = self.videos.get(video_no) or VideoRecord(video_no=video_no)
+        record = record.model_copy(update={
+            "status": status,
+            "error": error,
+            "processed_at": datetime.now() if status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED) else None,
+        })
+        self._save(record)
+        return record
+
+    def get(self, video_no: str) -> Optional[VideoRecord]:
+        self._catch_up()
+        return self.videos.get(video_no)
+
+    def recent(self, status: Optional[ProcessingStatus] = None, limit: int = 10) -> List[VideoRecord]:
+        """The current household's most recently uploaded videos, optionally filtered by status"""
+        self._catch_up()
+        household = current_household()
+        # Videos only known from a webhook have no owner; they belong to the default household
+        records = [r for r in self.videos.values()
+                   if (r.household_id or DEFAULT_HOUSEHOLD) == household and (status is None or r.status == status)]
+        records.sort(key=lambda r: r.uploaded_at or r.processed_at or datetime.min, reverse=True)
+        return records[:limit]
+
+    def rooms(self) -> List[str]:
+        """Room tags used by the current household's uploads"""
+        self._catch_up()
+        household = current_household()
+        return sorted({r.room for r in self.videos.values()
+                       if r.room and (r.household_id or DEFAULT_HOUSEHOLD) == household})
+
+    def in_scope(self, record: Optional[VideoRecord], room: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> bool:
+        """Whether a video was tagged with `room` and uploaded within [since, until]"""
+        if room is None and since is None and until is None:
+            return True
+        if record is None:
+            return False
+        room, since, until = normalize_room(room), _local_naive(since), _local_naive(until)
+        uploaded_at = record.uploaded_at or record.processed_at
+        if room is not None and record.room != room:
+            return False
+        if since is not None and (uploaded_at is None or uploaded_at < since):
+            return False
+        if until is not None and (uploaded_at is None or uploaded_at > until):
+            return False
+        return True
+
+    def recency(self, record: Optional[VideoRecord], now: Optional[datetime] = None) -> float:
+        """1.0 for footage uploaded just now, halving every ``recency_half_life_hours``; 0 if unknown"""
+        uploaded_at = record and (record.uploaded_at or record.processed_at)
+        if uploaded_at is None:
+            return 0.0
+        age_hours = max(0.0, ((now or datetime.now()) - uploaded_at).total_seconds() / 3600)
+        return 0.5 ** (age_hours / self.recency_half_life_hours)
+
+    def seen_at(self, record: Optional[VideoRecord], fallback: Optional[int] = None) -> Optional[int]:
+        """When the footage in `record` was taken, as epoch milliseconds: its upload time.
+
+        Every stored sighting and answer uses this one clock, so "newer" means
+        the same thing whichever path produced it. `fallback` (a searchAI hit's
+        own timestamp) is only used for videos this catalog doesn't know.
+        """
+        uploaded_at = record and (record.uploaded_at or record.processed_at)
+        if uploaded_at is None:
+            return fallback
+        return int(uploaded_at.timestamp() * 1000)
+
+    def rank_hits(self, hits: List[Dict[str, Any]], room: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None
+                  ) -> List[Tuple[Dict[str, Any], Optional[VideoRecord]]]:
+        """Order searchAI hits by upstream score blended with upload recency.
+
+        With a room or time window, hits from videos outside it (or not in
+        the catalog, so unverifiable) are dropped. Each hit comes back with
+        its catalog record, None when the video is unknown here.
+        """
+        self._catch_up()
+        scoped = room is not None or since is not None or until is not None
+        now = datetime.now()
+        ranked = []
+        for position, hit in enumerate(hits):
+            record = self.videos.get(hit.get("videoNo") or hit.get("video_no") or "")
+            if scoped and not self.in_scope(record, room, since, until):
+                self.stats["filtered_hits"] += 1
+                continue
+            try:
+                upstream = min(1.0, max(0.0, float(hit.get("score", hit.get("confidence", 0.8)))))
+            except (TypeError, ValueError):
+                upstream = 0.0
+            score = (1 - self.recency_weight) * upstream + self.recency_weight * self.recency(record, now)
+            # Upstream order breaks ties
+            ranked.append((-score, position, hit, record))
+
+        ranked.sort(key=lambda item: item[:2])
+        self.stats["ranked_searches"] += 1
+        if ranked and ranked[0][1] != 0:
+            self.stats["reordered"] += 1
+        return [(hit, record) for _, _, hit, record in ranked]
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._catch_up()
+        counts: Dict[str, int] = {}
+        for record in self.videos.values():
+            counts[record.status.value] = counts.get(record.status.value, 0) + 1
+        return {
+            **self.stats,
+            "videos": len(self.videos),
+            "by_status": counts,
+            "recency_weight": self.recency_weight,
+            "recency_half_life_hours": self.recency_half_life_hours,
+            "shared_log": self.path,
+        }
+
+# Global video catalog
+video_catalog = VideoCatalog(
+    recency_weight=float(os.getenv("SEARCH_RECENCY_WEIGHT", "0.3")),
+    recency_half_life_hours=float(os.getenv("SEARCH_RECENCY_HALF_LIFE_HOURS", "24")),
+    path=os.getenv("VIDEO_CATALOG_PATH") or None
+)
@@ -0,0 +1,224 @@
+"""Hot-path benchmark cases.
+
+Each case is ``setup(size) -> (operation, ops)``: ``operation()`` is the
+timed body and performs ``ops`` logical operations, so results are reported
+per operation regardless of how much work one call batches together.
+Setup work (building caches, objects, requests) is never timed.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+import asyncio
+import random
+import time
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from starlette.requests import Request
+
+from models import TrackedObject
+from routers.search import SearchEnhancer
+from utils.error_handler import ErrorHandler, RateLimiter
+from utils.performance import PerformanceMonitor, SimpleCache
+
+Setup = Callable[[int], Tuple[Callable[[], object], int]]
+
+OBJECT_NAMES = ["keys", "wallet", "phone", "glasses", "airpods", "remote", "charger", "watch", "passport", "badge"]
+QUERY_TEMPLATES = [
+    "Where are my {}?",
+    "I can't find my {}!",
+    "where did I put the {}",
+    "Where is my {} now?",
+    "did i leave my {} in the car?",
+]
+
+
+def _queries(size: int) -> List[str]:
+    rng = random.Random(size)
+    return [rng.choice(QUERY_TEMPLATES).format(rng.choice(OBJECT_NAMES)) for _ in range(size)]
+
+
+def _object_rows(size: int) -> List[Dict]:
+    rng = random.Random(size)
+    created = datetime(2024, 1, 1).isoformat()
+    return [
+        {
+            "id": i,
+            "name": f"{rng.choice(OBJECT_NAMES)}-{i}",
+            "alias": "car keys, house keys, keychain with a red tag",
+            "last_seen_timestamp": 1_700_000_000 + i,
+            "location_phrase": "On the shelf next to the front door",
+            "video_no": f"VI{i:08d}",
+            "confidence": 0.9,
+            "created_at": created,
+        }
+        for i in range(size)
+    ]
+
+
+def _request(path: str = "/api/objects/42") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def search_extract_object_name(size: int):
+    queries = _queries(size)
+
+    def operation():
+        for query in queries:
+            SearchEnhancer.extract_object_name(query)
+
+    return operation, size
+
+
+def search_enhance_queries(size: int):
+    queries = _queries(size)
+
+    def operation():
+        for query in queries:
+            name = SearchEnhancer.extract_object_name(query)
+            SearchEnhancer.enhance_search_query(name, "car keys, keychain")
+            SearchEnhancer.create_location_query(name)
+
+    return operation, size
+
+
+def cache_get_at_capacity(size: int):
+    cache = SimpleCache(max_size=size, ttl_seconds=3600)
+    for i in range(size):
+        cache.set(f"search:{i}", {"found": True, "video_no": f"VI{i}"})
+    keys = [f"search:{i}" for i in random.Random(size).sample(range(size), min(size, 1000))]
+
+    def operation():
+        for key in keys:
+            cache.get(key)
+
+    return operation, len(keys)
+
+
+def cache_set_at_capacity(size: int):
+    """Every set on a full cache evicts the oldest entry"""
+    cache = SimpleCache(max_size=size, ttl_seconds=3600)
+    for i in range(size):
+        cache.set(f"search:{i}", i)
+    counter = iter(range(size, 10 ** 12))
+    ops = 50
+
+    def operation():
+        for _ in range(ops):
+            cache.set(f"search:{next(counter)}", 0)
+
+    return operation, ops
+
+
+def rate_limiter_large_window(size: int):
+    """``size`` requests already inside an hour-long window for one key"""
+    limiter = RateLimiter()
+    now = time.time()
+    limiter.requests["client"] = [now - 3000 + i * (3000 / size) for i in range(size)]
+    ops = 20
+
+    def operation():
+        for _ in range(ops):
+            limiter.is_allowed("client", max_requests=size * 10, window_seconds=3600)
+        # Keep the window at ``size`` entries so every sample does the same work
+        del limiter.requests["client"][size:]
+
+    return operation, ops
+
+
+def time_function_overhead(size: int):
+    monitor = PerformanceMonitor()
+
+    @monitor.time_function("noop")
+    def noop(value):
+        return value
+
+    def operation():
+        for i in range(size):
+            noop(i)
+
+    return operation, size
+
+
+def time_function_async_overhead(size: int):
+    monitor = PerformanceMonitor()
+    loop = asyncio.new_event_loop()
+
+    @monitor.time_function("noop")
+    async def noop(value):
+        return value
+
+    async def calls():
+        for i in range(size):
+            await noop(i)
+
+    def operation():
+        loop.run_until_complete(calls())
+
+    return operation, size
+
+
+def tracked_object_construct(size: int):
+    rows = _object_rows(size)
+
+    def operation():
+        for row in rows:
+            TrackedObject(**row)
+
+    return operation, size
+
+
+def tracked_object_serialize(size: int):
+    objects = [TrackedObject(**row) for row in _object_rows(size)]
+
+    def operation():
+        for obj in objects:
+            obj.model_dump(mode="json")
+
+    return operation, size
+
+
+def error_http_exception(size: int):
+    loop = asyncio.new_event_loop()
+    request = _request()
+    exc = HTTPException(status_code=404, detail="Object not found")
+    ops = min(size, 1000)
+
+    async def calls():
+        for _ in range(ops):
+            await ErrorHandler.http_exception_handler(request, exc)
+
+    def operation():
+        loop.run_until_complete(calls())
+
+    return operation, ops
+
+
+def error_validation_formatting(size: int):
+    """One validation error response carrying ``size`` field errors"""
+    loop = asyncio.new_event_loop()
+    request = _request("/api/objects/bulk")
+    exc = RequestValidationError([
+        {"type": "missing", "loc": ("body", i, "alias"), "msg": "Field required", "input": {"name": "keys"}}
+        for i in range(size)
+    ])
+
+    def operation():
+        loop.run_until_complete(ErrorHandler.validation_exception_handler(request, exc))
+
+    return operation, 1
+
+
+# name -> (setup, sizes it runs at by default)
+CASES: Dict[str, Tuple[Setup, Tuple[int, ...]]] = {
+    "search.extract_object_name": (search_extract_object_name, (1_000, 10_000)),
+    "search.enhance_queries": (search_enhance_queries, (1_000, 10_000)),
+    "cache.get_at_capacity": (cache_get_at_capacity, (1_000, 10_000, 100_000)),
+    "cache.set_at_capacity": (cache_set_at_capacity, (1_000, 10_000, 100_000)),
+    "rate_limiter.is_allowed": (rate_limiter_large_window, (1_000, 10_000, 100_000)),
+    "perf_monitor.time_function": (time_function_overhead, (1_000, 10_000)),
+    "perf_monitor.time_function_async": (time_function_async_overhead, (1_000, 10_000)),
+    "tracked_object.construct": (tracked_object_construct, (1_000, 10_000, 100_000)),
+    "tracked_object.serialize": (tracked_object_serialize, (1_000, 10_000, 100_000)),
+    "error_handler.http_exception": (error_http_exception, (1_000,)),
+    "error_handler.validation": (error_validation_formatting, (1_000, 10_000)),
+}
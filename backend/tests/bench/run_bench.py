@@ -0,0 +1,223 @@
+"""Microbenchmarks for the pure-Python hot paths.
+
+Times the cases in ``bench_cases`` (SearchEnhancer regexes, SimpleCache at
+capacity, RateLimiter with large windows, PerformanceMonitor wrapper
+overhead, TrackedObject construction/serialization, ErrorHandler
+formatting) at 1k-100k objects/keys and writes per-operation timings,
+including every sample, to a JSON report.
+
+Usage (from the backend directory):
+
+    python tests/bench/run_bench.py --output bench_report.json --baseline tests/bench/baseline.json
+    python tests/bench/run_bench.py --filter cache. --sizes 100000
+
+``tests/bench/baseline.json`` is committed with the code it measures. After an
+intentional performance change, or when moving the check to another machine,
+refresh it there and commit the result:
+
+    python tests/bench/run_bench.py --output tests/bench/baseline.json
+
+With ``--baseline`` the run exits non-zero when a case is slower than the
+baseline by more than ``--min-change`` (a fraction, default 0.05) and a
+one-sided Welch t-test on the samples rejects "no slowdown" at ``--alpha``
+(default 0.01). Both conditions are needed: the test alone flags tiny but
+consistent differences, the threshold alone flags noise. Compare reports
+taken on the same machine.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(os.path.dirname(HERE))
+for path in (BACKEND_DIR, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from bench_cases import CASES
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction for the regularized incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_sf(t: float, df: float) -> float:
+    """P(T > t) for Student's t with ``df`` degrees of freedom"""
+    tail = 0.5 * betainc(df / 2.0, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1.0 - tail
+
+
+def welch_test(current: List[float], baseline: List[float]) -> Tuple[float, float, float]:
+    """One-sided Welch t-test that ``current`` has a larger mean: (t, df, p)"""
+    mean_c, mean_b = statistics.fmean(current), statistics.fmean(baseline)
+    var_c = statistics.variance(current) / len(current) if len(current) > 1 else 0.0
+    var_b = statistics.variance(baseline) / len(baseline) if len(baseline) > 1 else 0.0
+    se2 = var_c + var_b
+    if se2 == 0.0:
+        # Identical samples on both sides; only an exact difference is significant
+        return (math.inf if mean_c > mean_b else 0.0), math.inf, (0.0 if mean_c > mean_b else 1.0)
+    t = (mean_c - mean_b) / math.sqrt(se2)
+    df = se2 ** 2 / sum(v ** 2 / (len(s) - 1) for v, s in ((var_c, current), (var_b, baseline)) if len(s) > 1 and v)
+    return t, df, t_sf(t, df)
+
+
+def measure(operation: Callable[[], Any], ops: int, repeats: int = 20,
+            min_time: float = 0.05) -> Dict[str, Any]:
+    """Time ``operation`` as timeit does: calibrated loop count, GC off, per-operation seconds"""
+    operation()  # warm-up, also fills lazy caches (compiled regexes, pydantic validators)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        if time.perf_counter() - started >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(loops):
+                operation()
+            samples.append((time.perf_counter() - started) / (loops * ops))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "ops": ops,
+        "loops": loops,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "samples": samples,
+    }
+
+
+def run_benchmarks(names: Optional[Iterable[str]] = None, sizes: Optional[List[int]] = None,
+                   repeats: int = 20, min_time: float = 0.05) -> Dict[str, Any]:
+    results = {}
+    for name, (setup, default_sizes) in CASES.items():
+        if names is not None and name not in names:
+            continue
+        for size in sizes or default_sizes:
+            operation, ops = setup(size)
+            results[f"{name}[{size}]"] = {"case": name, "size": size,
+                                           **measure(operation, ops, repeats, min_time)}
+    return {
+        "generated_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"repeats": repeats, "min_time": min_time},
+        "results": results,
+    }
+
+
+def compare_results(report: Dict[str, Any], baseline: Dict[str, Any],
+                    alpha: float = 0.01, min_change: float = 0.05) -> List[str]:
+    """Return human readable, statistically significant regressions of ``report`` against ``baseline``"""
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        current = report.get("results", {}).get(key)
+        if not current or not base.get("samples"):
+            continue
+        change = current["mean"] / base["mean"] - 1.0
+        if change <= min_change:
+            continue
+        t, df, p = welch_test(current["samples"], base["samples"])
+        if p < alpha:
+            regressions.append(
+                f"{key}: {current['mean'] * 1e6:.3f}us/op vs baseline {base['mean'] * 1e6:.3f}us/op "
+                f"(+{change:.1%}, t={t:.2f}, p={p:.2g})"
+            )
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'case':48} {'mean us/op':>12} {'stdev':>9} {'min':>10}"]
+    for key, result in report["results"].items():
+        lines.append(f"{key:48} {result['mean'] * 1e6:12.3f} {result['stdev'] * 1e6:9.3f} "
+                     f"{result['min'] * 1e6:10.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", action="append", default=None,
+                        help="only run cases whose name contains this (repeatable)")
+    parser.add_argument("--sizes", default=None, help="comma separated sizes overriding each case's defaults")
+    parser.add_argument("--repeats", type=int, default=20, help="timed samples per case")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", default=None, help="baseline report to compare against")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--min-change", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    # Measure the code, not the log sinks (ErrorHandler and time_function log every call)
+    logging.disable(logging.CRITICAL)
+    names = None
+    if args.filter:
+        names = [name for name in CASES if any(pattern in name for pattern in args.filter)]
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else None
+    report = run_benchmarks(names, sizes, args.repeats, args.min_time)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+    print(f"-> {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("platform"), baseline.get("python")) != (report["platform"], report["python"]):
+            print(f"WARNING baseline was taken on {baseline.get('platform')} / Python {baseline.get('python')}; "
+                  f"timings from another machine are not comparable")
+        regressions = compare_results(report, baseline, args.alpha, args.min_change)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import random
+
+import pytest
+
+from bench_cases import CASES
+from run_bench import compare_results, run_benchmarks, t_sf, welch_test
+
+
+def test_t_distribution_tail():
+    assert t_sf(2.0, 10) == pytest.approx(0.036694, abs=1e-5)
+    assert t_sf(0.0, 4) == pytest.approx(0.5)
+    assert t_sf(-1.0, 5) == pytest.approx(1 - t_sf(1.0, 5))
+    # Large df approaches the normal tail
+    assert t_sf(1.96, 10_000) == pytest.approx(0.025, abs=5e-4)
+
+
+def test_welch_test_separates_shift_from_noise():
+    rng = random.Random(7)
+    baseline = [1.0 + rng.gauss(0, 0.02) for _ in range(20)]
+    same = [1.0 + rng.gauss(0, 0.02) for _ in range(20)]
+    slower = [1.1 + rng.gauss(0, 0.02) for _ in range(20)]
+
+    assert welch_test(slower, baseline)[2] < 1e-6
+    assert welch_test(same, baseline)[2] > 0.01
+
+
+def _report(key, samples):
+    return {"results": {key: {"mean": sum(samples) / len(samples), "samples": samples}}}
+
+
+def test_compare_needs_both_significance_and_size():
+    rng = random.Random(3)
+    baseline = _report("cache.get[1000]", [1e-6 * (1 + rng.gauss(0, 0.01)) for _ in range(20)])
+    slow = _report("cache.get[1000]", [1.2e-6 * (1 + rng.gauss(0, 0.01)) for _ in range(20)])
+    # Consistent, but below --min-change
+    slightly_slow = _report("cache.get[1000]", [1.02e-6 * (1 + rng.gauss(0, 0.001)) for _ in range(20)])
+    # Large mean change driven by one outlier
+    noisy = _report("cache.get[1000]", [1e-6] * 19 + [5e-6])
+
+    regressions = compare_results(slow, baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("cache.get[1000]")
+    assert compare_results(slightly_slow, baseline) == []
+    assert compare_results(noisy, baseline) == []
+    assert compare_results(baseline, slow) == []
+
+
+def test_every_case_runs():
+    """Each case at a small size with minimal sampling"""
+    logging.disable(logging.CRITICAL)
+    try:
+        report = run_benchmarks(sizes=[50], repeats=2, min_time=0.0)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert set(report["results"]) == {f"{name}[50]" for name in CASES}
+    for result in report["results"].values():
+        assert len(result["samples"]) == 2
+        assert result["mean"] > 0
+
+
+def test_committed_baseline_covers_every_case():
+    with open(os.path.join(os.path.dirname(__file__), "baseline.json")) as f:
+        baseline = json.load(f)
+    assert {result["case"] for result in baseline["results"].values()} == set(CASES)
+    assert all(len(result["samples"]) > 1 for result in baseline["results"].values())
@@ -0,0 +1,14 @@
+import pytest
+
+import database
+from database_sqlite import SQLiteDatabaseManager
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Route get_db() to a throwaway SQLite database for the duration of a test"""
+    saved = database.db
+    database.db = SQLiteDatabaseManager(str(tmp_path / "objects.db"), read_pool_size=2)
+    yield database.db
+    database.db.close()
+    database.db = saved
@@ -0,0 +1,151 @@
+"""In-process stand-in for the Memories.ai endpoints used by the backend.
+
+Serves /video/searchAI, /video/chat and /video/upload with a configurable
+latency distribution and error rate so load tests see realistic upstream
+behaviour without network access or an API key.
+"""
+from aiohttp import web
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import asyncio
+import random
+import time
+
+API_PREFIX = "/api/serve"
+
+LOCATIONS = [
+    "on the kitchen counter next to the coffee maker",
+    "on the wooden desk beside the computer monitor",
+    "on the bedside nightstand next to the reading lamp",
+    "on the dining room table near the fruit bowl",
+    "on the living room coffee table next to the remote control",
+]
+
+
+@dataclass
+class LatencyModel:
+    """Latency distribution in seconds.
+
+    Specs look like ``constant:0.05``, ``uniform:0.01,0.2`` or
+    ``lognormal:0.15,0.6`` (median, sigma).
+    """
+    kind: str = "constant"
+    params: tuple = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(p) for p in raw.split(",") if p) or (0.0,)
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        return cls(kind=kind, params=params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            low, high = self.params[0], self.params[1]
+            return rng.uniform(low, high)
+        if self.kind == "lognormal":
+            median, sigma = self.params[0], self.params[1]
+            return median * rng.lognormvariate(0.0, sigma)
+        return self.params[0]
+
+
+@dataclass
+class EndpointBehaviour:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+
+
+class MemoriesStub:
+    """aiohttp application mimicking the Memories.ai serve API"""
+
+    def __init__(self, behaviours: Optional[Dict[str, EndpointBehaviour]] = None, seed: int = 0,
+                 processing_latency: Optional[LatencyModel] = None):
+        self.behaviours = behaviours or {}
+        # When set, a processing-complete callback is sent after each upload
+        self.webhook_sender = None
+        self.processing_latency = processing_latency or LatencyModel()
+        self._callbacks = set()
+        self.rng = random.Random(seed)
+        self.calls = {"search": 0, "chat": 0, "upload": 0}
+        self.errors = {"search": 0, "chat": 0, "upload": 0}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = None
+
+    def _behaviour(self, endpoint: str) -> EndpointBehaviour:
+        return self.behaviours.get(endpoint, EndpointBehaviour())
+
+    async def _simulate(self, endpoint: str) -> Optional[web.Response]:
+        """Sleep for a sampled latency and maybe return an injected error"""
+        self.calls[endpoint] += 1
+        behaviour = self._behaviour(endpoint)
+        await asyncio.sleep(behaviour.latency.sample(self.rng))
+        if self.rng.random() < behaviour.error_rate:
+            self.errors[endpoint] += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+        return None
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        error = await self._simulate("search")
+        if error:
+            return error
+        payload = await request.json()
+        limit = int(payload.get("limit", 5))
+        now_ms = int(time.time() * 1000)
+        results = [
+            {
+                "videoNo": f"stub_video_{self.rng.randint(1, 50)}",
+                "timestamp": now_ms - self.rng.randint(0, 86_400_000),
+                "score": round(self.rng.uniform(0.5, 0.99), 3),
+                "snippet": f"{payload.get('query', '')} {self.rng.choice(LOCATIONS)}",
+            }
+            for _ in range(min(limit, 3))
+        ]
+        return web.json_response(results)
+
+    async def handle_chat(self, request: web.Request) -> web.Response:
+        error = await self._simulate("chat")
+        if error:
+            return error
+        await request.json()
+        return web.json_response({"response": self.rng.choice(LOCATIONS)})
+
+    async def handle_upload(self, request: web.Request) -> web.Response:
+        error = await self._simulate("upload")
+        if error:
+            return error
+        await request.post()
+        video_no = f"stub_upload_{self.calls['upload']}"
+        if self.webhook_sender:
+            task = asyncio.get_running_loop().create_task(self._send_callback(video_no))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+        return web.json_response({"videoNo": video_no, "status": "processing"})
+
+    async def _send_callback(self, video_no: str):
+        await asyncio.sleep(self.processing_latency.sample(self.rng))
+        await self.webhook_sender.send(video_no, "completed")
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post(f"{API_PREFIX}/video/searchAI", self.handle_search)
+        app.router.add_post(f"{API_PREFIX}/video/chat", self.handle_chat)
+        app.router.add_post(f"{API_PREFIX}/video/upload", self.handle_upload)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL to hand to MemoriesAPIClient"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}{API_PREFIX}"
+        return self.base_url
+
+    async def stop(self):
+        for task in list(self._callbacks):
+            task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,303 @@
+"""End-to-end load generator for the Object Finder API.
+
+Runs the FastAPI app in-process against local stand-ins (``memories_stub``
+for Memories.ai and ``sqlite_stub`` for Supabase), drives /api/search,
+/api/objects and /api/upload at a target concurrency and writes throughput
+and p50/p95/p99 latencies to a JSON report.
+
+Usage (from the backend directory):
+
+    python tests/load/run_load.py --concurrency 32 --duration 20 --output load_report.json
+    python tests/load/run_load.py --output load_report.json --baseline load_baseline.json
+
+With ``--baseline`` the run exits non-zero when p95/p99 latency or throughput
+regress by more than ``--max-regression`` (a fraction, default 0.2).
+"""
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(os.path.dirname(HERE))
+for path in (BACKEND_DIR, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import httpx
+
+from memories_stub import MemoriesStub, EndpointBehaviour, LatencyModel
+
+OBJECT_NAMES = ["keys", "wallet", "phone", "glasses", "airpods", "remote", "charger", "watch"]
+
+# Smallest payload that looks like an MP4 container (ftyp box)
+FAKE_MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+@dataclass
+class LoadConfig:
+    concurrency: int = 16
+    duration: float = 10.0
+    max_requests: Optional[int] = None
+    mix: Dict[str, int] = field(default_factory=lambda: {"search": 6, "objects": 3, "upload": 1})
+    objects: int = 200
+    search_latency: str = "lognormal:0.15,0.5"
+    chat_latency: str = "lognormal:0.4,0.5"
+    upload_latency: str = "lognormal:0.8,0.4"
+    error_rate: float = 0.0
+    db_latency: str = "lognormal:0.02,0.3"
+    processing_latency: str = "uniform:1,3"
+    upload_bytes: int = 256 * 1024
+    seed: int = 42
+    target_url: Optional[str] = None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput_rps": count / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": (ordered[-1] * 1000) if ordered else 0.0,
+    }
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any],
+                    max_regression: float = 0.2) -> List[str]:
+    """Return human readable regressions of ``report`` against ``baseline``"""
+    regressions = []
+    sections = {"total": (report.get("total", {}), baseline.get("total", {}))}
+    for name, stats in baseline.get("endpoints", {}).items():
+        sections[name] = (report.get("endpoints", {}).get(name, {}), stats)
+
+    for name, (current, base) in sections.items():
+        if not current or not base:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base.get(key) and current.get(key, 0) > base[key] * (1 + max_regression):
+                regressions.append(
+                    f"{name}.{key}: {current[key]:.1f}ms vs baseline {base[key]:.1f}ms"
+                )
+        base_rps = base.get("throughput_rps")
+        if base_rps and current.get("throughput_rps", 0) < base_rps * (1 - max_regression):
+            regressions.append(
+                f"{name}.throughput_rps: {current['throughput_rps']:.1f} vs baseline {base_rps:.1f}"
+            )
+    return regressions
+
+
+class LoadGenerator:
+    def __init__(self, config: LoadConfig, client: httpx.AsyncClient, object_names: List[str]):
+        self.config = config
+        self.client = client
+        self.object_names = object_names
+        self.rng = random.Random(config.seed)
+        self.latencies: Dict[str, List[float]] = {name: [] for name in config.mix}
+        self.errors: Dict[str, int] = {name: 0 for name in config.mix}
+        self.issued = 0
+        self.upload_body = FAKE_MP4_HEADER + b"\x00" * max(0, config.upload_bytes - len(FAKE_MP4_HEADER))
+
+    def _pick_operation(self) -> str:
+        names = list(self.config.mix)
+        weights = [self.config.mix[name] for name in names]
+        return self.rng.choices(names, weights=weights)[0]
+
+    async def _request(self, operation: str) -> httpx.Response:
+        if operation == "search":
+            name = self.rng.choice(self.object_names)
+            return await self.client.post("/api/search/", json={"query": f"Where are my {name}?"})
+        if operation == "objects":
+            return await self.client.get("/api/objects/")
+        if operation == "upload":
+            files = {"file": ("clip.mp4", self.upload_body, "video/mp4")}
+            return await self.client.post("/api/upload", files=files)
+        raise ValueError(f"Unknown operation '{operation}'")
+
+    async def _worker(self, deadline: float):
+        while time.perf_counter() < deadline:
+            if self.config.max_requests is not None and self.issued >= self.config.max_requests:
+                return
+            self.issued += 1
+            operation = self._pick_operation()
+            start = time.perf_counter()
+            try:
+                response = await self._request(operation)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            self.latencies[operation].append(time.perf_counter() - start)
+            if failed:
+                self.errors[operation] += 1
+
+    async def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        deadline = start + self.config.duration
+        await asyncio.gather(*(self._worker(deadline) for _ in range(self.config.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            "elapsed_s": elapsed,
+            "total": summarize(all_latencies, sum(self.errors.values()), elapsed),
+            "endpoints": {
+                name: summarize(self.latencies[name], self.errors[name], elapsed)
+                for name in self.config.mix
+            },
+        }
+
+
+async def run_load(config: LoadConfig) -> Dict[str, Any]:
+    """Run one load test and return the report dict"""
+    rng = random.Random(config.seed)
+    object_names = [f"{rng.choice(OBJECT_NAMES)}{i}" for i in range(config.objects)]
+    stub = None
+
+    if config.target_url:
+        client = httpx.AsyncClient(base_url=config.target_url, timeout=300)
+    else:
+        # Keep the app's file logging and per-call log lines out of the measurement
+        logging.basicConfig(level=logging.WARNING)
+
+        from main import app
+        from services.memories_api import memories_api
+        import database
+        from sqlite_stub import SQLiteStubDatabase
+
+        stub = MemoriesStub({
+            "search": EndpointBehaviour(LatencyModel.parse(config.search_latency), config.error_rate),
+            "chat": EndpointBehaviour(LatencyModel.parse(config.chat_latency), config.error_rate),
+            "upload": EndpointBehaviour(LatencyModel.parse(config.upload_latency), config.error_rate),
+        }, seed=config.seed)
+        memories_api.base_url = await stub.start()
+        memories_api.api_key = "load-test"
+
+        stub_db = SQLiteStubDatabase(LatencyModel.parse(config.db_latency), seed=config.seed)
+        stub_db.seed_objects(object_names)
+        database.db = stub_db
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=300,
+        )
+
+        from webhook_sender import WebhookSender
+        os.environ.setdefault("MEMORIES_WEBHOOK_SECRET", "load-test-secret")
+        stub.webhook_sender = WebhookSender(client, os.environ["MEMORIES_WEBHOOK_SECRET"])
+        stub.processing_latency = LatencyModel.parse(config.processing_latency)
+
+    try:
+        generator = LoadGenerator(config, client, object_names)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = await generator.run()
+    finally:
+        if stub:
+            from services.location_buffer import location_buffer
+            await stub.stop()
+            await location_buffer.stop()
+        await client.aclose()
+
+    results["config"] = asdict(config)
+    results["generated_at"] = time.time()
+    if stub:
+        results["upstream_calls"] = dict(stub.calls)
+        results["upstream_errors"] = dict(stub.errors)
+        results["webhooks_sent"] = stub.webhook_sender.sent
+        results["db_location_writes"] = location_buffer.get_stats()
+    return results
+
+
+def parse_mix(raw: str) -> Dict[str, int]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="seconds to run")
+    parser.add_argument("--max-requests", type=int, default=None)
+    parser.add_argument("--mix", default="search=6,objects=3,upload=1",
+                        help="weighted operation mix, e.g. search=6,objects=3,upload=1")
+    parser.add_argument("--objects", type=int, default=defaults.objects, help="tracked objects to seed")
+    parser.add_argument("--search-latency", default=defaults.search_latency)
+    parser.add_argument("--chat-latency", default=defaults.chat_latency)
+    parser.add_argument("--upload-latency", default=defaults.upload_latency)
+    parser.add_argument("--db-latency", default=defaults.db_latency)
+    parser.add_argument("--processing-latency", default=defaults.processing_latency,
+                        help="delay before the stub sends the processing-complete webhook")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--upload-bytes", type=int, default=defaults.upload_bytes)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--target-url", default=None,
+                        help="drive an already running server instead of the in-process app")
+    parser.add_argument("--output", default="load_report.json")
+    parser.add_argument("--baseline", default=None, help="baseline report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        concurrency=args.concurrency,
+        duration=args.duration,
+        max_requests=args.max_requests,
+        mix=parse_mix(args.mix),
+        objects=args.objects,
+        search_latency=args.search_latency,
+        chat_latency=args.chat_latency,
+        upload_latency=args.upload_latency,
+        error_rate=args.error_rate,
+        db_latency=args.db_latency,
+        processing_latency=args.processing_latency,
+        upload_bytes=args.upload_bytes,
+        seed=args.seed,
+        target_url=args.target_url,
+    )
+    report = asyncio.run(run_load(config))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    total = report["total"]
+    print(f"{total['requests']} requests, {total['throughput_rps']:.1f} req/s, "
+          f"p50 {total['p50_ms']:.1f}ms p95 {total['p95_ms']:.1f}ms p99 {total['p99_ms']:.1f}ms "
+          f"-> {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Latency-injecting wrapper around the embedded SQLite backend.
+
+``SQLiteDatabaseManager`` answers in microseconds; the optional latency model
+emulates the Supabase round-trip so both deployments can be load tested
+without outside services.
+"""
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import random
+
+from database_sqlite import SQLiteDatabaseManager
+from memories_stub import LatencyModel
+
+
+class SQLiteStubDatabase(SQLiteDatabaseManager):
+    def __init__(self, latency: Optional[LatencyModel] = None, seed: int = 0, path: str = ":memory:"):
+        super().__init__(path)
+        self.latency = latency or LatencyModel()
+        self.rng = random.Random(seed)
+
+    async def _round_trip(self):
+        delay = self.latency.sample(self.rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def seed_objects(self, names: List[str]):
+        now = datetime.now().isoformat()
+        with self._writer_cursor() as conn:
+            conn.executemany(
+                "INSERT INTO tracked_objects (name, alias, created_at) VALUES (?, ?, ?)",
+                [(name, f"{name} alias", now) for name in names]
+            )
+
+    async def create_tracked_object(self, obj):
+        await self._round_trip()
+        return await super().create_tracked_object(obj)
+
+    async def upsert_tracked_objects(self, objects, update_existing=False):
+        await self._round_trip()
+        return await super().upsert_tracked_objects(objects, update_existing=update_existing)
+
+    async def get_tracked_objects(self):
+        await self._round_trip()
+        return await super().get_tracked_objects()
+
+    async def iter_tracked_objects(self, batch_size=500):
+        # One round trip per page, as the Supabase backend requests them
+        await self._round_trip()
+        streamed = 0
+        async for row in super().iter_tracked_objects(batch_size):
+            yield row
+            streamed += 1
+            if streamed % batch_size == 0:
+                await self._round_trip()
+
+    async def find_matching_objects(self, query):
+        await self._round_trip()
+        return await super().find_matching_objects(query)
+
+    async def update_object_location(self, *args, **kwargs):
+        await self._round_trip()
+        return await super().update_object_location(*args, **kwargs)
+
+    async def bulk_update_object_locations(self, updates):
+        await self._round_trip()
+        return await super().bulk_update_object_locations(updates)
+
+    async def delete_tracked_object(self, object_id):
+        await self._round_trip()
+        return await super().delete_tracked_object(object_id)
+
+    async def ping(self):
+        await self._round_trip()
+        return await super().ping()
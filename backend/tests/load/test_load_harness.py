@@ -0,0 +1,90 @@
+import asyncio
+import random
+
+import pytest
+
+from memories_stub import LatencyModel
+from run_load import LoadConfig, compare_reports, percentile, run_load
+
+
+def test_latency_model_parse():
+    rng = random.Random(1)
+    assert LatencyModel.parse("constant:0.05").sample(rng) == 0.05
+    sample = LatencyModel.parse("uniform:0.01,0.02").sample(rng)
+    assert 0.01 <= sample <= 0.02
+    with pytest.raises(ValueError):
+        LatencyModel.parse("pareto:1")
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_reports_flags_regressions():
+    baseline = {"total": {"p95_ms": 100, "p99_ms": 200, "throughput_rps": 50}, "endpoints": {}}
+    ok = {"total": {"p95_ms": 110, "p99_ms": 210, "throughput_rps": 48}, "endpoints": {}}
+    slow = {"total": {"p95_ms": 150, "p99_ms": 200, "throughput_rps": 30}, "endpoints": {}}
+
+    assert compare_reports(ok, baseline, 0.2) == []
+    regressions = compare_reports(slow, baseline, 0.2)
+    assert any("p95_ms" in r for r in regressions)
+    assert any("throughput_rps" in r for r in regressions)
+
+
+def test_run_load_smoke():
+    """Short in-process run against the local stand-ins"""
+    import database
+    from services.memories_api import memories_api
+
+    saved = (database.db, memories_api.base_url, memories_api.api_key)
+    config = LoadConfig(
+        concurrency=4,
+        duration=0.5,
+        objects=10,
+        search_latency="constant:0.001",
+        chat_latency="constant:0.001",
+        upload_latency="constant:0.001",
+        db_latency="constant:0",
+        upload_bytes=1024,
+    )
+    try:
+        report = asyncio.run(run_load(config))
+    finally:
+        database.db, memories_api.base_url, memories_api.api_key = saved
+
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    for name in ("search", "objects", "upload"):
+        stats = report["endpoints"][name]
+        assert {"throughput_rps", "p50_ms", "p95_ms", "p99_ms"} <= set(stats)
+    assert report["upstream_calls"]["search"] > 0
+
+
+def test_sqlite_stub_charges_every_query_a_round_trip():
+    from models import TrackedObjectCreate
+    from sqlite_stub import SQLiteStubDatabase
+
+    db = SQLiteStubDatabase(LatencyModel.parse("constant:0"))
+    db.seed_objects([f"object {i}" for i in range(5)])
+    trips = []
+
+    async def round_trip():
+        trips.append(1)
+
+    db._round_trip = round_trip
+
+    async def scenario():
+        rows = [row async for row in db.iter_tracked_objects(batch_size=2)]
+        await db.upsert_tracked_objects([TrackedObjectCreate(name="lamp", alias="desk lamp")])
+        await db.ping()
+        return rows
+
+    try:
+        assert len(asyncio.run(scenario())) == 5
+    finally:
+        db.close()
+    # Three pages of the export, the upsert and the ping
+    assert len(trips) == 5
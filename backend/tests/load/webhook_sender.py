@@ -0,0 +1,34 @@
+"""Local stand-in for Memories.ai processing callbacks.
+
+Signs payloads exactly like the real sender is expected to and posts them to
+/api/webhooks/memories through any httpx client (in-process ASGI or real URL).
+"""
+from typing import Optional
+import json
+import time
+
+import httpx
+
+from routers.webhooks import sign_payload, SIGNATURE_HEADER, TIMESTAMP_HEADER
+
+
+class WebhookSender:
+    def __init__(self, client: httpx.AsyncClient, secret: str, path: str = "/api/webhooks/memories"):
+        self.client = client
+        self.secret = secret
+        self.path = path
+        self.sent = 0
+
+    async def send(self, video_no: str, status: str = "completed",
+                   error: Optional[str] = None) -> httpx.Response:
+        payload = {"videoNo": video_no, "status": status}
+        if error:
+            payload["error"] = error
+        body = json.dumps(payload).encode()
+        timestamp = str(int(time.time()))
+        self.sent += 1
+        return await self.client.post(self.path, content=body, headers={
+            "Content-Type": "application/json",
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: sign_payload(self.secret, timestamp, body),
+        })
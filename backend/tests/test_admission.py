@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from utils.admission import AdmissionController, AdmissionMiddleware, CHEAP, EXPENSIVE, STREAM, classify_request
+
+
+def make_app(controller):
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.post("/api/search/")
+    async def search():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/api/objects/")
+    async def objects():
+        return []
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app, release
+
+
+def test_classify_request():
+    assert classify_request("GET", "/health") == "health"
+    assert classify_request("POST", "/api/search/") == EXPENSIVE
+    assert classify_request("POST", "/api/upload/video") == EXPENSIVE
+    assert classify_request("GET", "/api/upload/status/abc") == CHEAP
+    assert classify_request("GET", "/api/objects/") == CHEAP
+    assert classify_request("GET", "/api/admin/metrics/stream") == STREAM
+    assert classify_request("GET", "/api/objects/export") == STREAM
+    assert classify_request("POST", "/api/objects/bulk") == STREAM
+
+
+def test_streams_have_their_own_slots_and_stay_out_of_latency_estimates():
+    controller = AdmissionController({CHEAP: (4, 4, 5.0), STREAM: (1, 0, 5.0)})
+    stream, cheap = controller.classes[STREAM], controller.classes[CHEAP]
+
+    async def scenario():
+        await controller.acquire(stream)
+        # The stream slot is taken, but cheap reads are untouched
+        await controller.acquire(cheap)
+        cheap.release(0.01)
+        try:
+            await controller.acquire(stream)
+        except Exception as e:
+            shed = e
+        # A metrics stream held open for ten minutes
+        stream.release(600.0)
+        return shed
+
+    assert asyncio.run(scenario()).route_class == STREAM
+    assert stream.ewma_latency == 0.0 and not stream.latencies
+    assert cheap.ewma_latency == 0.01 and cheap.expected_wait(0) < 0.01
+
+
+def test_sheds_expensive_requests_but_keeps_cheap_and_health_available():
+    controller = AdmissionController({EXPENSIVE: (2, 1, 5.0), CHEAP: (4, 4, 5.0)})
+    app, release = make_app(controller)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            held = [asyncio.create_task(client.post("/api/search/")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+
+            shed = await client.post("/api/search/")
+            cheap = await client.get("/api/objects/")
+            health = await client.get("/health")
+            stats = controller.get_stats()
+
+            release.set()
+            completed = await asyncio.gather(*held)
+            return shed, cheap, health, stats, completed
+
+    shed, cheap, health, stats, completed = asyncio.run(scenario())
+
+    assert shed.status_code == 503
+    assert int(shed.headers["Retry-After"]) >= 1
+    assert shed.json()["status_code"] == 503
+    assert cheap.status_code == 200
+    assert health.status_code == 200
+    assert [r.status_code for r in completed] == [200, 200, 200]
+
+    expensive = stats["classes"][EXPENSIVE]
+    assert expensive["in_flight"] == 2
+    assert expensive["queue_depth"] == 1
+    assert expensive["shed_queue_full"] == 1
+    assert stats["health_requests"] == 1
+    assert controller.classes[EXPENSIVE].in_flight == 0
+
+
+def test_sheds_when_predicted_queue_wait_is_too_long():
+    controller = AdmissionController({EXPENSIVE: (1, 10, 0.5)})
+    app, release = make_app(controller)
+    # Recent requests took ~2s each, so a queued request would wait longer than 0.5s
+    controller.classes[EXPENSIVE].ewma_latency = 2.0
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/api/search/"))
+            await asyncio.sleep(0.05)
+            shed = await client.post("/api/search/")
+            release.set()
+            await first
+            return shed
+
+    shed = asyncio.run(scenario())
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+    assert controller.classes[EXPENSIVE].stats["shed_wait"] == 1
@@ -0,0 +1,138 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import routers.search
+from main import app
+from services.memories_api import memories_api
+from services.prewarm import prewarmer
+from utils.performance import StaleWhileRevalidateCache
+from utils.tenancy import household_scope
+
+client = TestClient(app)
+
+
+def _expire(cache, key, soft=True, hard=False):
+    entry = cache.entries.shard().cache[key]
+    if soft:
+        entry["soft_expires"] = 0
+    if hard:
+        entry["hard_expires"] = 0
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    cache = StaleWhileRevalidateCache(soft_ttl=60, hard_ttl=600, jitter=0)
+    calls = []
+
+    async def compute(refresh):
+        calls.append(refresh)
+        await asyncio.sleep(0.01)
+        return f"answer {len(calls)}"
+
+    async def scenario():
+        first = await cache.get_or_compute("keys", compute)
+        fresh = await cache.get_or_compute("keys", compute)
+        _expire(cache, "keys")
+        stale = await asyncio.gather(*(cache.get_or_compute("keys", compute) for _ in range(3)))
+        await asyncio.gather(*cache._tasks)
+        refreshed = await cache.get_or_compute("keys", compute)
+        _expire(cache, "keys", hard=True)
+        blocked = await cache.get_or_compute("keys", compute)
+        return first, fresh, stale, refreshed, blocked
+
+    first, fresh, stale, refreshed, blocked = asyncio.run(scenario())
+    assert first == ("answer 1", 0.0, False)
+    assert fresh[0] == "answer 1" and fresh[2] is False
+    assert [(value, is_stale) for value, _, is_stale in stale] == [("answer 1", True)] * 3
+    # Three stale reads, one background refresh
+    assert calls[:2] == [False, True]
+    assert refreshed[0] == "answer 2" and refreshed[2] is False
+    assert blocked == ("answer 3", 0.0, False) and calls[2] is False
+    assert cache.stats["refreshes"] == 1 and cache.stats["stale_hits"] == 3
+
+
+def test_concurrent_misses_share_one_compute():
+    cache = StaleWhileRevalidateCache(soft_ttl=60, hard_ttl=600, jitter=0)
+    calls = []
+
+    async def compute(refresh):
+        calls.append(refresh)
+        await asyncio.sleep(0.02)
+        return f"answer {len(calls)}"
+
+    async def scenario():
+        cold = await asyncio.gather(*(cache.get_or_compute("keys", compute) for _ in range(5)))
+        _expire(cache, "keys", hard=True)
+        expired = await asyncio.gather(*(cache.get_or_compute("keys", compute) for _ in range(5)))
+        return cold, expired
+
+    cold, expired = asyncio.run(scenario())
+    assert cold == [("answer 1", 0.0, False)] * 5 and expired == [("answer 2", 0.0, False)] * 5
+    assert calls == [False, False]
+    assert cache.stats["misses"] == 2 and cache.stats["joined"] == 8
+
+
+def test_waiters_compute_themselves_when_the_first_caller_is_cancelled():
+    cache = StaleWhileRevalidateCache(soft_ttl=60, hard_ttl=600, jitter=0)
+    calls = []
+
+    async def compute(refresh):
+        calls.append(refresh)
+        await asyncio.sleep(0.05)
+        return f"answer {len(calls)}"
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_compute("keys", compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_compute("keys", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await waiter
+
+    assert asyncio.run(scenario()) == ("answer 2", 0.0, False)
+    assert len(calls) == 2 and not cache._flights
+
+
+def test_ttls_are_jittered_per_entry():
+    cache = StaleWhileRevalidateCache(soft_ttl=100, hard_ttl=1000, jitter=0.2)
+    for i in range(50):
+        cache.set(f"k{i}", i)
+    entries = list(cache.entries.shard().cache.values())
+    soft = [entry["soft_expires"] - entry["stored_at"] for entry in entries]
+    hard = [entry["hard_expires"] - entry["stored_at"] for entry in entries]
+
+    assert all(80 <= ttl <= 120 for ttl in soft) and all(800 <= ttl <= 1200 for ttl in hard)
+    assert len({round(ttl, 3) for ttl in soft}) > 40
+
+
+def test_search_answers_carry_age_and_staleness(sqlite_db, monkeypatch):
+    cache = StaleWhileRevalidateCache(soft_ttl=300, hard_ttl=3600)
+    refreshes = []
+    monkeypatch.setattr(routers.search, "answer_cache", cache)
+    monkeypatch.setattr(cache, "_refresh", lambda key, compute, cache_if: refreshes.append(key))
+    monkeypatch.setattr(prewarmer, "precomputed", {})
+    chat_calls = []
+
+    async def search_videos(query, limit=5):
+        return [{"videoNo": "vid_u1", "score": 0.9}]
+
+    async def chat_with_video(video_no, query):
+        chat_calls.append(video_no)
+        return {"response": "On the umbrella stand by the door."}
+
+    monkeypatch.setattr(memories_api, "search_videos", search_videos)
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+    client.post("/api/objects/", json={"name": "umbrella", "alias": "black folding umbrella"})
+
+    first = client.post("/api/search/", json={"query": "Where is my umbrella?"}).json()
+    # A different phrasing resolving to the same object shares the answer
+    second = client.post("/api/search/", json={"query": "find the black umbrella"}).json()
+    assert (first["age"], first["stale"]) == (0.0, False)
+    assert second["location"] == first["location"] and second["stale"] is False
+    assert chat_calls == ["vid_u1"]
+
+    with household_scope("default"):
+        assert cache.mark_stale(lambda key, answer: True) == 1
+    stale = client.post("/api/search/", json={"query": "Where is my umbrella?"}).json()
+    assert stale["stale"] is True and stale["location"] == first["location"]
+    assert len(refreshes) == 1 and chat_calls == ["vid_u1"]
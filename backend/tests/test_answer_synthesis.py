@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from main import app
+from models import TrackedObject
+from services.answer_synthesis import AnswerSynthesizer
+from services.location_buffer import location_buffer
+from services.memories_api import memories_api
+
+client = TestClient(app)
+
+KEYS = TrackedObject(id=7, name="keys", alias="car keys, keychain", created_at=datetime(2024, 1, 1))
+
+
+def test_extracts_located_sentence_naming_the_object():
+    synthesizer = AnswerSynthesizer()
+    hit = {"videoNo": "v1", "snippet": "A person walks into the hallway. The keys are on the shelf next to the door."}
+
+    assert synthesizer.answer(hit, KEYS) == ("The keys are on the shelf next to the door.", 0.85)
+
+
+def test_needs_chat_when_snippet_does_not_place_the_object():
+    synthesizer = AnswerSynthesizer()
+
+    assert synthesizer.answer({"snippet": "Keys visible in frame."}, KEYS) is None
+    assert synthesizer.answer({"snippet": "I can't see any keys in this clip."}, KEYS) is None
+    # Located, but not the object we asked about
+    assert synthesizer.answer({"description": "A mug is on the table by the window."}, KEYS) is None
+    assert AnswerSynthesizer(enabled=False).answer(
+        {"snippet": "The keys are on the shelf next to the door."}, KEYS) is None
+
+
+def test_refinement_replaces_stored_phrase(monkeypatch):
+    synthesizer = AnswerSynthesizer()
+
+    async def chat_with_video(video_no, query):
+        return {"response": "On the oak shelf beside the front door, under the mail."}
+
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+    monkeypatch.setattr(location_buffer, "_ensure_running", lambda: None)
+    monkeypatch.setattr(location_buffer, "pending", {})
+    location_buffer.enqueue(KEYS, "v1", "The keys are on the shelf.", 0.9, timestamp=1000)
+
+    assert asyncio.run(synthesizer.refine_location(KEYS, "v1", "where?", 1000, 0.9))
+    assert location_buffer.pending[KEYS.id]["location_phrase"].startswith("On the oak shelf")
+    assert synthesizer.stats["refined"] == 1
+
+
+def test_search_skips_chat_when_snippet_answers(sqlite_db, monkeypatch):
+    client.post("/api/objects/", json={"name": "passport", "alias": "travel documents"})
+    chat_calls = []
+
+    async def search_videos(query, limit=5):
+        return [{"videoNo": "vid_s1", "score": 0.9,
+                 "snippet": "The passport is in the top drawer of the desk."}]
+
+    async def chat_with_video(video_no, query):
+        chat_calls.append(video_no)
+        return {"response": "Inside the top desk drawer."}
+
+    monkeypatch.setattr(memories_api, "search_videos", search_videos)
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+    response = client.post("/api/search/", json={"query": "Where is my passport?"})
+
+    assert response.status_code == 200
+    assert response.json()["location"] == "The passport is in the top drawer of the desk."
+    # No timestamp on the hit, so nothing is stored and there is nothing to refine
+    assert chat_calls == []
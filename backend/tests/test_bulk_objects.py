@@ -0,0 +1,67 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+class TestBulkImport:
+    def test_json_array_reports_status_per_item(self, sqlite_db):
+        client.post("/api/objects/", json={"name": "keys", "alias": "car keys"})
+        payload = [
+            {"name": "wallet", "alias": "leather wallet"},
+            {"name": "Keys", "alias": "house keys"},
+            {"name": "wallet", "alias": "second wallet"},
+            {"name": "", "alias": "missing name"},
+            "not an object",
+        ]
+
+        response = client.post("/api/objects/bulk", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+
+        statuses = [result["status"] for result in data["results"]]
+        assert statuses == ["created", "skipped", "duplicate", "invalid", "invalid"]
+        assert data["counts"]["created"] == 1
+        assert {obj["name"] for obj in client.get("/api/objects/").json()} == {"wallet", "keys"}
+
+    def test_ndjson_stream_with_update_on_conflict(self, sqlite_db):
+        client.post("/api/objects/", json={"name": "phone", "alias": "old alias"})
+        body = "\n".join([
+            json.dumps({"name": "phone", "alias": "iPhone, smartphone"}),
+            "{broken json",
+            json.dumps({"name": "remote", "alias": "TV remote"}),
+        ]) + "\n"
+
+        response = client.post(
+            "/api/objects/bulk?on_conflict=update",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        statuses = [result["status"] for result in response.json()["results"]]
+        assert statuses == ["updated", "invalid", "created"]
+
+        phone = client.get("/api/objects/?search=phone").json()[0]
+        assert phone["alias"] == "iPhone, smartphone"
+
+    def test_rejects_non_array_json(self, sqlite_db):
+        response = client.post("/api/objects/bulk", json={"name": "keys"})
+        assert response.status_code == 400
+
+
+class TestExport:
+    def test_export_streams_ndjson(self, sqlite_db):
+        items = [{"name": f"object{i}", "alias": f"alias {i}"} for i in range(1200)]
+        assert client.post("/api/objects/bulk", json=items).status_code == 200
+
+        response = client.get("/api/objects/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 1200
+        assert rows[0]["name"] == "object0"
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database_sqlite import SQLiteDatabaseManager
+from main import app
+from models import TrackedObjectCreate
+from services.change_feed import ChangeFeed, SQLiteChangeFeed, create_change_feed
+from services.object_index import ObjectIndex
+from utils.events import event_bus, OBJECT_CHANGED
+
+client = TestClient(app)
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def __enter__(self):
+        event_bus.subscribe(OBJECT_CHANGED, self)
+        return self
+
+    def __exit__(self, *exc):
+        event_bus.unsubscribe(OBJECT_CHANGED, self)
+
+
+def test_sqlite_feed_sees_writes_from_another_worker(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer, reader = SQLiteDatabaseManager(path), SQLiteDatabaseManager(path)
+    feed = SQLiteChangeFeed(reader)
+
+    async def scenario():
+        feed.cursor = await reader.latest_change_seq()
+        obj = await writer.create_tracked_object(TrackedObjectCreate(name="keys", alias="car keys"))
+        await writer.update_object_location(obj.id, "vid_1", "on the hook", 0.9, 1000)
+        await writer.delete_tracked_object(obj.id)
+        with Recorder() as recorder:
+            assert await feed.poll() == 3
+            assert await feed.poll() == 0
+        return obj, recorder.events
+
+    try:
+        obj, events = asyncio.run(scenario())
+    finally:
+        writer.close()
+        reader.close()
+
+    assert [(e["op"], e["object_id"]) for e in events] == [("insert", obj.id), ("update", obj.id), ("delete", obj.id)]
+    assert all(e["source"] == "sqlite" for e in events)
+    # The row was already gone when the feed read the log
+    assert events[0]["record"] is None and events[2]["record"] is None
+
+
+def test_sqlite_feed_reports_resync_after_pruned_entries(sqlite_db):
+    feed = SQLiteChangeFeed(sqlite_db)
+
+    async def scenario():
+        for name in ("keys", "wallet", "phone"):
+            await sqlite_db.create_tracked_object(TrackedObjectCreate(name=name, alias=name))
+        assert await sqlite_db.prune_changes(keep=1) == 2
+        with Recorder() as recorder:
+            await feed.poll()
+        return recorder.events
+
+    events = asyncio.run(scenario())
+    assert [e["op"] for e in events] == ["resync", "insert"]
+    assert events[1]["record"]["name"] == "phone"
+    assert feed.stats["resyncs"] == 1
+
+
+def test_object_index_is_patched_by_the_feed(sqlite_db):
+    index = ObjectIndex(ttl=3600)
+    index.live = True
+    feed = SQLiteChangeFeed(sqlite_db)
+
+    async def scenario():
+        keys = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="keys", alias="car keys"))
+        feed.cursor = await sqlite_db.latest_change_seq()
+        assert [o.name for o in await index.all()] == ["keys"]
+
+        # Written by "another worker": invisible until the feed delivers it
+        wallet = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="wallet", alias="billfold"))
+        await sqlite_db.update_object_location(keys.id, "vid_1", "on the hook", 0.9, 1000)
+        assert [o.name for o in await index.all()] == ["keys"]
+
+        event_bus.subscribe(OBJECT_CHANGED, index._on_object_changed)
+        try:
+            await feed.poll()
+            listed = await index.all()
+            await sqlite_db.delete_tracked_object(wallet.id)
+            await feed.poll()
+            after_delete = await index.all()
+        finally:
+            event_bus.unsubscribe(OBJECT_CHANGED, index._on_object_changed)
+        return listed, after_delete
+
+    listed, after_delete = asyncio.run(scenario())
+    assert [o.name for o in listed] == ["wallet", "keys"]
+    assert listed[1].location_phrase == "on the hook"
+    assert [o.name for o in after_delete] == ["keys"]
+    assert index.stats["loads"] == 1
+
+
+def test_object_index_keeps_newer_location_over_late_change():
+    index = ObjectIndex()
+    index.objects = {}
+    index.upsert({"id": 1, "name": "keys", "alias": "car keys", "created_at": "2024-01-01T00:00:00",
+                  "last_seen_timestamp": 2000, "location_phrase": "in the bowl"})
+    index.upsert({"id": 1, "name": "keys", "alias": "house keys", "created_at": "2024-01-01T00:00:00",
+                  "last_seen_timestamp": 1000, "location_phrase": "on the hook"})
+    assert index.objects[1].alias == "house keys"
+    assert index.objects[1].location_phrase == "in the bowl"
+
+
+def test_object_routes_follow_local_writes(sqlite_db):
+    created = client.post("/api/objects/", json={"name": "remote", "alias": "tv remote"}).json()
+    assert client.get(f"/api/objects/{created['id']}").json()["alias"] == "tv remote"
+
+    client.post("/api/objects/bulk?on_conflict=update", json=[{"name": "remote", "alias": "clicker"}])
+    assert [o["alias"] for o in client.get("/api/objects/").json()] == ["clicker"]
+
+    assert client.delete(f"/api/objects/{created['id']}").status_code == 200
+    assert client.get(f"/api/objects/{created['id']}").status_code == 404
+    assert client.get("/api/search/suggestions").json()["tracked_objects_count"] == 0
+
+
+def test_create_change_feed_respects_switch(sqlite_db, monkeypatch):
+    assert isinstance(create_change_feed(sqlite_db), SQLiteChangeFeed)
+    monkeypatch.setenv("CHANGE_FEED", "off")
+    assert create_change_feed(sqlite_db) is None
+
+
+def test_feed_without_start_fails_at_construction():
+    class Silent(ChangeFeed):
+        source = "silent"
+
+    with pytest.raises(TypeError, match="start"):
+        Silent()
@@ -0,0 +1,111 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.compression import CompressionMiddleware, negotiate_encoding
+
+client = TestClient(app)
+
+demo = FastAPI()
+demo.add_middleware(CompressionMiddleware, minimum_size=256)
+
+
+@demo.get("/large")
+async def large():
+    return {"objects": [{"id": i, "name": "keys", "alias": "car keys, keychain"} for i in range(200)]}
+
+
+@demo.get("/small")
+async def small():
+    return {"status": "ok"}
+
+
+@demo.get("/events")
+async def events():
+    async def stream():
+        for i in range(50):
+            yield f"data: {'x' * 40} {i}\n\n"
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@demo.get("/export")
+async def export():
+    async def stream():
+        for i in range(300):
+            yield json.dumps({"id": i, "name": f"object-{i}"}) + "\n"
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+demo_client = TestClient(demo)
+
+
+def test_negotiation_honours_q_values_and_server_preference():
+    assert negotiate_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0, *", ["gzip"]) is None
+    assert negotiate_encoding("identity", ["gzip"]) is None
+    assert negotiate_encoding(None) is None
+
+
+def test_large_json_is_gzipped_with_vary():
+    response = demo_client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["objects"]) == 200
+
+
+def test_small_body_and_identity_requests_pass_through():
+    assert "content-encoding" not in demo_client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in demo_client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_event_stream_is_never_compressed():
+    response = demo_client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text.count("data:") == 50
+
+
+def test_streamed_ndjson_is_compressed_chunk_by_chunk():
+    with demo_client.stream("GET", "/export", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 300
+    assert json.loads(lines[-1]) == {"id": 299, "name": "object-299"}
+
+
+def test_precomputed_payload_serves_etag_and_304():
+    first = client.get("/api/objects/suggestions/common", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert first.json()["common_objects"][0]["name"] == "keys"
+    assert "max-age" in first.headers["cache-control"]
+
+    revalidated = client.get("/api/objects/suggestions/common",
+                             headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_precomputed_payload_has_its_own_gzip_variant():
+    with client.stream("GET", "/api/objects/suggestions/common", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+        etag = response.headers["etag"]
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+    assert json.loads(gzip.decompress(raw))["tips"]
+    # A cached gzip copy still revalidates against the identity request
+    assert client.get("/api/objects/suggestions/common",
+                      headers={"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 304
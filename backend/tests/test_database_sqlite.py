@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from database import BaseDatabaseManager
+from database_sqlite import SQLiteDatabaseManager
+from models import TrackedObjectCreate
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestSQLiteDatabaseManager:
+    def test_uses_wal_and_indexes(self, sqlite_db):
+        def pragmas(conn):
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            return mode, {row["name"] for row in conn.execute("PRAGMA index_list('tracked_objects')")}
+
+        mode, indexes = run(sqlite_db._read(pragmas))
+        assert mode == "wal"
+        assert {"idx_tracked_objects_household_name", "idx_tracked_objects_household_created",
+                "idx_tracked_objects_last_seen"} <= indexes
+
+    def test_create_and_duplicate(self, sqlite_db):
+        created = run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="Keys", alias="car keys")))
+        assert created.name == "keys"
+        assert created.id > 0
+
+        with pytest.raises(ValueError):
+            run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="keys", alias="again")))
+
+    def test_find_matching_objects_substring(self, sqlite_db):
+        run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="wallet", alias="leather billfold")))
+        run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="tv", alias="remote control")))
+
+        assert [o.name for o in run(sqlite_db.find_matching_objects("llet"))] == ["wallet"]
+        assert [o.name for o in run(sqlite_db.find_matching_objects("BILLFOLD"))] == ["wallet"]
+        # Two-character queries go through the LIKE fallback
+        assert [o.name for o in run(sqlite_db.find_matching_objects("tv"))] == ["tv"]
+
+    def test_update_and_delete(self, sqlite_db):
+        obj = run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="phone", alias="iphone")))
+        assert run(sqlite_db.update_object_location(obj.id, "vid_1", "on the desk", 0.9, 1000))
+
+        stored = run(sqlite_db.get_tracked_objects())[0]
+        assert stored.location_phrase == "on the desk"
+        assert stored.last_seen_timestamp == 1000
+
+        assert run(sqlite_db.delete_tracked_object(obj.id))
+        assert run(sqlite_db.find_matching_objects("phone")) == []
+        assert not run(sqlite_db.delete_tracked_object(obj.id))
+
+    def test_point_reads_are_sub_millisecond(self, sqlite_db):
+        for i in range(300):
+            run(sqlite_db.create_tracked_object(TrackedObjectCreate(name=f"object{i}", alias=f"alias {i}")))
+
+        async def timed_lookups():
+            start = time.perf_counter()
+            for i in range(200):
+                await sqlite_db.find_matching_objects(f"object{i}")
+            return (time.perf_counter() - start) / 200
+
+        assert run(timed_lookups()) < 0.001
+
+    def test_open_exports_do_not_starve_other_reads(self, sqlite_db):
+        for i in range(5):
+            run(sqlite_db.create_tracked_object(TrackedObjectCreate(name=f"object{i}", alias=f"alias {i}")))
+
+        async def scenario():
+            # More paused exports than pooled readers (2), each mid-page
+            exports = [sqlite_db.iter_tracked_objects(batch_size=2) for _ in range(3)]
+            firsts = [await export.__anext__() for export in exports]
+            objects = await asyncio.wait_for(sqlite_db.get_tracked_objects(), timeout=2)
+            rests = [[row async for row in export] for export in exports]
+            return firsts, objects, rests
+
+        firsts, objects, rests = run(scenario())
+        assert len(objects) == 5
+        assert all(len(rest) == 4 and first["id"] < rest[0]["id"] for first, rest in zip(firsts, rests))
+
+    def test_queries_run_off_the_event_loop(self, sqlite_db):
+        async def scenario():
+            ticks = 0
+            slow = asyncio.ensure_future(sqlite_db._read(
+                lambda conn: time.sleep(0.2) or conn.execute("SELECT 1").fetchone()[0]))
+            while not slow.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return slow.result(), ticks
+
+        result, ticks = run(scenario())
+        assert result == 1 and ticks >= 5
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoDeletes(SQLiteDatabaseManager):
+        delete_tracked_object = BaseDatabaseManager.delete_tracked_object
+
+    with pytest.raises(TypeError, match="delete_tracked_object"):
+        NoDeletes(":memory:")
@@ -0,0 +1,100 @@
+import asyncio
+
+import aiohttp
+from fastapi.testclient import TestClient
+
+from main import app
+from models import TrackedObjectCreate
+from services.memories_api import memories_api
+from utils.deadline import (DeadlineExceeded, DeadlineMiddleware, client_timeout, deadline_for, remaining,
+                            reset_deadline, set_deadline)
+
+client = TestClient(app)
+
+
+def test_deadline_for_uses_route_default_and_header():
+    assert deadline_for("/api/search/", None) == 25
+    assert deadline_for("/api/search/", "5") == 5
+    # Clients can shorten the budget but not extend it
+    assert deadline_for("/api/search/", "600") == 25
+    assert deadline_for("/api/search/", "soon") == 25
+    assert deadline_for("/api/objects/export", None) is None
+
+
+def test_client_timeout_is_capped_by_remaining_budget():
+    default = aiohttp.ClientTimeout(total=300)
+    assert client_timeout(default) is default
+
+    token = set_deadline(2)
+    try:
+        assert 0 < remaining() <= 2
+        assert client_timeout(default).total <= 2
+    finally:
+        reset_deadline(token)
+
+
+def test_client_disconnect_cancels_handler():
+    handler_state = {}
+
+    async def slow_app(scope, receive, send):
+        handler_state["budget"] = remaining()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            handler_state["cancelled"] = True
+            raise
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            handler_state.setdefault("sent", []).append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/api/search/", "headers": []}
+        await asyncio.wait_for(DeadlineMiddleware(slow_app)(scope, receive, send), timeout=2)
+
+    asyncio.run(scenario())
+    assert handler_state["cancelled"] is True
+    assert 0 < handler_state["budget"] <= 25
+    assert "sent" not in handler_state
+
+
+def test_search_returns_504_when_upstream_outlives_deadline(sqlite_db, monkeypatch):
+    asyncio.run(sqlite_db.create_tracked_object(TrackedObjectCreate(name="remote", alias="tv remote")))
+    seen_budget = {}
+
+    async def slow_search(query, limit=5):
+        seen_budget["remaining"] = remaining()
+        await asyncio.sleep(5)
+        return []
+
+    monkeypatch.setattr(memories_api, "search_videos", slow_search)
+    response = client.post("/api/search/", json={"query": "Where is my remote?"},
+                           headers={"X-Request-Timeout": "0.2"})
+
+    assert response.status_code == 504
+    assert response.json()["status_code"] == 504
+    assert seen_budget["remaining"] <= 0.2
+
+
+def test_deadlines_raised_inside_handlers_stay_504(sqlite_db, monkeypatch):
+    async def expired(*args, **kwargs):
+        raise DeadlineExceeded("Request deadline exceeded")
+
+    monkeypatch.setattr(sqlite_db, "find_matching_objects", expired)
+    monkeypatch.setattr(sqlite_db, "create_tracked_object", expired)
+    monkeypatch.setattr(memories_api, "upload_video", expired)
+    mp4 = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom" + b"\x00" * 512
+
+    responses = [
+        client.get("/api/objects/", params={"search": "keys"}),
+        client.post("/api/objects/", json={"name": "keys", "alias": "car keys"}),
+        client.post("/api/upload", files={"file": ("clip.mp4", mp4, "video/mp4")}),
+    ]
+    assert [response.status_code for response in responses] == [504, 504, 504]
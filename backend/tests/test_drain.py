@@ -0,0 +1,193 @@
+import asyncio
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import services.snapshot as snapshot_module
+from fastapi.testclient import TestClient
+from main import app
+from services.prewarm import LocationPrewarmer
+from services.snapshot import StateSnapshot
+from utils.admission import AdmissionController
+from utils.drain import DrainMiddleware, RequestDrainer, request_drainer
+from utils.hedging import RequestHedger
+from utils.performance import PerformanceMonitor, ShardedCache, StaleWhileRevalidateCache
+from utils.tenancy import household_scope
+
+client = TestClient(app)
+
+
+def _fresh_state(monkeypatch):
+    state = {
+        "search_cache": ShardedCache(max_size=10, ttl_seconds=600),
+        "answer_cache": StaleWhileRevalidateCache(),
+        "prewarmer": LocationPrewarmer(),
+        "perf_monitor": PerformanceMonitor(),
+        "admission_controller": AdmissionController({"cheap": (4, 4, 1.0)}),
+    }
+    for name, value in state.items():
+        monkeypatch.setattr(snapshot_module, name, value)
+    monkeypatch.setattr(snapshot_module.memories_api, "hedger", RequestHedger())
+    return state
+
+
+def test_snapshot_round_trip_keeps_ttls(tmp_path, monkeypatch):
+    before = _fresh_state(monkeypatch)
+    with household_scope("smiths"):
+        before["search_cache"].set("search_keys_5", [{"videoNo": "v1"}])
+        before["search_cache"].set("search_old_5", [{"videoNo": "v0"}])
+    before["search_cache"].shard("smiths").timestamps["search_old_5"] -= 550
+    before["prewarmer"].precomputed[7] = {"location": "on the desk", "confidence": 0.9, "video_no": "v1",
+                                          "timestamp": 1, "computed_at": time.time()}
+    before["perf_monitor"]._record_metric("search", 0.5, "success")
+    snapshot_module.memories_api.hedger._endpoint("chat").latencies.extend([0.4, 0.6])
+    before["admission_controller"].classes["cheap"].release(0.2)
+
+    snapshot = StateSnapshot(str(tmp_path / "state.json.gz"))
+    assert snapshot.save()
+
+    after = _fresh_state(monkeypatch)
+    after["perf_monitor"]._record_metric("search", 1.5, "error")
+    restored = snapshot.load()
+
+    assert restored["search_cache"] == 2 and restored["prewarmed"] == 1
+    with household_scope("smiths"):
+        assert after["search_cache"].get("search_keys_5") == [{"videoNo": "v1"}]
+        # Written 550s into a 600s TTL: restored, but still expiring on the original schedule
+        assert after["search_cache"].get("search_old_5") == [{"videoNo": "v0"}]
+    assert time.time() - after["search_cache"].shard("smiths").timestamps["search_old_5"] > 549
+    assert after["search_cache"].get("search_keys_5") is None
+
+    assert after["prewarmer"].lookup(7)["location"] == "on the desk"
+    metric = after["perf_monitor"].metrics["search"]
+    assert (metric["calls"], metric["success_count"], metric["error_count"]) == (2, 1, 1)
+    assert metric["avg_time"] == 1.0
+    assert list(snapshot_module.memories_api.hedger.endpoints["chat"].latencies) == [0.4, 0.6]
+    assert after["admission_controller"].classes["cheap"].ewma_latency == 0.2
+
+
+def test_expired_entries_and_stale_snapshots_are_dropped(tmp_path, monkeypatch):
+    before = _fresh_state(monkeypatch)
+    before["search_cache"].set("search_keys_5", ["fresh"])
+    before["search_cache"].set("search_gone_5", ["expired"])
+    before["search_cache"].shard("default").timestamps["search_gone_5"] -= 601
+
+    snapshot = StateSnapshot(str(tmp_path / "state.json.gz"), max_age=60)
+    snapshot.save()
+    after = _fresh_state(monkeypatch)
+    assert snapshot.load()["search_cache"] == 1
+    assert after["search_cache"].get("search_gone_5") is None
+
+    after = _fresh_state(monkeypatch)
+    outdated = StateSnapshot(snapshot.path, max_age=-1)
+    assert outdated.load() == {}
+    assert len(after["search_cache"]) == 0 and outdated.stats["skipped_stale"] == 1
+
+
+def test_draining_turns_away_new_requests():
+    request_drainer.begin()
+    try:
+        response = client.get("/api/objects/")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        assert client.get("/livez").status_code == 200
+        ready = client.get("/readyz")
+        assert ready.status_code == 503 and ready.json()["draining"] is True
+    finally:
+        request_drainer.reset()
+    assert request_drainer.get_stats()["rejected_while_draining"] >= 1
+
+
+def test_drain_waits_for_in_flight_requests():
+    drainer = RequestDrainer()
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"done"})
+
+    middleware = DrainMiddleware(slow_app, drainer)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def scenario():
+        request = asyncio.create_task(middleware({"type": "http", "path": "/api/search/"}, None, send))
+        await asyncio.sleep(0)
+        drainer.begin()
+        assert not await drainer.wait_idle(0.01)
+        asyncio.get_running_loop().call_later(0.01, release.set)
+        return await drainer.wait_idle(1.0), await request
+
+    assert asyncio.run(scenario())[0] is True
+    assert sent[0]["status"] == 200 and drainer.in_flight == 0
+    assert drainer.stats["drained_requests"] == 1
+
+
+SERVER_SCRIPT = """
+import asyncio, sys, uvicorn
+from main import app
+
+@app.get("/api/test/slow")
+async def slow():
+    await asyncio.sleep(1.0)
+    return {"finished": True}
+
+uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning", timeout_graceful_shutdown=30)
+"""
+
+
+def test_sigterm_drains_a_real_server_before_it_stops(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = {**os.environ, "DATABASE_BACKEND": "sqlite", "SQLITE_PATH": str(tmp_path / "objects.db"),
+           "CHANGE_FEED": "off", "STATE_SNAPSHOT_PATH": "", "DRAIN_TIMEOUT": "10"}
+    server = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, str(port)], env=env,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def request(path):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    try:
+        for _ in range(200):
+            try:
+                if request("/livez")[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.05)
+
+        stream = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        stream.request("GET", "/api/admin/metrics/stream")
+        events = stream.getresponse()
+        assert events.status == 200
+        slow = {}
+        slow_thread = threading.Thread(target=lambda: slow.update(result=request("/api/test/slow")))
+        slow_thread.start()
+        time.sleep(0.3)
+
+        started = time.monotonic()
+        server.send_signal(signal.SIGTERM)
+        time.sleep(0.2)
+        # Still serving while the slow request drains: out of rotation, new work turned away
+        assert request("/readyz")[0] == 503
+        assert request("/api/objects/")[0] == 503
+        slow_thread.join(5)
+        assert slow["result"][0] == 200
+        # The metrics stream is ended rather than holding shutdown open
+        events.read()
+        server.wait(10)
+        assert time.monotonic() - started < 10
+    finally:
+        if server.poll() is None:
+            server.kill()
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from database import DatabaseManager
+from main import app
+from services.health import HealthProber, health_prober
+
+client = TestClient(app)
+
+
+def test_livez_does_no_io():
+    response = client.get("/livez")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readyz_serves_cached_probe_results(sqlite_db, monkeypatch):
+    calls = {"ping": 0}
+    original_ping = sqlite_db.ping
+
+    async def counting_ping():
+        calls["ping"] += 1
+        await original_ping()
+
+    monkeypatch.setattr(sqlite_db, "ping", counting_ping)
+    monkeypatch.setattr(health_prober, "results", {})
+
+    assert client.get("/readyz").status_code == 503
+
+    asyncio.run(health_prober.probe_all())
+    for _ in range(5):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+    assert calls["ping"] == 1
+
+    body = response.json()
+    assert body["ready"] is True
+    assert body["checks"]["database"]["ok"] is True
+    assert body["checks"]["database"]["stale"] is False
+    assert client.get("/health").json()["database"] == "connected"
+
+
+def test_prober_marks_failures_and_staleness():
+    prober = HealthProber(interval=1, timeout=0.1)
+
+    async def broken():
+        raise ConnectionError("refused")
+
+    async def hanging():
+        await asyncio.sleep(1)
+
+    async def optional_ok():
+        return "reachable"
+
+    prober.register("database", broken)
+    prober.register("cache", hanging)
+    prober.register("upstream", optional_ok, required=False)
+    asyncio.run(prober.probe_all())
+    asyncio.run(prober.probe_all())
+
+    snapshot = prober.snapshot()
+    assert snapshot["ready"] is False
+    assert snapshot["checks"]["database"]["consecutive_failures"] == 2
+    assert snapshot["checks"]["cache"]["ok"] is False
+    assert snapshot["checks"]["upstream"]["detail"] == "reachable"
+
+    prober.results["database"] = {**prober.results["upstream"], "checked_at": 0}
+    prober.results["cache"] = prober.results["upstream"]
+    assert prober.snapshot()["checks"]["database"]["stale"] is True
+    assert prober.snapshot()["ready"] is False
+
+
+def test_hung_database_ping_times_out_without_stalling_the_loop():
+    release = threading.Event()
+
+    class HangingQuery:
+        def __getattr__(self, method):
+            return lambda *args: self
+
+        def execute(self):
+            # A blocking client call that never answers (until the test lets it go)
+            release.wait(5)
+
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.client = type("Client", (), {"table": lambda self, name: HangingQuery()})()
+    prober = HealthProber(interval=1, timeout=0.1)
+    prober.register("database", manager.ping)
+
+    async def scenario():
+        started = time.monotonic()
+        ticks = 0
+        probe = asyncio.ensure_future(prober.probe_all())
+        while not probe.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        elapsed = time.monotonic() - started
+        # Let the abandoned thread finish so the loop can close
+        release.set()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(scenario())
+    assert elapsed < 1 and ticks >= 5
+    assert prober.results["database"]["ok"] is False
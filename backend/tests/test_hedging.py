@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from utils.hedging import RequestHedger
+
+
+def slow_then_fast(delays):
+    """Attempt factory whose n-th call takes delays[n] seconds"""
+    calls = []
+
+    async def attempt():
+        index = len(calls)
+        calls.append(index)
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            calls[index] = "cancelled"
+            raise
+        return index
+
+    return attempt, calls
+
+
+def test_fast_call_is_not_hedged():
+    hedger = RequestHedger(budget_percent=100, default_delay=0.2)
+    attempt, calls = slow_then_fast([0.01])
+
+    assert asyncio.run(hedger.run("search", attempt)) == 0
+    assert calls == [0]
+    assert hedger.endpoints["search"].stats["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = RequestHedger(budget_percent=100, default_delay=0.05)
+    attempt, calls = slow_then_fast([1.0, 0.01])
+
+    async def scenario():
+        result = await hedger.run("chat", attempt)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == 1
+    assert calls == ["cancelled", 1]
+    stats = hedger.get_stats()["endpoints"]["chat"]
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_caps_extra_calls():
+    hedger = RequestHedger(budget_percent=50, default_delay=0.02)
+
+    async def scenario():
+        for _ in range(4):
+            attempt, _ = slow_then_fast([0.05, 0.05])
+            await hedger.run("search", attempt)
+
+    asyncio.run(scenario())
+    stats = hedger.endpoints["search"].stats
+    assert stats["hedged"] == 2
+    assert stats["budget_denied"] == 2
+
+
+def test_failed_attempt_lets_the_other_win():
+    hedger = RequestHedger(budget_percent=100, default_delay=0.02)
+    calls = []
+
+    async def attempt():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("reset")
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    assert asyncio.run(hedger.run("chat", attempt)) == "ok"
+
+    async def always_fails():
+        await asyncio.sleep(0.05)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(hedger.run("chat", always_fails))
+    assert hedger.endpoints["chat"].stats["errors"] == 1
+
+
+def test_delay_follows_observed_p95():
+    hedger = RequestHedger(min_samples=20, default_delay=2.0)
+    assert hedger.hedge_delay("search") == 2.0
+    hedger._endpoint("search").latencies.extend([0.1] * 19 + [0.5])
+    assert hedger.hedge_delay("search") == 0.1
+
+
+def test_latency_is_measured_from_the_primary_start():
+    hedger = RequestHedger(budget_percent=100, default_delay=0.05)
+    attempt, calls = slow_then_fast([1.0, 0.05])
+
+    assert asyncio.run(hedger.run("chat", attempt)) == 1
+    # One sample: the time the cancelled primary had been running, not the hedge's own 0.05s
+    samples = list(hedger.endpoints["chat"].latencies)
+    assert len(samples) == 1 and samples[0] >= 0.1
+
+
+def test_upstream_5xx_does_not_win_the_race():
+    hedger = RequestHedger(budget_percent=100, default_delay=0.05)
+    calls = []
+
+    async def attempt():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.2)
+            return 200, "primary"
+        await asyncio.sleep(0.01)
+        return 503, "unavailable"
+
+    def failed(response):
+        return response[0] >= 500
+
+    assert asyncio.run(hedger.run("search", attempt, failed=failed)) == (200, "primary")
+
+    async def always_unavailable():
+        await asyncio.sleep(0.1)
+        return 502, "bad gateway"
+
+    assert asyncio.run(hedger.run("search", always_unavailable, failed=failed)) == (502, "bad gateway")
+    assert hedger.endpoints["search"].stats["errors"] == 1 and len(hedger.endpoints["search"].latencies) == 1
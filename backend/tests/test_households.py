@@ -0,0 +1,72 @@
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.performance import ShardedCache
+from utils.tenancy import household_scope
+
+client = TestClient(app)
+
+SMITHS = {"X-Household-Id": "smiths"}
+JONES = {"X-Household-Id": "jones"}
+
+
+def test_households_track_same_name_independently(sqlite_db):
+    smiths_keys = client.post("/api/objects/", json={"name": "keys", "alias": "car keys"}, headers=SMITHS)
+    jones_keys = client.post("/api/objects/", json={"name": "keys", "alias": "red keychain"}, headers=JONES)
+    assert smiths_keys.status_code == 200 and jones_keys.status_code == 200
+    assert client.post("/api/objects/", json={"name": "keys", "alias": "again"}, headers=SMITHS).status_code == 409
+
+    client.post("/api/objects/bulk", json=[{"name": "wallet", "alias": "billfold"}], headers=JONES)
+    assert [o["alias"] for o in client.get("/api/objects/", headers=SMITHS).json()] == ["car keys"]
+    assert sorted(o["name"] for o in client.get("/api/objects/", headers=JONES).json()) == ["keys", "wallet"]
+    assert client.get("/api/objects/", params={"search": "keychain"}, headers=SMITHS).json() == []
+    assert client.get("/api/objects/").json() == []
+
+
+def test_households_cannot_reach_each_others_objects(sqlite_db):
+    jones_keys = client.post("/api/objects/", json={"name": "keys", "alias": "red keychain"}, headers=JONES).json()
+    url = f"/api/objects/{jones_keys['id']}"
+
+    assert client.get(url, headers=SMITHS).status_code == 404
+    assert client.get(f"{url}/sightings", headers=SMITHS).status_code == 404
+    assert client.delete(url, headers=SMITHS).status_code == 404
+    assert client.get(url, headers=JONES).json()["alias"] == "red keychain"
+
+    resolved = client.get("/api/search/resolve", params={"q": "where are my keys"}, headers=SMITHS).json()
+    assert resolved["matches"] == []
+
+
+def test_bulk_updates_reach_the_households_own_index(sqlite_db):
+    client.post("/api/objects/", json={"name": "phone", "alias": "old alias"}, headers=JONES)
+    # Loads (and caches) the jones partition of the object index
+    assert [o["alias"] for o in client.get("/api/objects/", headers=JONES).json()] == ["old alias"]
+
+    response = client.post("/api/objects/bulk?on_conflict=update", json=[{"name": "phone", "alias": "pixel"}],
+                           headers=JONES)
+    assert response.json()["results"][0]["status"] == "updated"
+    assert [o["alias"] for o in client.get("/api/objects/", headers=JONES).json()] == ["pixel"]
+
+
+def test_household_header_is_validated():
+    response = client.get("/api/objects/", headers={"X-Household-Id": "../etc"})
+    assert response.status_code == 400
+    assert response.json()["message"] == "Invalid X-Household-Id header"
+
+
+def test_sharded_cache_evicts_from_the_largest_household():
+    cache = ShardedCache(max_size=6)
+    with household_scope("quiet"):
+        cache.set("search_keys", 1)
+        cache.set("search_wallet", 2)
+    with household_scope("noisy"):
+        for i in range(10):
+            cache.set(f"search_{i}", i)
+        assert cache.get("search_9") == 9 and cache.get("search_0") is None
+
+    with household_scope("quiet"):
+        assert cache.get("search_keys") == 1 and cache.get("search_wallet") == 2
+    assert len(cache) == 6
+    assert cache.get_stats()["largest_shard"] == 4
+    assert cache.invalidate(lambda key, value: True, "noisy") == 4
+    assert cache.get_stats()["size"] == 2
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+
+from database import DatabaseManager
+from models import TrackedObject, TrackedObjectCreate
+from services.location_buffer import LocationWriteBuffer
+
+
+class RecordingQuery:
+    """Stands in for a postgrest query builder; remembers the chain of calls"""
+
+    def __init__(self, calls, existing_ids):
+        self.calls = calls
+        self.existing_ids = existing_ids
+        self.chain = []
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.chain.append((method, args))
+            return self
+        return call
+
+    def execute(self):
+        self.calls.append(self.chain)
+        ids = [args[1] for method, args in self.chain if method == "eq" and args[0] == "id"]
+        return type("Result", (), {"data": [{"id": i} for i in ids if i in self.existing_ids]})()
+
+
+def make_object(object_id: int, name: str = "keys") -> TrackedObject:
+    return TrackedObject(id=object_id, name=name, alias=f"{name} alias", created_at=datetime.now())
+
+
+class TestLocationWriteBuffer:
+    def test_coalesces_with_latest_timestamp_winning(self):
+        async def scenario():
+            buffer = LocationWriteBuffer(max_pending=10, flush_interval=60)
+            obj = make_object(1)
+            buffer.enqueue(obj, "v1", "on the desk", 0.9, timestamp=200)
+            buffer.enqueue(obj, "v0", "in the drawer", 0.8, timestamp=100)
+            buffer.enqueue(obj, "v2", "on the couch", 0.7, timestamp=300)
+            buffer._task.cancel()
+            return buffer
+
+        buffer = asyncio.run(scenario())
+        assert len(buffer.pending) == 1
+        assert buffer.pending[1]["location_phrase"] == "on the couch"
+        assert buffer.stats["coalesced"] == 2
+
+    def test_apply_pending_overlays_reads(self):
+        async def scenario():
+            buffer = LocationWriteBuffer(max_pending=10, flush_interval=60)
+            buffer.enqueue(make_object(1), "v1", "on the desk", 0.9, timestamp=200)
+            buffer._task.cancel()
+            return buffer.apply_pending([make_object(1), make_object(2, "wallet")])
+
+        merged = asyncio.run(scenario())
+        assert merged[0].location_phrase == "on the desk"
+        assert merged[0].last_seen_timestamp == 200
+        assert merged[1].location_phrase is None
+
+    def test_stop_flushes_in_one_bulk_write(self, sqlite_db):
+        async def scenario():
+            keys = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="keys", alias="car keys"))
+            wallet = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="wallet", alias="billfold"))
+            buffer = LocationWriteBuffer(max_pending=10, flush_interval=60)
+            for ts in range(1, 6):
+                buffer.enqueue(keys, f"v{ts}", f"spot {ts}", 0.9, timestamp=ts)
+            buffer.enqueue(wallet, "v9", "on the shelf", 0.8, timestamp=9)
+            await buffer.stop()
+            return buffer, await sqlite_db.get_tracked_objects()
+
+        buffer, objects = asyncio.run(scenario())
+        by_name = {obj.name: obj for obj in objects}
+        assert by_name["keys"].location_phrase == "spot 5"
+        assert by_name["wallet"].location_phrase == "on the shelf"
+        assert buffer.stats["flushes"] == 1
+        assert buffer.stats["rows_written"] == 2
+        assert not buffer.pending
+
+    def test_size_trigger_flushes_without_waiting(self, sqlite_db):
+        async def scenario():
+            obj = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="phone", alias="iphone"))
+            buffer = LocationWriteBuffer(max_pending=1, flush_interval=60)
+            buffer.enqueue(obj, "v1", "on the bed", 0.9, timestamp=1)
+            await asyncio.sleep(0.05)
+            stats = dict(buffer.stats)
+            await buffer.stop()
+            return stats
+
+        assert asyncio.run(scenario())["flushes"] == 1
+
+    def test_flush_never_resurrects_or_renames_rows(self, sqlite_db, monkeypatch):
+        async def scenario():
+            keys = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="keys", alias="car keys"))
+            wallet = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="wallet", alias="billfold"))
+            buffer = LocationWriteBuffer(max_pending=10, flush_interval=60)
+            buffer.enqueue(keys, "v1", "on the desk", 0.9, timestamp=1)
+            buffer.enqueue(wallet, "v1", "on the shelf", 0.8, timestamp=1)
+            write = sqlite_db.bulk_update_object_locations
+
+            async def changed_while_in_flight(updates):
+                # Another request deletes one object and renames the other mid-flush
+                await sqlite_db.delete_tracked_object(keys.id)
+                await sqlite_db.upsert_tracked_objects([TrackedObjectCreate(name="wallet", alias="leather wallet")],
+                                                       update_existing=True)
+                return await write(updates)
+
+            monkeypatch.setattr(sqlite_db, "bulk_update_object_locations", changed_while_in_flight)
+            await buffer.stop()
+            return buffer, await sqlite_db.get_tracked_objects()
+
+        buffer, objects = asyncio.run(scenario())
+        assert [(obj.name, obj.alias, obj.location_phrase) for obj in objects] == \
+            [("wallet", "leather wallet", "on the shelf")]
+        assert buffer.stats["rows_written"] == 1
+
+    def test_older_flush_never_replaces_a_newer_location(self, sqlite_db):
+        async def scenario():
+            obj = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="drill", alias="power drill"))
+            buffer = LocationWriteBuffer(max_pending=10, flush_interval=60)
+            buffer.enqueue(obj, "v2", "workbench", 0.9, timestamp=2000)
+            await buffer.flush()
+            # A sighting from older footage arrives after the newer one was already written
+            buffer.enqueue(obj, "v1", "garage shelf (last month)", 0.9, timestamp=1000)
+            await buffer.stop()
+            return buffer, (await sqlite_db.get_tracked_objects())[0]
+
+        buffer, stored = asyncio.run(scenario())
+        assert (stored.last_seen_timestamp, stored.location_phrase) == (2000, "workbench")
+        assert buffer.stats["rows_written"] == 1
+
+    def test_supabase_flush_only_updates_location_fields(self):
+        calls = []
+        manager = DatabaseManager.__new__(DatabaseManager)
+        manager.client = type("Client", (), {"table": lambda self, name: RecordingQuery(calls, {2})})()
+        rows = [{"id": object_id, "household_id": "default", "last_seen_timestamp": 5,
+                 "location_phrase": "on the desk", "video_no": "v1", "confidence": 0.9} for object_id in (1, 2)]
+
+        assert asyncio.run(manager.bulk_update_object_locations(rows)) == 1
+        methods = [[method for method, _ in chain] for chain in calls]
+        assert methods == [["update", "eq", "eq", "or_"]] * 2
+        assert calls[0][-1][1] == ("last_seen_timestamp.is.null,last_seen_timestamp.lte.5",)
+        assert set(calls[0][0][1][0]) == {"last_seen_timestamp", "location_phrase", "video_no", "confidence"}
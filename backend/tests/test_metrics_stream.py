@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from services.metrics_stream import MetricsBroadcaster, merge_patch
+
+
+def parse_event(message: str):
+    lines = message.strip().split("\n")
+    return lines[0].split(": ", 1)[1], json.loads(lines[1].split(": ", 1)[1])
+
+
+def test_merge_patch_only_contains_changes():
+    old = {"calls": {"search": {"count": 1, "avg": 0.5}, "upload": {"count": 2}}, "cache": 3}
+    new = {"calls": {"search": {"count": 2, "avg": 0.5}}, "cache": 3, "uptime": 10}
+    assert merge_patch(old, new) == {"calls": {"search": {"count": 2}, "upload": None}, "uptime": 10}
+    assert merge_patch(new, new) == {}
+
+
+def test_subscribers_share_one_producer_and_receive_deltas():
+    metrics = {"search": {"calls": 0}, "cache_size": 1}
+    collections = {"count": 0}
+
+    def source():
+        collections["count"] += 1
+        return metrics
+
+    async def scenario():
+        broadcaster = MetricsBroadcaster(source, interval=60)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        task = broadcaster._task
+
+        metrics["search"]["calls"] = 3
+        broadcaster.tick()
+        broadcaster.tick()  # nothing changed
+
+        events = [[q.queue.get_nowait() for _ in range(q.queue.qsize())] for q in (first, second)]
+        broadcaster.unsubscribe(first)
+        still_running = broadcaster._task is task
+        broadcaster.unsubscribe(second)
+        return broadcaster, events, still_running
+
+    broadcaster, events, still_running = asyncio.run(scenario())
+    assert events[0] == events[1]
+    assert parse_event(events[0][0]) == ("snapshot", {"search": {"calls": 0}, "cache_size": 1})
+    assert parse_event(events[0][1]) == ("delta", {"search": {"calls": 3}})
+    assert len(events[0]) == 2
+    # One collection for the initial snapshot plus one per tick, regardless of subscribers
+    assert collections["count"] == 3
+    assert broadcaster.stats["unchanged_ticks"] == 1
+    assert still_running is True
+    assert broadcaster._task is None
+
+
+def test_slow_subscriber_is_resynced_with_a_snapshot():
+    metrics = {"counter": 0}
+
+    async def scenario():
+        broadcaster = MetricsBroadcaster(lambda: metrics, interval=60, queue_size=2)
+        slow = broadcaster.subscribe()
+        for value in range(1, 5):
+            metrics["counter"] = value
+            broadcaster.tick()
+        queued = [slow.queue.get_nowait() for _ in range(slow.queue.qsize())]
+        broadcaster.unsubscribe(slow)
+        return broadcaster, slow, queued
+
+    broadcaster, slow, queued = asyncio.run(scenario())
+    assert len(queued) <= 2
+    kinds = [parse_event(message)[0] for message in queued]
+    assert "snapshot" in kinds
+    # Replaying what is left must still end at the latest value
+    state = {}
+    for message in queued:
+        kind, data = parse_event(message)
+        state = data if kind == "snapshot" else {**state, **data}
+    assert state == {"counter": 4}
+    assert slow.resyncs >= 1
+    assert broadcaster.stats["resyncs"] == slow.resyncs
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from main import app
+from models import TrackedObject
+from services.memories_api import memories_api
+from services.object_resolver import ObjectResolver
+
+client = TestClient(app)
+
+
+def make(object_id, name, alias):
+    return TrackedObject(id=object_id, name=name, alias=alias, created_at=datetime(2024, 1, 1))
+
+
+OBJECTS = [
+    make(1, "keys", "car keys, house keys, blue keychain"),
+    make(2, "wallet", "leather wallet, purse, billfold"),
+    make(3, "car", "red toyota"),
+    make(4, "keyboard", "mechanical keyboard"),
+]
+
+
+def test_resolves_whole_query_not_first_word():
+    resolver = ObjectResolver()
+    resolver.sync(OBJECTS)
+
+    resolution = resolver.resolve("Where is my blue car key")
+    assert resolution.best.name == "keys"
+    assert resolver.resolve("where did I leave my keyboard?").best.name == "keyboard"
+    assert resolver.resolve("I can't find my purse").best.name == "wallet"
+    scores = [score for _, score in resolution.matches]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_unrelated_query_resolves_to_nothing():
+    resolver = ObjectResolver()
+    resolver.sync(OBJECTS)
+
+    resolution = resolver.resolve("Where are my sunglasses?")
+    assert resolution.matches == []
+    assert resolution.cache_key == "query:sunglasses"
+
+
+def test_cache_key_is_shared_across_phrasings():
+    resolver = ObjectResolver()
+    resolver.sync(OBJECTS)
+
+    keys = {resolver.resolve(q).cache_key for q in ("Where are my keys?", "find my house keys", "keys")}
+    assert len(keys) == 1 and keys.pop().startswith("object:1:")
+
+
+def test_sync_only_reindexes_changed_objects():
+    resolver = ObjectResolver()
+    resolver.sync(OBJECTS, version=1)
+    assert resolver.stats["reindexed_objects"] == 4
+
+    resolver.sync(OBJECTS, version=1)
+    changed = OBJECTS[:3] + [make(5, "phone", "iphone, smartphone")]
+    changed[1] = make(2, "wallet", "card holder")
+    resolver.sync(changed, version=2)
+
+    assert resolver.stats["reindexed_objects"] == 6
+    assert resolver.resolve("where is my iphone").best.name == "phone"
+    assert resolver.resolve("mechanical keyboard").matches == []
+    assert resolver.resolve("card holder").best.name == "wallet"
+
+
+def test_search_uses_resolved_object(sqlite_db, monkeypatch):
+    client.post("/api/objects/", json={"name": "keys", "alias": "car keys, blue keychain"})
+    client.post("/api/objects/", json={"name": "blue mug", "alias": "coffee cup"})
+    queries = []
+
+    async def search_videos(query, limit=5):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(memories_api, "search_videos", search_videos)
+    response = client.post("/api/search/", json={"query": "Where is my blue car key?"})
+
+    assert response.status_code == 200
+    assert queries == ["keys car keys, blue keychain"]
+
+    resolved = client.get("/api/search/resolve", params={"q": "blue car key"}).json()
+    assert resolved["matches"][0]["object"]["name"] == "keys"
+    assert resolved["cache_key"].startswith("object:")
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models import ProcessingStatus, TrackedObjectCreate
+from services.location_buffer import location_buffer
+from services.memories_api import memories_api
+from services.prewarm import LocationPrewarmer, estimate_answer_confidence, prewarmer
+import routers.search as search_router
+import services.prewarm
+from services.sightings import SightingStore
+from services.video_catalog import VideoCatalog
+import services.video_catalog
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    calls = []
+
+    async def chat_with_video(video_no, query):
+        calls.append((video_no, query))
+        if "wallet" in query:
+            return {"response": "I cannot see a wallet in this video."}
+        return {"response": f"On the kitchen counter next to the kettle ({video_no})"}
+
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+    return calls
+
+
+@pytest.fixture
+def sightings(monkeypatch):
+    """Fresh sighting history: object ids restart with every throwaway database"""
+    store = SightingStore()
+    monkeypatch.setattr(services.prewarm, "sighting_store", store)
+    monkeypatch.setattr(search_router, "sighting_store", store)
+    return store
+
+
+@pytest.fixture
+def video_catalog(monkeypatch):
+    catalog = VideoCatalog()
+    monkeypatch.setattr(services.prewarm, "video_catalog", catalog)
+    return catalog
+
+
+def test_estimate_answer_confidence():
+    assert estimate_answer_confidence("On the desk beside the monitor.") >= 0.8
+    assert estimate_answer_confidence("I can't see any keys in this video.") == 0.0
+    assert estimate_answer_confidence("") == 0.0
+
+
+class TestLocationPrewarmer:
+    def test_prewarm_video_stores_confident_answers(self, sqlite_db, fake_chat, video_catalog):
+        async def scenario():
+            await sqlite_db.create_tracked_object(TrackedObjectCreate(name="keys", alias="car keys"))
+            await sqlite_db.create_tracked_object(TrackedObjectCreate(name="wallet", alias="billfold"))
+            video_catalog.register_upload("vid_pw_1", "kitchen.mp4", ProcessingStatus.COMPLETED)
+            warmer = LocationPrewarmer(rate_per_second=100, concurrency=2)
+            await warmer.prewarm_video("vid_pw_1")
+            await location_buffer.stop()
+            return warmer
+
+        warmer = asyncio.run(scenario())
+        keys, wallet = sorted(asyncio.run(sqlite_db.get_tracked_objects()), key=lambda o: o.name)
+        assert warmer.lookup(keys.id)["video_no"] == "vid_pw_1"
+        assert warmer.lookup(wallet.id) is None
+        assert warmer.stats["negative_answers"] == 1
+        assert len(fake_chat) == 2
+        # Stored answers also reach the database through the write-behind buffer
+        assert "kitchen counter" in keys.location_phrase
+
+    def test_backfill_uses_recent_processed_videos(self, sqlite_db, fake_chat, video_catalog):
+        async def scenario():
+            video_catalog.register_upload("vid_pw_old", "old.mp4", ProcessingStatus.COMPLETED)
+            video_catalog.register_upload("vid_pw_new", "new.mp4", ProcessingStatus.COMPLETED)
+            video_catalog.get("vid_pw_old").uploaded_at = datetime(2024, 1, 1)
+            video_catalog.register_upload("vid_pw_pending", "pending.mp4")
+            obj = await sqlite_db.create_tracked_object(TrackedObjectCreate(name="phone", alias="iphone"))
+            warmer = LocationPrewarmer(rate_per_second=100, backfill_videos=2)
+            await warmer.backfill_object(obj)
+            await location_buffer.stop()
+            return warmer, obj
+
+        warmer, obj = asyncio.run(scenario())
+        assert {video for video, _ in fake_chat} == {"vid_pw_old", "vid_pw_new"}
+        assert warmer.lookup(obj.id)["video_no"] == "vid_pw_new"
+
+    def test_search_serves_precomputed_location(self, sqlite_db, sightings, monkeypatch):
+        obj = client.post("/api/objects/", json={"name": "glasses", "alias": "reading glasses"}).json()
+        monkeypatch.setitem(prewarmer.precomputed, obj["id"], {
+            "location": "on the nightstand", "confidence": 0.85, "video_no": "vid_pw_2",
+            "timestamp": 1000, "computed_at": 0,
+        })
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("upstream should not be called")
+
+        monkeypatch.setattr(memories_api, "search_videos", fail)
+        response = client.post("/api/search/", json={"query": "Where are my glasses?"})
+
+        assert response.status_code == 200
+        assert response.json()["location"] == "on the nightstand"
+
+    def test_newer_search_sighting_supersedes_precomputed(self, sqlite_db, sightings, monkeypatch):
+        obj = client.post("/api/objects/", json={"name": "umbrella", "alias": "brolly"}).json()
+        monkeypatch.setitem(prewarmer.precomputed, obj["id"], {
+            "location": "by the front door", "confidence": 0.85, "video_no": "vid_pw_3",
+            "timestamp": 1000, "computed_at": 0,
+        })
+        searches = []
+
+        async def search_videos(query, limit=5):
+            searches.append(query)
+            return [{"videoNo": "vid_pw_4", "score": 0.9, "timestamp": 2000}]
+
+        catalog = VideoCatalog()
+        catalog.register_upload("vid_pw_4", "hallway.mp4", ProcessingStatus.COMPLETED)
+        monkeypatch.setattr(services.video_catalog, "video_catalog", catalog)
+        monkeypatch.setattr(services.prewarm, "video_catalog", catalog)
+        monkeypatch.setattr(search_router, "video_catalog", catalog)
+
+        async def chat_with_video(video_no, query):
+            return {"response": "In the hallway closet"}
+
+        monkeypatch.setattr(memories_api, "search_videos", search_videos)
+        monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+        # A scoped search can't use the precomputed answer and records the newer sighting...
+        scoped = client.post("/api/search/", json={"query": "Where is my umbrella?", "since": "1970-01-01T00:00:00"})
+        # Stamped with the video's upload time, like a prewarmed answer would be, not the hit's own clock
+        assert scoped.status_code == 200
+        assert scoped.json()["timestamp"] == catalog.seen_at(catalog.get("vid_pw_4"))
+
+        # ...after which an unscoped search no longer serves the older precomputed answer
+        response = client.post("/api/search/", json={"query": "Where is my umbrella?"})
+        assert response.json()["location"] == "In the hallway closet"
+        assert obj["id"] not in prewarmer.precomputed
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.profiling import LoopLagMonitor, MemoryTracker, SamplingProfiler
+
+client = TestClient(app)
+
+
+def busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapses_stacks_of_target_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        profile = SamplingProfiler().sample(0.2, interval=0.002, thread_id=worker.ident)
+    finally:
+        stop.set()
+        worker.join()
+
+    collapsed = SamplingProfiler.collapsed(profile)
+    assert profile["samples"] > 10
+    assert all(line.startswith("busy;") for line in collapsed.strip().split("\n"))
+    assert "test_profiling.py:busy_worker" in collapsed
+
+
+def test_profile_endpoint_returns_collapsed_file():
+    response = client.post("/api/admin/profile?seconds=0.1&interval_ms=5")
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    assert response.text.strip()
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+def test_loop_lag_monitor_captures_blocking_stack():
+    monitor = LoopLagMonitor(threshold=0.1, interval=0.02)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    stats = monitor.get_stats()
+    assert stats["stalls"] == 1
+    stall = stats["recent_stalls"][0]
+    assert stall["duration_seconds"] >= 0.2
+    assert any("blocking_call" in line for line in stall["stack"])
+    assert stats["max_lag_seconds"] >= 0.2
+
+
+def test_memory_diff_reports_growth():
+    tracker = MemoryTracker()
+    tracker.start_baseline()
+    try:
+        retained = [bytearray(1024) for _ in range(2000)]
+        diff = tracker.diff(limit=5)
+    finally:
+        tracker.stop()
+
+    assert len(retained) == 2000
+    assert diff["top_growth"][0]["size_diff_bytes"] > 1_000_000
+    assert "test_profiling.py" in diff["top_growth"][0]["location"]
+
+
+def test_memory_diff_requires_baseline():
+    response = client.get("/api/admin/memory/diff")
+    assert response.status_code == 409
@@ -0,0 +1,102 @@
+import os
+import time
+
+from services.sightings import _SIGHTING_RECORD, SightingStore
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+
+def populated_store(path=None) -> SightingStore:
+    store = SightingStore(path=path)
+    base = 10 * DAY_MS
+    store.record(1, "v1", "on the desk", 0.9, base + 1 * HOUR_MS)
+    store.record(1, "v2", "in the drawer", 0.8, base + 2 * HOUR_MS)
+    store.record(1, "v3", "on the desk", 0.7, base + DAY_MS + HOUR_MS)
+    # Older video searched later lands in the right place
+    store.record(1, "v0", "on the couch", 0.6, base + 30 * 60 * 1000)
+    store.record(2, "v1", "on the shelf", 0.9, base + 1 * HOUR_MS)
+    return store
+
+
+class TestSightingStore:
+    def test_range_query_is_newest_first_and_bounded(self):
+        store = populated_store()
+        base = 10 * DAY_MS
+
+        day_one = store.query(1, base, base + DAY_MS - 1)
+        assert [s["location"] for s in day_one] == ["in the drawer", "on the desk", "on the couch"]
+        assert store.query(1, limit=1)[0]["video_no"] == "v3"
+        assert store.query(3) == []
+
+    def test_frequent_locations(self):
+        store = populated_store()
+        top = store.frequent_locations(1, k=2)
+        assert top[0]["location"] == "on the desk"
+        assert top[0]["count"] == 2
+        assert top[0]["last_seen"] == 11 * DAY_MS + HOUR_MS
+        assert len(top) == 2
+
+    def test_interns_repeated_strings(self):
+        store = populated_store()
+        assert store.count == 5
+        assert len(store.phrases) == 4
+        assert store.get_stats()["partitions"] == 2
+
+    def test_log_round_trip_and_forget(self, tmp_path):
+        path = str(tmp_path / "sightings.log")
+        store = populated_store(path)
+        store.forget(2)
+        store.close()
+
+        assert store.count == 4
+        reloaded = SightingStore(path=path)
+        assert reloaded.count == 4
+        assert reloaded.query(1, limit=10) == populated_store().query(1, limit=10)
+        assert reloaded.query(2) == []
+
+    def test_workers_sharing_a_log_see_each_others_sightings(self, tmp_path):
+        path = str(tmp_path / "sightings.log")
+        first, second = SightingStore(path=path), SightingStore(path=path)
+        # Each worker interns its own strings in its own order
+        first.record(1, "v1", "on the desk", 0.9, 1000)
+        second.record(1, "v2", "in the drawer", 0.8, 2000)
+        second.record(1, "v3", "on the desk", 0.7, 3000)
+        first.record(2, "v4", "on the shelf", 0.6, 4000)
+
+        assert first.frequent_locations(1)[0] == {"location": "on the desk", "count": 2, "share": 0.6667,
+                                                  "last_seen": 3000}
+        assert [s["location"] for s in second.query(2)] == ["on the shelf"]
+        second.forget(2)
+        assert first.query(2) == [] and first.count == second.count == 3
+        first.close()
+        second.close()
+
+        reloaded = SightingStore(path=path)
+        assert [(s["video_no"], s["location"]) for s in reloaded.query(1)] == \
+            [("v3", "on the desk"), ("v2", "in the drawer"), ("v1", "on the desk")]
+
+    def test_torn_trailing_record_is_truncated(self, tmp_path):
+        path = str(tmp_path / "sightings.log")
+        store = populated_store(path)
+        store.close()
+        complete = os.path.getsize(path)
+        with open(path, "ab") as log:
+            # The header of a sighting whose location text never made it to disk
+            log.write(_SIGHTING_RECORD.pack(b"R", 7, 99, 1, 0.5, 40, 2) + b"on the")
+
+        reloaded = SightingStore(path=path)
+        assert reloaded.count == 5 and os.path.getsize(path) == complete
+        reloaded.record(3, "v9", "by the door", 0.9, 1)
+        reloaded.close()
+        assert SightingStore(path=path).query(3)[0]["location"] == "by the door"
+
+    def test_range_query_scales_with_result_size(self):
+        store = SightingStore()
+        for i in range(200_000):
+            store.record(i % 500, f"v{i % 97}", f"spot {i % 40}", 0.5, i * 60_000)
+
+        start = time.perf_counter()
+        results = store.query(7, 100 * DAY_MS, 101 * DAY_MS)
+        assert time.perf_counter() - start < 0.01
+        assert results and all(100 * DAY_MS <= s["timestamp"] <= 101 * DAY_MS for s in results)
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+from fastapi import UploadFile
+
+from services.transcode import FFmpegTranscoder, NoopTranscoder, TranscodeStage
+
+VIDEO = b"\x00\x00\x00\x18ftypmp42" + bytes(range(256)) * 64
+
+
+class ScriptTranscoder:
+    """Stands in for ffmpeg: keeps the given fraction of the source bytes, or fails"""
+
+    name = "script"
+    enabled = True
+
+    def __init__(self, keep: float = 0.5, fail: bool = False):
+        self.keep = keep
+        self.fail = fail
+
+    def command(self, source, target):
+        script = ("import sys; data = open(sys.argv[1], 'rb').read(); "
+                  f"open(sys.argv[2], 'wb').write(data[:int(len(data) * {self.keep})]); "
+                  f"sys.exit({1 if self.fail else 0})")
+        return [sys.executable, "-c", script, source, target]
+
+
+def _upload(data=VIDEO, name="clip.mov"):
+    return UploadFile(file=io.BytesIO(data), filename=name, size=len(data))
+
+
+async def _prepare_async(stage, file):
+    async with stage.prepare(file) as upload:
+        sent = upload.stream.read()
+        return upload.filename, upload.upload_bytes, sent, getattr(upload.stream, "name", None)
+
+
+def _prepare(stage, file):
+    try:
+        return asyncio.run(_prepare_async(stage, file))
+    finally:
+        stage.shutdown()
+
+
+def test_smaller_transcode_is_uploaded_and_cleaned_up():
+    stage = TranscodeStage(ScriptTranscoder(keep=0.5), workers=1, min_bytes=1024)
+    filename, upload_bytes, sent, path = _prepare(stage, _upload())
+
+    assert filename == "clip.mp4" and upload_bytes == len(VIDEO) // 2
+    assert sent == VIDEO[:len(VIDEO) // 2]
+    assert not os.path.exists(path)
+    stats = stage.get_stats()
+    assert stats["transcoded"] == 1 and stats["bytes_saved"] == len(VIDEO) - len(VIDEO) // 2
+    assert stats["saved_percent"] == 50.0
+
+
+def test_original_is_uploaded_when_transcoding_does_not_help():
+    for transcoder, counter in ((ScriptTranscoder(fail=True), "failures"),
+                                (ScriptTranscoder(keep=1.0), "kept_original")):
+        stage = TranscodeStage(transcoder, workers=1, min_bytes=1024)
+        filename, upload_bytes, sent, _ = _prepare(stage, _upload())
+        assert (filename, upload_bytes, sent) == ("clip.mov", len(VIDEO), VIDEO)
+        assert stage.stats[counter] == 1 and stage.stats["bytes_saved"] == 0
+
+
+def test_small_files_and_noop_skip_the_transcoder():
+    small = TranscodeStage(ScriptTranscoder(), min_bytes=len(VIDEO) + 1)
+    assert _prepare(small, _upload())[2] == VIDEO
+    assert small.stats["skipped_small"] == 1
+
+    noop = TranscodeStage(NoopTranscoder(), min_bytes=0)
+    assert _prepare(noop, _upload())[:2] == ("clip.mov", len(VIDEO))
+    assert noop._slots is None and noop.get_stats()["transcoder"] == "none"
+
+
+def test_cancelled_upload_kills_the_transcoder(tmp_path):
+    pid_file = tmp_path / "pid"
+
+    class HangingTranscoder(ScriptTranscoder):
+        def command(self, source, target):
+            script = f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); time.sleep(60)"
+            return [sys.executable, "-c", script]
+
+    stage = TranscodeStage(HangingTranscoder(), workers=1, min_bytes=1024)
+
+    async def scenario():
+        upload = asyncio.ensure_future(_prepare_async(stage, _upload()))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.01)
+        upload.cancel()
+        await asyncio.gather(upload, return_exceptions=True)
+        return int(pid_file.read_text())
+
+    pid = asyncio.run(asyncio.wait_for(scenario(), 10))
+    # Killed and reaped, not left running until its own 60s sleep ends
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+    assert not stage._running
+
+
+def test_ffmpeg_command_caps_resolution_frame_rate_and_bitrate():
+    args = FFmpegTranscoder(max_short_side=480, max_fps=24, video_bitrate="1M").command("in.mov", "out.mp4")
+
+    assert args[args.index("-i") + 1] == "in.mov" and args[-1] == "out.mp4"
+    assert "min(ih,480)" in args[args.index("-vf") + 1]
+    assert args[args.index("-fpsmax") + 1] == "24" and args[args.index("-b:v") + 1] == "1M"
@@ -0,0 +1,114 @@
+import asyncio
+import io
+import time
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+import routers.upload
+from main import app
+from services.memories_api import memories_api
+from services.video_catalog import video_catalog
+from utils.deadline import DeadlineExceeded
+
+client = TestClient(app)
+
+MP4 = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom" + b"\x00" * 512
+
+
+def test_batch_upload_runs_transfers_concurrently(monkeypatch):
+    state = {"active": 0, "peak": 0}
+
+    async def slow_upload(file):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.2)
+        state["active"] -= 1
+        return {"video_no": f"batch_{file.filename}", "status": "processing", "message": "Upload successful"}
+
+    monkeypatch.setattr(memories_api, "upload_video", slow_upload)
+    monkeypatch.setattr(routers.upload, "UPLOAD_BATCH_CONCURRENCY", 3)
+
+    files = [("files", (f"room{i}.mp4", MP4, "video/mp4")) for i in range(6)]
+    started = time.monotonic()
+    response = client.post("/api/upload/batch", files=files)
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uploaded"] == 6 and body["failed"] == 0
+    assert [item["video_no"] for item in body["results"]] == [f"batch_room{i}.mp4" for i in range(6)]
+    assert state["peak"] == 3
+    # Two waves of three, not six sequential round trips
+    assert elapsed < 1.0
+    assert video_catalog.get("batch_room0.mp4").status.value == "processing"
+
+
+def test_batch_upload_reports_per_file_failures(monkeypatch):
+    async def flaky_upload(file):
+        if file.filename == "broken.mp4":
+            raise ConnectionError("upstream reset")
+        return {"video_no": f"mock_{file.filename}", "status": "processing", "message": "Upload successful"}
+
+    monkeypatch.setattr(memories_api, "upload_video", flaky_upload)
+    files = [
+        ("files", ("good.mp4", MP4, "video/mp4")),
+        ("files", ("broken.mp4", MP4, "video/mp4")),
+    ]
+    response = client.post("/api/upload/batch", files=files)
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["uploaded"] == 1 and body["failed"] == 1
+    assert body["results"][1] == {"file_name": "broken.mp4", "success": False, "video_no": None,
+                                  "message": "Upload failed", "file_size": len(MP4)}
+
+
+def test_batch_upload_rejects_non_video_while_streaming():
+    files = [
+        ("files", ("good.mp4", MP4, "video/mp4")),
+        ("files", ("notes.mp4", b"just some text " * 4, "video/mp4")),
+    ]
+    response = client.post("/api/upload/batch", files=files)
+    assert response.status_code == 400
+    assert "Invalid file type" in response.json()["message"]
+
+
+def test_batch_upload_limits_file_count(monkeypatch):
+    files = [("files", (f"clip{i}.mp4", MP4, "video/mp4")) for i in range(routers.upload.UPLOAD_BATCH_MAX_FILES + 1)]
+    response = client.post("/api/upload/batch", files=files)
+    assert response.status_code == 400
+    assert "Too many files" in response.json()["message"]
+
+
+def test_deadline_on_one_file_cancels_the_rest(monkeypatch):
+    state = {"finished": [], "cancelled": []}
+
+    async def upload(file):
+        if file.filename == "late.mp4":
+            await asyncio.sleep(0.05)
+            raise DeadlineExceeded("request deadline exceeded")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            state["cancelled"].append(file.filename)
+            raise
+        state["finished"].append(file.filename)
+        return {"video_no": f"batch_{file.filename}", "status": "processing", "message": "Upload successful"}
+
+    monkeypatch.setattr(memories_api, "upload_video", upload)
+    monkeypatch.setattr(routers.upload, "UPLOAD_BATCH_CONCURRENCY", 4)
+
+    files = [UploadFile(file=io.BytesIO(MP4), filename=name, size=len(MP4),
+                        headers=Headers({"content-type": "video/mp4"}))
+             for name in ("a.mp4", "late.mp4", "b.mp4", "c.mp4")]
+
+    async def scenario():
+        with pytest.raises(DeadlineExceeded):
+            await routers.upload.upload_video_batch(files=files, room=None)
+        # Checked before the loop closes and would cancel stragglers itself
+        return sorted(state["cancelled"])
+
+    assert asyncio.run(scenario()) == ["a.mp4", "b.mp4", "c.mp4"] and state["finished"] == []
@@ -0,0 +1,99 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.memories_api import memories_api
+from utils.upload_guard import UploadGuardMiddleware, sniff_container
+
+client = TestClient(app)
+
+MP4_HEAD = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+BOUNDARY = b"guardtest"
+
+
+def multipart_chunks(filename: str, payload_chunks):
+    yield (b"--" + BOUNDARY + b"\r\n"
+           b'Content-Disposition: form-data; name="file"; filename="' + filename.encode() + b'"\r\n'
+           b"Content-Type: video/mp4\r\n\r\n")
+    yield from payload_chunks
+    yield b"\r\n--" + BOUNDARY + b"--\r\n"
+
+
+def run_guard(chunks, content_length=None, max_file_size=1024):
+    """Drive the guard with a streamed body; returns (status, body chunks pulled, app saw disconnect)"""
+    chunks = list(chunks)
+    state = {"pulled": 0, "disconnected": False, "sent": []}
+
+    async def inner_app(scope, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                state["disconnected"] = True
+                raise RuntimeError("client went away")
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        index = state["pulled"]
+        state["pulled"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index < len(chunks) - 1}
+
+    async def send(message):
+        state["sent"].append(message)
+
+    headers = [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/api/upload", "headers": headers}
+    guard = UploadGuardMiddleware(inner_app, max_file_size=max_file_size)
+    asyncio.run(guard(scope, receive, send))
+    return state["sent"][0]["status"], state["pulled"], state["disconnected"], state["sent"][0]["headers"]
+
+
+def test_sniff_container():
+    assert sniff_container(MP4_HEAD) == "mp4"
+    assert sniff_container(b"RIFF\x00\x10\x00\x00AVI LIST") == "avi"
+    assert sniff_container(b"\x1a\x45\xdf\xa3\x01\x00\x00\x00\x00\x00\x00\x1f") == "matroska"
+    assert sniff_container(b"FLV\x01\x05\x00\x00\x00\x09\x00\x00\x00") == "flv"
+    assert sniff_container(b"This is not a video") is None
+
+
+def test_rejects_from_content_length_without_reading_body():
+    status, pulled, _, headers = run_guard(multipart_chunks("big.mp4", [MP4_HEAD]), content_length=10**9)
+    assert status == 413
+    assert pulled == 0
+    assert (b"connection", b"close") in headers
+
+
+def test_rejects_bad_magic_on_first_chunk():
+    payload = [b"#!/bin/sh echo definitely not a video"] + [b"x" * 256] * 20
+    status, pulled, disconnected, _ = run_guard(multipart_chunks("evil.mp4", payload), max_file_size=10**6)
+    assert status == 400
+    assert disconnected is True
+    assert pulled == 2
+
+
+def test_rejects_oversized_stream_without_content_length():
+    payload = [MP4_HEAD] + [b"\x00" * 512] * 10
+    status, pulled, disconnected, _ = run_guard(multipart_chunks("long.mp4", payload), max_file_size=1024)
+    assert status == 413
+    assert disconnected is True
+    assert pulled < 12
+
+
+def test_valid_video_passes_through_app(monkeypatch):
+    async def fake_upload(file):
+        return {"video_no": "mock_guard_ok", "status": "processing", "message": "ok"}
+
+    monkeypatch.setattr(memories_api, "upload_video", fake_upload)
+    response = client.post("/api/upload", files={"file": ("clip.mp4", MP4_HEAD + b"\x00" * 1024, "video/mp4")})
+    assert response.status_code == 200
+    assert response.json()["video_no"] == "mock_guard_ok"
+
+
+def test_renamed_text_file_is_rejected_by_app():
+    response = client.post("/api/upload", files={"file": ("notes.mp4", b"plain text " * 10, "video/mp4")})
+    assert response.status_code == 400
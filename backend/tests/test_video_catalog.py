@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from main import app
+from models import ProcessingStatus
+from services.location_buffer import location_buffer
+from services.memories_api import memories_api
+from services.prewarm import prewarmer
+import routers.search
+from services.sightings import SightingStore
+from services.video_catalog import VideoCatalog, video_catalog
+
+client = TestClient(app)
+
+MP4 = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom" + b"\x00" * 512
+
+
+def _catalog_with(catalog, uploads):
+    """uploads: video_no -> (room, hours ago)"""
+    for video_no, (room, hours_ago) in uploads.items():
+        record = catalog.register_upload(video_no, f"{video_no}.mp4", ProcessingStatus.COMPLETED, room=room)
+        catalog.videos[video_no] = record.model_copy(
+            update={"uploaded_at": datetime.now() - timedelta(hours=hours_ago)})
+    return catalog
+
+
+def test_recent_footage_outranks_slightly_better_old_hit():
+    catalog = _catalog_with(VideoCatalog(recency_weight=0.3, recency_half_life_hours=24),
+                            {"old": ("kitchen", 24 * 14), "new": ("hallway", 1)})
+    hits = [{"videoNo": "old", "score": 0.9}, {"videoNo": "unknown", "score": 0.85},
+            {"videoNo": "new", "score": 0.8}]
+
+    assert [hit["videoNo"] for hit, _ in catalog.rank_hits(hits)] == ["new", "old", "unknown"]
+    assert catalog.stats["reordered"] == 1
+
+    # With recency switched off only the upstream score counts
+    catalog.recency_weight = 0.0
+    assert [hit["videoNo"] for hit, _ in catalog.rank_hits(hits)] == ["old", "unknown", "new"]
+
+
+def test_room_and_time_window_filter_hits():
+    catalog = _catalog_with(VideoCatalog(), {"k1": ("kitchen", 48), "k2": ("Kitchen", 2), "h1": ("hallway", 1)})
+    hits = [{"videoNo": v, "score": 0.9} for v in ("k1", "k2", "h1", "unknown")]
+
+    assert [hit["videoNo"] for hit, _ in catalog.rank_hits(hits, room="KITCHEN")] == ["k2", "k1"]
+    since = datetime.now() - timedelta(hours=24)
+    assert [hit["videoNo"] for hit, _ in catalog.rank_hits(hits, since=since)] == ["h1", "k2"]
+    assert catalog.rank_hits(hits, room="garage") == []
+    assert catalog.rooms() == ["hallway", "kitchen"]
+
+
+def test_upload_room_scopes_search(sqlite_db, monkeypatch):
+    monkeypatch.setattr(video_catalog, "videos", {})
+    monkeypatch.setattr(prewarmer, "precomputed", {})
+    uploads = iter(["vid_kitchen", "vid_bedroom"])
+
+    async def upload_video(file):
+        return {"video_no": next(uploads), "status": "processing", "message": "Upload successful"}
+
+    async def search_videos(query, limit=5):
+        return [{"videoNo": "vid_bedroom", "score": 0.9}, {"videoNo": "vid_kitchen", "score": 0.7}]
+
+    chat_calls = []
+
+    async def chat_with_video(video_no, query):
+        chat_calls.append(video_no)
+        return {"response": f"On the counter in {video_no}."}
+
+    monkeypatch.setattr(memories_api, "upload_video", upload_video)
+    monkeypatch.setattr(memories_api, "search_videos", search_videos)
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+
+    kitchen = client.post("/api/upload", files={"file": ("a.mp4", MP4, "video/mp4")}, data={"room": " Kitchen "})
+    assert kitchen.json()["room"] == "kitchen"
+    client.post("/api/upload", files={"file": ("b.mp4", MP4, "video/mp4")}, data={"room": "bedroom"})
+    assert client.get("/api/upload/status/vid_bedroom").json()["room"] == "bedroom"
+    client.post("/api/objects/", json={"name": "mug", "alias": "blue coffee mug"})
+
+    response = client.post("/api/search/", json={"query": "Where is my mug?", "room": "kitchen"}).json()
+    assert response["found"] and response["video_no"] == "vid_kitchen" and response["room"] == "kitchen"
+
+    missing = client.post("/api/search/", json={"query": "Where is my mug?", "room": "garage"}).json()
+    assert missing["found"] is False
+    assert chat_calls == ["vid_kitchen"]
+    assert client.get("/api/search/suggestions").json()["rooms"] == ["bedroom", "kitchen"]
+
+
+def test_time_scoped_search_does_not_move_the_object(sqlite_db, monkeypatch):
+    monkeypatch.setattr(video_catalog, "videos", {})
+    _catalog_with(video_catalog, {"vid_now": ("garage", 1), "vid_last_month": ("garage", 24 * 30)})
+    monkeypatch.setattr(prewarmer, "precomputed", {})
+    sightings = SightingStore()
+    monkeypatch.setattr(routers.search, "sighting_store", sightings)
+    # Object ids restart with the throwaway database; drop updates other tests left queued
+    monkeypatch.setattr(location_buffer, "pending", {})
+    monkeypatch.setattr(location_buffer, "in_flight", {})
+
+    async def search_videos(query, limit=5):
+        return [{"videoNo": "vid_now", "score": 0.9}, {"videoNo": "vid_last_month", "score": 0.9}]
+
+    async def chat_with_video(video_no, query):
+        return {"response": f"On the shelf in {video_no}."}
+
+    monkeypatch.setattr(memories_api, "search_videos", search_videos)
+    monkeypatch.setattr(memories_api, "chat_with_video", chat_with_video)
+    drill = client.post("/api/objects/", json={"name": "drill", "alias": "cordless drill"}).json()
+
+    until = (datetime.now() - timedelta(days=7)).isoformat()
+    historical = client.post("/api/search/", json={"query": "Where was my drill?", "until": until}).json()
+    assert historical["video_no"] == "vid_last_month"
+
+    # Last month's answer is kept as a sighting, not made where the drill is now
+    assert client.get("/api/objects/").json()[0]["location_phrase"] is None
+    assert sightings.query(drill["id"], limit=1)[0]["video_no"] == "vid_last_month"
+
+    current = client.post("/api/search/", json={"query": "Where is my drill?"}).json()
+    assert current["video_no"] == "vid_now"
+    assert client.get("/api/objects/").json()[0]["location_phrase"] == "On the shelf in vid_now."
+
+
+def test_workers_sharing_a_catalog_log_see_each_others_updates(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    uploader, webhook_worker = VideoCatalog(path=path), VideoCatalog(path=path)
+    uploader.register_upload("v1", "kitchen.mp4", room="Kitchen")
+    # The processing callback lands on the other worker
+    webhook_worker.mark_status("v1", ProcessingStatus.COMPLETED)
+
+    record = uploader.get("v1")
+    assert (record.status, record.room, record.file_name) == (ProcessingStatus.COMPLETED, "kitchen", "kitchen.mp4")
+    uploader.close()
+    webhook_worker.close()
+
+    restarted = VideoCatalog(path=path)
+    assert restarted.get("v1").status == ProcessingStatus.COMPLETED and restarted.rooms() == ["kitchen"]
+
+
+def test_only_other_workers_outcomes_reach_listeners(tmp_path):
+    path = str(tmp_path / "catalog.jsonl")
+    search_worker, webhook_worker = VideoCatalog(path=path), VideoCatalog(path=path)
+    seen, own = [], []
+    search_worker.on_outcome(seen.append)
+    webhook_worker.on_outcome(own.append)
+    search_worker.register_upload("v1", "kitchen.mp4")
+    webhook_worker.mark_status("v1", ProcessingStatus.COMPLETED)
+
+    for _ in range(2):
+        search_worker.sync()
+        webhook_worker.sync()
+    assert [(record.video_no, record.status) for record in seen] == [("v1", ProcessingStatus.COMPLETED)]
+    assert own == []
+    search_worker.close()
+    webhook_worker.close()
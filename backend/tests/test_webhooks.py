@@ -0,0 +1,98 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import routers.search
+from main import app
+from models import ProcessingStatus
+from routers.webhooks import invalidate_caches, sign_payload, SIGNATURE_HEADER, TIMESTAMP_HEADER
+from services.video_catalog import VideoCatalog, video_catalog
+from utils.events import event_bus, VIDEO_PROCESSED
+from utils.performance import search_cache
+
+client = TestClient(app)
+SECRET = "test-secret"
+
+
+def signed_post(payload, secret=SECRET, timestamp=None):
+    body = json.dumps(payload).encode()
+    timestamp = timestamp or str(int(time.time()))
+    return client.post("/api/webhooks/memories", content=body, headers={
+        "Content-Type": "application/json",
+        TIMESTAMP_HEADER: timestamp,
+        SIGNATURE_HEADER: sign_payload(secret, timestamp, body),
+    })
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setenv("MEMORIES_WEBHOOK_SECRET", SECRET)
+    search_cache.clear()
+    yield
+    search_cache.clear()
+
+
+class TestMemoriesWebhook:
+    def test_rejects_bad_or_stale_signatures(self):
+        assert signed_post({"videoNo": "v1", "status": "completed"}, secret="wrong").status_code == 401
+        stale = str(int(time.time()) - 3600)
+        assert signed_post({"videoNo": "v1", "status": "completed"}, timestamp=stale).status_code == 401
+
+    def test_completion_updates_catalog_invalidates_cache_and_emits(self):
+        search_cache.set("search_keys_3", [{"videoNo": "old"}])
+        events = []
+        event_bus.subscribe(VIDEO_PROCESSED, events.append)
+        try:
+            response = signed_post({"videoNo": "video_42", "status": "completed"})
+        finally:
+            event_bus.unsubscribe(VIDEO_PROCESSED, events.append)
+
+        assert response.status_code == 200
+        assert response.json()["cache_entries_invalidated"] == 1
+        assert video_catalog.get("video_42").status.value == "completed"
+        assert [event["video_no"] for event in events] == ["video_42"]
+
+        status = client.get("/api/upload/status/video_42").json()
+        assert status["status"] == "completed"
+
+    def test_failure_only_invalidates_entries_for_that_video(self):
+        search_cache.set("search_keys_3", [{"videoNo": "bad_video"}])
+        search_cache.set("search_wallet_3", [{"videoNo": "good_video"}])
+
+        response = signed_post({"videoNo": "bad_video", "status": "failed", "error": "corrupt file"})
+
+        assert response.json()["cache_entries_invalidated"] == 1
+        assert search_cache.get("search_wallet_3") is not None
+        assert video_catalog.get("bad_video").error == "corrupt file"
+
+    def test_unknown_status_is_rejected(self):
+        assert signed_post({"videoNo": "v1", "status": "exploded"}).status_code == 400
+
+    def test_status_for_unknown_video_is_404(self):
+        assert client.get("/api/upload/status/never_uploaded").status_code == 404
+
+    def test_mock_status_reads_create_no_records(self):
+        before = len(video_catalog.videos)
+        status = client.get("/api/upload/status/mock_crafted_123").json()
+        assert status["status"] == "completed"
+        assert len(video_catalog.videos) == before and video_catalog.get("mock_crafted_123") is None
+
+
+def test_callbacks_handled_by_another_worker_invalidate_this_workers_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalog.jsonl")
+    this_worker, webhook_worker = VideoCatalog(path=path), VideoCatalog(path=path)
+    this_worker.on_outcome(lambda record: invalidate_caches(record.video_no, record.status, record.household_id))
+    monkeypatch.setattr(routers.search, "video_catalog", this_worker)
+    this_worker.register_upload("v_remote", "hall.mp4")
+    search_cache.set("search_keys_3", [{"videoNo": "old"}])
+
+    # The processing callback lands on the other worker; the next search here sees it
+    webhook_worker.mark_status("v_remote", ProcessingStatus.COMPLETED)
+    client.post("/api/search/", json={"query": "Where are my keys?"})
+
+    assert search_cache.get("search_keys_3") is None
+    assert this_worker.videos["v_remote"].status == ProcessingStatus.COMPLETED
+    this_worker.close()
+    webhook_worker.close()
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+HEALTH, CHEAP, EXPENSIVE, STREAM = "health", "cheap", "expensive", "stream"
+
+# Paths answered without any admission check
+HEALTH_PATHS = ("/health", "/livez", "/readyz")
+# Routes that wait on Memories.ai and can hold a worker for minutes
+EXPENSIVE_PREFIXES = ("/api/search", "/api/upload")
+# Long-lived responses (SSE, exports) and bulk imports: cheap per byte, but open for minutes
+STREAM_ROUTES = (("GET", "/api/admin/metrics/stream"), ("GET", "/api/objects/export"), ("POST", "/api/objects/bulk"))
+
+def classify_request(method: str, path: str) -> str:
+    if path in HEALTH_PATHS:
+        return HEALTH
+    if (method, path.rstrip("/")) in STREAM_ROUTES:
+        return STREAM
+    if path.startswith(EXPENSIVE_PREFIXES) and method not in ("GET", "HEAD", "OPTIONS"):
+        return EXPENSIVE
+    return CHEAP
+
+class RouteClass:
+    """In-flight limit and FIFO wait queue for one class of routes"""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, max_queue_wait: float,
+                 track_latency: bool = True):
+        self.name = name
+        # Off for streams: how long a client keeps one open says nothing about queueing delay
+        self.track_latency = track_latency
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Exponentially weighted service time, used to predict queueing delay
+        self.ewma_latency = 0.0
+        self.latencies: Deque[float] = deque(maxlen=512)
+        self.queue_waits: Deque[float] = deque(maxlen=512)
+        self.stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_wait": 0, "completed": 0}
+
+    def expected_wait(self, position: int) -> float:
+        """Rough time until the request at `position` in the queue gets a slot"""
+        latency = self.ewma_latency or 0.0
+        return latency * (position + 1) / max(1, self.max_in_flight)
+
+    def release(self, latency: float):
+        self.stats["completed"] += 1
+        if self.track_latency:
+            self.latencies.append(latency)
+            self.ewma_latency = latency if not self.ewma_latency else 0.8 * self.ewma_latency + 0.2 * latency
+        self.pass_slot()
+
+    def pass_slot(self):
+        """Hand a finished request's slot straight to the oldest live waiter"""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)], 4)
+
+class Overloaded(Exception):
+    def __init__(self, route_class: str, reason: str, retry_after: int):
+        super().__init__(f"{route_class} requests are being shed ({reason})")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounds in-flight work per route class and sheds what would only queue.
+
+    Every class has its own slots, so slow expensive routes and long-lived
+    streams can never take the capacity reserved for cheap reads; health
+    checks are never queued. A request
+    is shed with 503 + Retry-After when its class queue is full or when the
+    predicted queueing delay is already longer than the class will wait.
+    """
+
+    def __init__(self, classes: Dict[str, Tuple[int, int, float]]):
+        self.classes = {
+            name: RouteClass(name, max_in_flight, max_queue, max_queue_wait, track_latency=name != STREAM)
+            for name, (max_in_flight, max_queue, max_queue_wait) in classes.items()
+        }
+        self.health_requests = 0
+
+    async def acquire(self, route_class: RouteClass):
+        if route_class.in_flight < route_class.max_in_flight and not route_class.waiters:
+            route_class.in_flight += 1
+            route_class.stats["admitted"] += 1
+            route_class.queue_waits.append(0.0)
+            return
+
+        position = len(route_class.waiters)
+        if position >= route_class.max_queue:
+            route_class.stats["shed_queue_full"] += 1
+            raise Overloaded(route_class.name, "queue full", self._retry_after(route_class, position))
+        expected = route_class.expected_wait(position)
+        if expected > route_class.max_queue_wait:
+            route_class.stats["shed_wait"] += 1
+            raise Overloaded(route_class.name, "queueing delay", self._retry_after(route_class, position))
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        route_class.stats["queued"] += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=route_class.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we gave up; pass it on
+                route_class.pass_slot()
+            else:
+                waiter.cancel()
+                try:
+                    route_class.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            route_class.stats["shed_wait"] += 1
+            raise Overloaded(route_class.name, "queueing delay", self._retry_after(route_class, position))
+        route_class.stats["admitted"] += 1
+        route_class.queue_waits.append(time.monotonic() - queued_at)
+
+    def _retry_after(self, route_class: RouteClass, position: int) -> int:
+        return max(1, math.ceil(route_class.expected_wait(position)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        classes = {}
+        for name, route_class in self.classes.items():
+            classes[name] = {
+                **route_class.stats,
+                "in_flight": route_class.in_flight,
+                "queue_depth": sum(1 for w in route_class.waiters if not w.done()),
+                "max_in_flight": route_class.max_in_flight,
+                "max_queue": route_class.max_queue,
+                "latency_ewma": round(route_class.ewma_latency, 4),
+                "latency_p50": _percentile(route_class.latencies, 50),
+                "latency_p95": _percentile(route_class.latencies, 95),
+                "queue_wait_p95": _percentile(route_class.queue_waits, 95),
+            }
+        return {"health_requests": self.health_requests, "classes": classes}
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Service-time history per class, which the queueing-delay prediction depends on"""
+        return {
+            name: {"ewma_latency": route_class.ewma_latency, "latencies": list(route_class.latencies)}
+            for name, route_class in self.classes.items()
+        }
+
+    def restore_state(self, classes: Dict[str, Any]):
+        for name, saved in classes.items():
+            route_class = self.classes.get(name)
+            if route_class is None:
+                continue
+            route_class.ewma_latency = route_class.ewma_latency or saved["ewma_latency"]
+            route_class.latencies = deque([*saved["latencies"], *route_class.latencies],
+                                          maxlen=route_class.latencies.maxlen)
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests"""
+
+    def __init__(self, app, controller: "AdmissionController"):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = classify_request(scope["method"], scope["path"])
+        route_class = self.controller.classes.get(name)
+        if route_class is None:
+            if name == HEALTH:
+                self.controller.health_requests += 1
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(route_class)
+        except Overloaded as e:
+            logger.warning(f"🚦 Shedding {scope['method']} {scope['path']}: {e}")
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error": True,
+                    "message": "Server is busy, please retry shortly",
+                    "status_code": 503,
+                    "timestamp": datetime.now().isoformat(),
+                    "path": scope["path"]
+                },
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release(time.monotonic() - started)
+
+# Global admission controller: (max in flight, max queued, max queue wait seconds)
+admission_controller = AdmissionController({
+    CHEAP: (
+        int(os.getenv("ADMISSION_CHEAP_CONCURRENCY", "64")),
+        int(os.getenv("ADMISSION_CHEAP_QUEUE", "256")),
+        float(os.getenv("ADMISSION_CHEAP_MAX_WAIT", "10")),
+    ),
+    EXPENSIVE: (
+        int(os.getenv("ADMISSION_EXPENSIVE_CONCURRENCY", "16")),
+        int(os.getenv("ADMISSION_EXPENSIVE_QUEUE", "32")),
+        float(os.getenv("ADMISSION_EXPENSIVE_MAX_WAIT", "5")),
+    ),
+    STREAM: (
+        int(os.getenv("ADMISSION_STREAM_CONCURRENCY", "16")),
+        int(os.getenv("ADMISSION_STREAM_QUEUE", "16")),
+        float(os.getenv("ADMISSION_STREAM_MAX_WAIT", "5")),
+    ),
+})
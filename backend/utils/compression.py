@@ -0,0 +1,236 @@
+import gzip
+import hashlib
+import json
+import logging
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so each chunk reaches the client as soon as it is produced
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+# encoding -> (one-shot compress(data, best), streaming compressor factory), most preferred first
+ENCODERS: Dict[str, Tuple[Callable[[bytes, bool], bytes], Callable[[], Any]]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = (lambda data, best: zstandard.ZstdCompressor(level=19 if best else 3).compress(data),
+                        lambda: _ZstdStream(3))
+if brotli is not None:
+    ENCODERS["br"] = (lambda data, best: brotli.compress(data, quality=11 if best else 5),
+                      lambda: _BrotliStream(5))
+ENCODERS["gzip"] = (lambda data, best: gzip.compress(data, compresslevel=9 if best else 6, mtime=0),
+                    lambda: _GzipStream(6))
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+def negotiate_encoding(header: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """Encoding to use for a request's Accept-Encoding, or None for identity"""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available if available is not None else ENCODERS:
+        q = accepted.get(encoding, wildcard)
+        # Ties go to the server's preference order
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+compression_stats = {"compressed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+
+COMPRESSIBLE_PREFIXES = ("application/json", "text/", "application/x-ndjson", "application/javascript",
+                         "application/xml", "image/svg+xml")
+# Never compressed: SSE must flush event by event, and compressing video wastes CPU
+EXCLUDED_TYPES = ("text/event-stream",)
+
+class CompressionMiddleware:
+    """Compresses HTTP responses with zstd, brotli or gzip, as negotiated.
+
+    Bodies smaller than ``minimum_size`` and non-text content types are sent
+    as-is, as are responses that already have a Content-Encoding or a strong
+    ETag (precomputed payloads choose their own encoding). Streamed
+    responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stats = compression_stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state: Dict[str, Any] = {"start": None, "stream": None, "passthrough": False}
+
+        async def compressing_send(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                state["passthrough"] = not self._compressible(message)
+                if state["passthrough"]:
+                    self.stats["skipped"] += 1
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if state["stream"] is None:
+                if not more_body and len(body) < self.minimum_size:
+                    self.stats["skipped"] += 1
+                    state["passthrough"] = True
+                    await send(state["start"])
+                    await send(message)
+                    return
+                if not more_body:
+                    # Whole body in one message: compress it in one go
+                    compressed = ENCODERS[encoding][0](body, False)
+                    self._record(len(body), len(compressed))
+                    await send(self._start_message(state["start"], encoding, len(compressed)))
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                state["stream"] = ENCODERS[encoding][1]()
+                await send(self._start_message(state["start"], encoding, None))
+
+            chunk = state["stream"].compress(body) if body else b""
+            if not more_body:
+                chunk += state["stream"].finish()
+            self.stats["bytes_in"] += len(body)
+            self.stats["bytes_out"] += len(chunk)
+            if not more_body:
+                self.stats["compressed"] += 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _compressible(self, start) -> bool:
+        headers = {key.lower(): value for key, value in start.get("headers", [])}
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        if b"content-encoding" in headers:
+            return False
+        etag = headers.get(b"etag", b"")
+        if etag and not etag.startswith(b"W/"):
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_PREFIXES) and not content_type.startswith(EXCLUDED_TYPES)
+
+    def _start_message(self, start, encoding: str, length: Optional[int]):
+        headers = [(key, value) for key, value in start.get("headers", [])
+                   if key.lower() not in (b"content-length", b"vary")]
+        vary = [value for key, value in start.get("headers", []) if key.lower() == b"vary"]
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**start, "headers": headers}
+
+    def _record(self, size_in: int, size_out: int):
+        self.stats["compressed"] += 1
+        self.stats["bytes_in"] += size_in
+        self.stats["bytes_out"] += size_out
+
+def get_compression_stats() -> Dict[str, Any]:
+    return {
+        **compression_stats,
+        "ratio": round(compression_stats["bytes_out"] / compression_stats["bytes_in"], 3)
+        if compression_stats["bytes_in"] else None,
+        "encodings": list(ENCODERS),
+    }
+
+class PrecomputedJSON:
+    """A constant JSON payload serialized and compressed once, served as bytes with strong ETags.
+
+    Each encoding gets its own ETag (``"<digest>-gzip"``), since the bytes
+    differ; If-None-Match with any of them answers 304.
+    """
+
+    def __init__(self, content: Any, max_age: int = 300):
+        self.body = json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:20]
+        self.max_age = max_age
+        self.variants: Dict[Optional[str], Tuple[bytes, str]] = {None: (self.body, f'"{digest}"')}
+        for encoding, (compress, _) in ENCODERS.items():
+            compressed = compress(self.body, True)
+            if len(compressed) < len(self.body):
+                self.variants[encoding] = (compressed, f'"{digest}-{encoding}"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def response(self, request: Request) -> Response:
+        encodings = [encoding for encoding in self.variants if encoding is not None]
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), encodings)
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or
+                              any(tag.strip().removeprefix("W/") in self.etags for tag in if_none_match.split(","))):
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from contextvars import Context, ContextVar, copy_context
+from datetime import datetime
+from typing import Optional
+
+import aiohttp
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "x-request-timeout"
+
+# Absolute deadline (time.monotonic()) of the request being served, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Budgets stay under the frontend's axios timeouts (30s, 2 minutes for uploads)
+# so the server gives up before the browser does. None means no deadline.
+ROUTE_DEADLINES = (
+    ("/api/search", float(os.getenv("SEARCH_DEADLINE_SECONDS", "25"))),
+    ("/api/upload/batch", float(os.getenv("UPLOAD_BATCH_DEADLINE_SECONDS", "300"))),
+    ("/api/upload", float(os.getenv("UPLOAD_DEADLINE_SECONDS", "110"))),
+    ("/api/objects/export", None),
+    ("/api/admin/metrics/stream", None),
+    ("/api/admin/profile", 90.0),
+    ("/api/objects/bulk", 300.0),
+)
+DEFAULT_DEADLINE = float(os.getenv("DEFAULT_DEADLINE_SECONDS", "30"))
+# A client may ask for less time than the route default, never more than this
+MAX_DEADLINE = 300.0
+# Timers may fire a hair before the budget is fully spent
+DEADLINE_SLACK = 0.05
+
+deadline_stats = {"deadline_exceeded": 0, "client_disconnects": 0}
+
+class DeadlineExceeded(Exception):
+    """The request ran out of its time budget"""
+
+def set_deadline(seconds: Optional[float]):
+    """Start a budget of `seconds` for the current context; returns a reset token"""
+    return _deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current budget is spent"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+def client_timeout(default: aiohttp.ClientTimeout) -> aiohttp.ClientTimeout:
+    """aiohttp timeout capped at the time left in the current request"""
+    left = remaining()
+    if left is None:
+        return default
+    check_deadline()
+    total = left if default.total is None else min(default.total, left)
+    return aiohttp.ClientTimeout(total=total, connect=default.connect,
+                                 sock_read=default.sock_read, sock_connect=default.sock_connect)
+
+def raise_if_deadline_caused(error: BaseException):
+    """Turn a timeout that happened because the budget ran out into DeadlineExceeded"""
+    if isinstance(error, DeadlineExceeded):
+        raise error
+    left = remaining()
+    if left is not None and left <= DEADLINE_SLACK:
+        raise DeadlineExceeded("Request deadline exceeded") from error
+
+def detached_context() -> Context:
+    """Copy of the current context without a deadline, for background tasks"""
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+def deadline_for(path: str, header_value: Optional[str]) -> Optional[float]:
+    budget = DEFAULT_DEADLINE
+    for prefix, seconds in ROUTE_DEADLINES:
+        if path.startswith(prefix):
+            budget = seconds
+            break
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            requested = None
+        if requested is not None and requested > 0:
+            budget = min(requested, budget if budget is not None else MAX_DEADLINE)
+    return budget
+
+def _error_response(status_code: int, message: str, path: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": True,
+            "message": message,
+            "status_code": status_code,
+            "timestamp": datetime.now().isoformat(),
+            "path": path
+        }
+    )
+
+class DeadlineMiddleware:
+    """Sets a per-request deadline and cancels the handler when it can't matter anymore.
+
+    The budget comes from the `X-Request-Timeout` header (seconds) or the route
+    default, and is visible to upstream and database calls through a contextvar.
+    The handler is cancelled when the client disconnects, and answered with 504
+    when the budget runs out before a response was started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        header_value = headers.get(DEADLINE_HEADER.encode())
+        budget = deadline_for(scope["path"], header_value.decode() if header_value else None)
+
+        inbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+        state = {"response_started": False, "response_complete": False}
+
+        async def wrapped_send(message):
+            if message["type"] == "http.response.start":
+                state["response_started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["response_complete"] = True
+            await send(message)
+
+        token = set_deadline(budget)
+        try:
+            handler = asyncio.ensure_future(self.app(scope, inbox.get, wrapped_send))
+        finally:
+            reset_deadline(token)
+        # The reader owns the real receive channel so a disconnect is seen even
+        # while the handler is busy awaiting upstream calls
+        reader = asyncio.ensure_future(self._read_messages(receive, inbox, handler, state))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(handler), timeout=budget)
+        except asyncio.TimeoutError:
+            handler.cancel()
+            await asyncio.gather(handler, return_exceptions=True)
+            deadline_stats["deadline_exceeded"] += 1
+            logger.warning(f"⏱️  {scope['method']} {scope['path']} exceeded its {budget}s deadline")
+            if not state["response_started"]:
+                await _error_response(504, "Request took too long, please try again",
+                                      scope["path"])(scope, receive, send)
+        except asyncio.CancelledError:
+            if handler.cancelled() and not state["response_complete"]:
+                # Client went away; there is nobody left to answer
+                return
+            raise
+        finally:
+            reader.cancel()
+            if not handler.done():
+                handler.cancel()
+
+    async def _read_messages(self, receive, inbox: asyncio.Queue, handler: asyncio.Future, state):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect" and not state["response_complete"] and not handler.done():
+                deadline_stats["client_disconnects"] += 1
+                handler.cancel()
+                return
+            await inbox.put(message)
+            if message["type"] == "http.disconnect":
+                return
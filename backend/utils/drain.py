@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Still answered while draining so orchestrators can watch the shutdown
+DRAIN_EXEMPT_PATHS = ("/health", "/livez", "/readyz")
+
+class RequestDrainer:
+    """Counts in-flight HTTP requests and turns new ones away once shutdown begins.
+
+    `begin()` flips the process into draining: new requests get 503 with
+    ``Connection: close`` so clients and load balancers retry on another
+    worker, while the ones already running are allowed to finish.
+    """
+
+    def __init__(self, retry_after: int = 2):
+        self.retry_after = retry_after
+        self.draining = False
+        self.in_flight = 0
+        self.drain_started: Optional[float] = None
+        self.stats = {"rejected_while_draining": 0, "drained_requests": 0, "abandoned_requests": 0}
+        self._idle: Optional[asyncio.Event] = None
+
+    def begin(self):
+        if not self.draining:
+            self.draining = True
+            self.drain_started = time.monotonic()
+            logger.info(f"🚰 Draining: refusing new requests, {self.in_flight} still in flight")
+
+    def enter(self):
+        self.in_flight += 1
+
+    def exit(self):
+        self.in_flight -= 1
+        if self.draining:
+            self.stats["drained_requests"] += 1
+            if self.in_flight == 0 and self._idle is not None:
+                self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait until no request is in flight; False if `timeout` ran out first"""
+        if self.in_flight == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            self.stats["abandoned_requests"] += self.in_flight
+            logger.warning(f"⚠️ Drain timed out with {self.in_flight} requests still in flight")
+            return False
+
+    def reset(self):
+        """Accept requests again (tests, or a cancelled shutdown)"""
+        self.draining = False
+        self.drain_started = None
+        self._idle = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "draining_for_seconds": round(time.monotonic() - self.drain_started, 2) if self.drain_started else None,
+        }
+
+class DrainMiddleware:
+    """ASGI middleware applying a RequestDrainer to HTTP requests"""
+
+    def __init__(self, app, drainer: RequestDrainer, exempt_paths=DRAIN_EXEMPT_PATHS):
+        self.app = app
+        self.drainer = drainer
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.drainer.draining:
+            self.drainer.stats["rejected_while_draining"] += 1
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error": True,
+                    "message": "Server is restarting, please retry shortly",
+                    "status_code": 503,
+                    "timestamp": datetime.now().isoformat(),
+                    "path": scope["path"]
+                },
+                headers={"Retry-After": str(self.drainer.retry_after), "Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        self.drainer.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.drainer.exit()
+
+async def wait_for_tasks(tasks: Iterable[asyncio.Task], timeout: float) -> int:
+    """Give background tasks up to `timeout` seconds to finish; returns how many are still running"""
+    pending = [task for task in tasks if not task.done()]
+    if not pending or timeout <= 0:
+        return len(pending)
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    return len(still_running)
+
+def drain_on_signal(drain: Callable[[], Awaitable[Any]],
+                    signals=(signal.SIGTERM, signal.SIGINT)) -> Callable[[], None]:
+    """Run `drain` when a shutdown signal arrives, then pass the signal on to the server.
+
+    The server's own handler stops accepting connections and waits on (then
+    cancels) the open ones before the lifespan shutdown runs, which is too
+    late to turn requests away or let them finish. Called from inside the
+    running loop; returns a function that puts the previous handlers back.
+    A second signal while draining goes straight to the server, so Ctrl+C
+    twice still forces an exit.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # Signal handlers can only be set from the main thread (e.g. TestClient)
+        return lambda: None
+
+    loop = asyncio.get_running_loop()
+    previous = {sig: signal.getsignal(sig) for sig in signals}
+    state: Dict[str, Any] = {"started": False, "task": None}
+
+    def hand_over(sig, frame):
+        handler = previous[sig]
+        if callable(handler):
+            handler(sig, frame)
+        else:
+            signal.signal(sig, handler)
+            signal.raise_signal(sig)
+
+    async def run_drain(sig, frame):
+        try:
+            await drain()
+        except Exception as e:
+            logger.error(f"❌ Drain before exit failed: {e}")
+        finally:
+            hand_over(sig, frame)
+
+    def start(sig, frame):
+        state["task"] = loop.create_task(run_drain(sig, frame))
+
+    def handle(sig, frame):
+        if state["started"]:
+            hand_over(sig, frame)
+            return
+        state["started"] = True
+        logger.info(f"🚰 Received {signal.Signals(sig).name}, draining before shutdown")
+        loop.call_soon_threadsafe(start, sig, frame)
+
+    for sig in signals:
+        signal.signal(sig, handle)
+
+    def restore():
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    return restore
+
+# Global drainer; a shutdown signal begins the drain (see drain_on_signal)
+request_drainer = RequestDrainer()
@@ -58,6 +58,22 @@ class ErrorHandler:
             }
         )
     
+    @staticmethod
+    async def deadline_exceeded_handler(request: Request, exc: Exception):
+        """Handle requests that ran out of their time budget"""
+        logger.warning(f"Deadline exceeded: {exc} - Path: {request.url.path}")
+        
+        return JSONResponse(
+            status_code=504,
+            content={
+                "error": True,
+                "message": "Request took too long, please try again",
+                "status_code": 504,
+                "timestamp": datetime.now().isoformat(),
+                "path": str(request.url.path)
+            }
+        )
+    
     @staticmethod
     async def general_exception_handler(request: Request, exc: Exception):
         """Handle unexpected exceptions"""
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+# Event names emitted inside the backend
+VIDEO_UPLOADED = "video.uploaded"
+VIDEO_PROCESSED = "video.processed"
+VIDEO_FAILED = "video.failed"
+OBJECT_CREATED = "object.created"
+OBJECT_DELETED = "object.deleted"
+# Row-level changes to tracked_objects from any worker, delivered by the change feed
+OBJECT_CHANGED = "object.changed"
+LOCATIONS_FLUSHED = "locations.flushed"
+CHANGE_FEED_STATUS = "change_feed.status"
+
+class EventBus:
+    """Minimal in-process publish/subscribe for internal events"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[Handler]] = defaultdict(list)
+        self.emitted: Dict[str, int] = defaultdict(int)
+
+    def subscribe(self, event_type: str, handler: Handler):
+        if handler not in self.subscribers[event_type]:
+            self.subscribers[event_type].append(handler)
+
+    def unsubscribe(self, event_type: str, handler: Handler):
+        if handler in self.subscribers[event_type]:
+            self.subscribers[event_type].remove(handler)
+
+    async def emit(self, event_type: str, payload: Dict[str, Any]):
+        """Deliver an event to every subscriber; one failing handler doesn't stop the rest"""
+        self.emitted[event_type] += 1
+        for handler in list(self.subscribers[event_type]):
+            try:
+                result = handler(payload)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"❌ Event handler for {event_type} failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "emitted": dict(self.emitted),
+            "subscribers": {name: len(handlers) for name, handlers in self.subscribers.items() if handlers},
+        }
+
+# Global event bus
+event_bus = EventBus()
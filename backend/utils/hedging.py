@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from utils.deadline import remaining
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class EndpointHedgeStats:
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "errors": 0}
+
+    def p95(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+class RequestHedger:
+    """Races a duplicate of a slow idempotent call against the original.
+
+    When an attempt has not finished after the endpoint's observed p95
+    latency, a second identical attempt is started and whichever succeeds
+    first wins; the other is cancelled. Hedges are capped at
+    ``budget_percent`` of all calls, so at most that much extra load
+    reaches the upstream.
+    """
+
+    def __init__(self, enabled: bool = True, budget_percent: float = 5.0, default_delay: float = 2.0,
+                 min_delay: float = 0.05, min_samples: int = 20, window: int = 512):
+        self.enabled = enabled
+        self.budget_percent = budget_percent
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.endpoints: Dict[str, EndpointHedgeStats] = {}
+        self.total_calls = 0
+        self.total_hedges = 0
+
+    def _endpoint(self, name: str) -> EndpointHedgeStats:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointHedgeStats(self.window)
+        return self.endpoints[name]
+
+    def hedge_delay(self, name: str) -> float:
+        endpoint = self._endpoint(name)
+        if len(endpoint.latencies) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, endpoint.p95())
+
+    def _budget_allows(self) -> bool:
+        return self.total_hedges + 1 <= self.total_calls * self.budget_percent / 100
+
+    async def run(self, name: str, call: Callable[[], Awaitable[T]],
+                  failed: Optional[Callable[[T], bool]] = None) -> T:
+        """Run `call`, hedging it once if it is slow; `call` must be safe to repeat.
+
+        A result for which `failed` is true (an upstream 5xx, say) loses the
+        race like an exception would; if every attempt fails, the first failed
+        result is returned, or the first exception raised.
+        """
+        endpoint = self._endpoint(name)
+        endpoint.stats["calls"] += 1
+        self.total_calls += 1
+        # Latency is measured from the primary's start, whichever attempt answers. When a
+        # hedge wins, that is the time the cancelled primary had run: a censored sample,
+        # but leaving it out would keep slow calls out of the p95 the delay comes from.
+        started = time.monotonic()
+
+        def succeeded(task: asyncio.Future) -> bool:
+            return task.exception() is None and not (failed and failed(task.result()))
+
+        if not self.enabled:
+            result = await call()
+            if not (failed and failed(result)):
+                endpoint.latencies.append(time.monotonic() - started)
+            return result
+
+        delay = self.hedge_delay(name)
+        primary = asyncio.ensure_future(call())
+        hedge: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done:
+                left = remaining()
+                if not self._budget_allows() or (left is not None and left <= delay):
+                    # Out of budget, or too little time left for a second attempt to help
+                    endpoint.stats["budget_denied"] += 1
+                    await asyncio.wait({primary})
+                else:
+                    endpoint.stats["hedged"] += 1
+                    self.total_hedges += 1
+                    logger.info(f"🔀 Hedging {name} call still running after {delay:.2f}s")
+                    hedge = asyncio.ensure_future(call())
+
+            pending = {primary} if hedge is None else {primary, hedge}
+            failures = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda task: task is hedge):
+                    if succeeded(task):
+                        endpoint.latencies.append(time.monotonic() - started)
+                        if task is hedge:
+                            endpoint.stats["hedge_wins"] += 1
+                        return task.result()
+                    failures.append(task)
+            if hedge is not None:
+                endpoint.stats["errors"] += 1
+            failed_results = [task for task in failures if task.exception() is None]
+            if failed_results:
+                return failed_results[0].result()
+            raise failures[0].exception()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Latency windows per endpoint, so a restarted process hedges at the same delay"""
+        return {name: list(endpoint.latencies) for name, endpoint in self.endpoints.items()}
+
+    def restore_state(self, latencies: Dict[str, Any]):
+        for name, samples in latencies.items():
+            endpoint = self._endpoint(name)
+            # Older samples first, so anything measured since startup stays in the window
+            endpoint.latencies = deque([*samples, *endpoint.latencies], maxlen=self.window)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budget_percent": self.budget_percent,
+            "hedge_rate_percent": round(100 * self.total_hedges / self.total_calls, 2) if self.total_calls else 0.0,
+            "endpoints": {
+                name: {
+                    **endpoint.stats,
+                    "p95_seconds": round(endpoint.p95(), 4) if endpoint.latencies else None,
+                    "hedge_delay_seconds": round(self.hedge_delay(name), 4),
+                }
+                for name, endpoint in self.endpoints.items()
+            },
+        }
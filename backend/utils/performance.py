@@ -1,9 +1,15 @@
 import asyncio
+import os
+import random
 import time
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 import logging
 
+from utils.deadline import DeadlineExceeded, detached_context
+from utils.drain import wait_for_tasks
+from utils.tenancy import current_household
+
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
@@ -78,6 +84,22 @@ class PerformanceMonitor:
     def reset_metrics(self):
         """Reset all metrics"""
         self.metrics = {}
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        return {name: dict(metric) for name, metric in self.metrics.items()}
+    
+    def restore_state(self, metrics: Dict[str, Any]):
+        """Fold a previous process's totals into the current ones"""
+        for func_name, saved in metrics.items():
+            metric = self.metrics.get(func_name)
+            if metric is None:
+                self.metrics[func_name] = dict(saved)
+                continue
+            for key in ('calls', 'total_time', 'success_count', 'error_count'):
+                metric[key] += saved[key]
+            metric['avg_time'] = metric['total_time'] / metric['calls'] if metric['calls'] else 0
+            metric['min_time'] = min(metric['min_time'], saved['min_time'])
+            metric['max_time'] = max(metric['max_time'], saved['max_time'])
 
 # Global performance monitor
 perf_monitor = PerformanceMonitor()
@@ -114,10 +136,291 @@ class SimpleCache:
         self.cache[key] = value
         self.timestamps[key] = time.time()
     
+    def invalidate(self, predicate) -> int:
+        """Remove entries for which predicate(key, value) is true"""
+        stale = [key for key, value in self.cache.items() if predicate(key, value)]
+        for key in stale:
+            del self.cache[key]
+            del self.timestamps[key]
+        return len(stale)
+    
     def clear(self):
         """Clear all cache"""
         self.cache.clear()
         self.timestamps.clear()
 
-# Global cache instance
-search_cache = SimpleCache(max_size=50, ttl_seconds=600)  # 10 minute TTL
\ No newline at end of file
+class ShardedCache:
+    """SimpleCache split into one shard per household, sharing one capacity.
+
+    Reads and writes go to the current household's shard. When the cache
+    is full the largest shard gives up its oldest entry, so a household
+    using no more than its fair share (capacity / active households) is
+    never evicted to make room for a busier one.
+    """
+
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.shards: Dict[str, SimpleCache] = {}
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard.cache) for shard in self.shards.values())
+
+    def shard(self, household: Optional[str] = None) -> Optional[SimpleCache]:
+        return self.shards.get(household or current_household())
+
+    def get(self, key: str) -> Any:
+        """Get item from the current household's shard"""
+        shard = self.shard()
+        return shard.get(key) if shard else None
+
+    def set(self, key: str, value: Any):
+        """Set item in the current household's shard, evicting fairly when full"""
+        household = current_household()
+        shard = self.shards.get(household)
+        if shard is None:
+            # Sized to the whole cache so eviction is always decided here, across shards
+            shard = self.shards[household] = SimpleCache(self.max_size, self.ttl_seconds)
+        if key not in shard.cache and len(self) >= self.max_size:
+            self._evict()
+        shard.set(key, value)
+
+    def _evict(self):
+        household, largest = max(self.shards.items(), key=lambda item: len(item[1].cache))
+        oldest_key = min(largest.timestamps.keys(), key=largest.timestamps.get)
+        del largest.cache[oldest_key]
+        del largest.timestamps[oldest_key]
+        self.evictions += 1
+        if not largest.cache and household != current_household():
+            del self.shards[household]
+
+    def invalidate(self, predicate, household: Optional[str] = None) -> int:
+        """Remove matching entries from one household's shard, or from every shard"""
+        shards = [self.shards.get(household)] if household else list(self.shards.values())
+        return sum(shard.invalidate(predicate) for shard in shards if shard)
+
+    def clear(self):
+        """Clear all cache"""
+        self.shards.clear()
+
+    def snapshot_state(self) -> Dict[str, Dict[str, list]]:
+        """Unexpired entries per household as [value, stored_at] pairs"""
+        now = time.time()
+        return {
+            household: {
+                key: [value, shard.timestamps[key]]
+                for key, value in shard.cache.items()
+                if now - shard.timestamps[key] <= self.ttl_seconds
+            }
+            for household, shard in self.shards.items()
+        }
+
+    def restore_state(self, shards: Dict[str, Dict[str, list]]) -> int:
+        """Reload snapshot entries with their original write times, so they expire on the
+        same schedule as before. Newest entries win when they don't all fit."""
+        now = time.time()
+        entries = sorted(
+            ((stored_at, household, key, value)
+             for household, items in shards.items()
+             for key, (value, stored_at) in items.items()
+             if now - stored_at <= self.ttl_seconds),
+            reverse=True
+        )
+        restored = 0
+        for stored_at, household, key, value in entries:
+            if len(self) >= self.max_size:
+                break
+            shard = self.shards.get(household)
+            if shard is None:
+                shard = self.shards[household] = SimpleCache(self.max_size, self.ttl_seconds)
+            if key in shard.cache:
+                continue
+            shard.cache[key] = value
+            shard.timestamps[key] = stored_at
+            restored += 1
+        return restored
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "households": len(self.shards),
+            "largest_shard": max((len(shard.cache) for shard in self.shards.values()), default=0),
+            "evictions": self.evictions,
+        }
+
+class StaleWhileRevalidateCache:
+    """Household-sharded cache that answers from stale entries while refreshing them.
+
+    Younger than the soft TTL an entry is served as is. Between the soft
+    and hard TTL it is still served immediately, marked stale, and one
+    background refresh per key recomputes it. Past the hard TTL the caller
+    waits for a recompute, shared with any other caller missing the same key. Both TTLs get random jitter per entry, so keys
+    written together don't all expire together.
+    """
+
+    def __init__(self, soft_ttl: float = 300, hard_ttl: float = 3600, max_size: int = 200, jitter: float = 0.1):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.jitter = jitter
+        self.entries = ShardedCache(max_size=max_size, ttl_seconds=self.hard_ttl * (1 + jitter))
+        self.stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "joined": 0, "refreshes": 0,
+                      "refresh_errors": 0}
+        # (household, key) -> the one compute or refresh in progress for it
+        self._flights: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._tasks = set()
+
+    def _jittered(self, ttl: float) -> float:
+        return ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        soft = self._jittered(self.soft_ttl)
+        self.entries.set(key, {
+            "value": value,
+            "stored_at": now,
+            "soft_expires": now + soft,
+            "hard_expires": now + max(soft, self._jittered(self.hard_ttl)),
+        })
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float, bool]]:
+        """(value, age in seconds, stale) for a servable entry, None past the hard TTL"""
+        entry = self.entries.get(key)
+        now = time.time()
+        if entry is None or now >= entry["hard_expires"]:
+            return None
+        return entry["value"], now - entry["stored_at"], now >= entry["soft_expires"]
+
+    async def get_or_compute(self, key: str, compute: Callable[[bool], Awaitable[Any]],
+                             cache_if: Callable[[Any], bool] = lambda value: value is not None
+                             ) -> Tuple[Any, float, bool]:
+        """Serve `key`, calling ``compute(refresh)`` on a miss or in the background once stale.
+
+        Concurrent misses for a key share one compute: the first caller runs
+        it and the rest wait for its result (or for a background refresh
+        already under way) instead of each calling upstream.
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            value, age, stale = cached
+            self.stats["stale_hits" if stale else "fresh_hits"] += 1
+            if stale:
+                self._refresh(key, compute, cache_if)
+            return cached
+
+        flight = (current_household(), key)
+        pending = self._flights.get(flight)
+        if pending is not None:
+            self.stats["joined"] += 1
+            try:
+                return await asyncio.shield(pending), 0.0, False
+            except (asyncio.CancelledError, DeadlineExceeded):
+                # Only retry when it was the computing caller that was cancelled or ran out of
+                # its own time; this one may have more
+                gave_up = pending.done() and (pending.cancelled() or isinstance(pending.exception(), DeadlineExceeded))
+                if not gave_up:
+                    raise
+            return await self.get_or_compute(key, compute, cache_if)
+
+        self.stats["misses"] += 1
+        future = self._start_flight(flight)
+        try:
+            value = await compute(False)
+        except BaseException as e:
+            self._finish_flight(flight, future, error=e)
+            raise
+        if cache_if(value):
+            self.set(key, value)
+        self._finish_flight(flight, future, value=value)
+        return value, 0.0, False
+
+    def _start_flight(self, flight: Tuple[str, str]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't log a failure no one retrieved
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._flights[flight] = future
+        return future
+
+    def _finish_flight(self, flight: Tuple[str, str], future: asyncio.Future, value: Any = None,
+                       error: Optional[BaseException] = None):
+        if self._flights.get(flight) is future:
+            del self._flights[flight]
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _refresh(self, key: str, compute, cache_if):
+        flight = (current_household(), key)
+        if flight in self._flights:
+            return
+        future = self._start_flight(flight)
+
+        async def refresh():
+            self.stats["refreshes"] += 1
+            try:
+                value = await compute(True)
+                if cache_if(value):
+                    self.set(key, value)
+                self._finish_flight(flight, future, value=value)
+            except BaseException as e:
+                self._finish_flight(flight, future, error=e)
+                if not isinstance(e, Exception):
+                    raise
+                self.stats["refresh_errors"] += 1
+                logger.error(f"❌ Background refresh of {key} failed: {e}")
+
+        # Outlives the request that noticed the stale entry, so it must not inherit its deadline
+        task = asyncio.get_running_loop().create_task(refresh(), context=detached_context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def mark_stale(self, predicate, household: Optional[str] = None) -> int:
+        """Keep matching entries servable but refresh them on their next read"""
+        marked = 0
+        shards = [self.entries.shard(household)] if household else list(self.entries.shards.values())
+        for shard in shards:
+            for key, entry in (shard.cache.items() if shard else ()):
+                if predicate(key, entry["value"]):
+                    entry["soft_expires"] = 0
+                    marked += 1
+        return marked
+
+    def invalidate(self, predicate, household: Optional[str] = None) -> int:
+        return self.entries.invalidate(lambda key, entry: predicate(key, entry["value"]), household)
+
+    def clear(self):
+        self.entries.clear()
+
+    async def stop(self, grace: float = 0.0):
+        """Cancel refreshes still running after `grace` seconds"""
+        await wait_for_tasks(self._tasks, grace)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            **self.entries.get_stats(),
+            "soft_ttl_seconds": self.soft_ttl,
+            "hard_ttl_seconds": self.hard_ttl,
+            "jitter": self.jitter,
+            "in_flight": len(self._flights),
+        }
+
+# Global cache instance, one shard per household
+search_cache = ShardedCache(max_size=50, ttl_seconds=600)  # 10 minute TTL
+
+# Located answers per resolved object, served stale-while-revalidate
+answer_cache = StaleWhileRevalidateCache(
+    soft_ttl=float(os.getenv("ANSWER_CACHE_SOFT_TTL", "300")),
+    hard_ttl=float(os.getenv("ANSWER_CACHE_HARD_TTL", "3600")),
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "200")),
+    jitter=float(os.getenv("ANSWER_CACHE_JITTER", "0.1"))
+)
\ No newline at end of file
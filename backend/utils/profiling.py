@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def _stack_of(frame, limit: int = 64) -> List[str]:
+    """Outermost-first list of frame labels"""
+    stack = []
+    while frame is not None and len(stack) < limit:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def _format_stack(frame, limit: int = 32) -> List[str]:
+    lines = []
+    while frame is not None and len(lines) < limit:
+        lines.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    lines.reverse()
+    return lines
+
+class SamplingProfiler:
+    """Samples thread stacks from a helper thread and folds them into collapsed stacks.
+
+    The output is the `frame;frame;frame count` format read by flamegraph.pl and
+    speedscope. Only one profile runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval: float = 0.005,
+               thread_id: Optional[int] = None) -> Dict[str, Any]:
+        """Blocking: sample for `seconds`; only `thread_id` when given, else every other thread"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            own_thread = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_thread or (thread_id is not None and ident != thread_id):
+                        continue
+                    stack = [names.get(ident, f"thread-{ident}")] + _stack_of(frame)
+                    stacks[";".join(stack)] += 1
+                samples += 1
+                time.sleep(interval)
+            return {"samples": samples, "interval": interval, "stacks": stacks}
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def collapsed(profile: Dict[str, Any]) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in profile["stacks"].most_common()) + "\n"
+
+class LoopLagMonitor:
+    """Detects callbacks that block the event loop.
+
+    A heartbeat task on the loop records when it last ran; a watchdog thread
+    notices when the heartbeat is overdue by more than `threshold` and grabs
+    the loop thread's stack while it is still stuck, which points at the
+    blocking call (for example a synchronous Supabase request).
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, max_stalls: int = 100):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_stalls)
+        self.stats = {"stalls": 0, "max_lag_seconds": 0.0, "total_stalled_seconds": 0.0}
+        self._beat = time.monotonic()
+        self._current: Optional[Dict[str, Any]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop_thread_id(self) -> Optional[int]:
+        return self._loop_thread
+
+    async def _heartbeat(self):
+        while True:
+            now = time.monotonic()
+            lag = now - self._beat - self.interval
+            with self._lock:
+                if lag > self.stats["max_lag_seconds"]:
+                    self.stats["max_lag_seconds"] = round(lag, 4)
+                if self._current is not None:
+                    # The stall the watchdog caught is over; record how long it lasted
+                    self._current["duration_seconds"] = round(lag, 4)
+                    self.stats["total_stalled_seconds"] += lag
+                    self._current = None
+                self._beat = now
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            overdue = time.monotonic() - self._beat - self.interval
+            if overdue <= self.threshold:
+                continue
+            with self._lock:
+                if self._current is not None or self._loop_thread is None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                self._current = {
+                    "detected_at": time.time(),
+                    "duration_seconds": None,
+                    "stack": _format_stack(frame) if frame else [],
+                }
+                self.stalls.append(self._current)
+                self.stats["stalls"] += 1
+            logger.warning(f"🐢 Event loop blocked for over {self.threshold * 1000:.0f}ms")
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "total_stalled_seconds": round(self.stats["total_stalled_seconds"], 4),
+                "threshold_ms": self.threshold * 1000,
+                "running": self._task is not None and not self._task.done(),
+                "recent_stalls": list(self.stalls)[-limit:][::-1],
+            }
+
+class MemoryTracker:
+    """tracemalloc snapshots and diffs against a baseline"""
+
+    IGNORED = (tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+               tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+               tracemalloc.Filter(False, "<unknown>"))
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_taken_at: Optional[float] = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self.IGNORED)
+
+    def start_baseline(self, limit: int = 20) -> Dict[str, Any]:
+        """Start tracing if needed and remember the current heap as the baseline"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = self._snapshot()
+        self.baseline_taken_at = time.time()
+        top = self.baseline.statistics("lineno")[:limit]
+        return {
+            "tracing": True,
+            "baseline_taken_at": self.baseline_taken_at,
+            "traced_memory_bytes": tracemalloc.get_traced_memory()[0],
+            "top": [{"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in top],
+        }
+
+    def diff(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        if self.baseline is None or not tracemalloc.is_tracing():
+            raise RuntimeError("No baseline snapshot; take one first")
+        current = self._snapshot()
+        changes = current.compare_to(self.baseline, group_by)[:limit]
+        return {
+            "baseline_taken_at": self.baseline_taken_at,
+            "seconds_since_baseline": round(time.time() - self.baseline_taken_at, 2),
+            "traced_memory_bytes": tracemalloc.get_traced_memory()[0],
+            "top_growth": [
+                {
+                    "location": str(stat.traceback),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in changes
+            ],
+        }
+
+    def stop(self):
+        self.baseline = None
+        self.baseline_taken_at = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+# Global profiling tools
+sampling_profiler = SamplingProfiler()
+loop_lag_monitor = LoopLagMonitor(threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000)
+memory_tracker = MemoryTracker(frames=int(os.getenv("TRACEMALLOC_FRAMES", "1")))
@@ -0,0 +1,88 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+
+HOUSEHOLD_HEADER = "x-household-id"
+# Requests without a household (single-household deployments, webhooks) use this one
+DEFAULT_HOUSEHOLD = "default"
+HOUSEHOLD_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Household whose data the current request (or background task) reads and writes
+_household: ContextVar[str] = ContextVar("household_id", default=DEFAULT_HOUSEHOLD)
+
+def current_household() -> str:
+    return _household.get()
+
+def set_household(household_id: str):
+    """Switch the current context to `household_id`; returns a reset token"""
+    return _household.set(household_id)
+
+def reset_household(token):
+    _household.reset(token)
+
+@contextmanager
+def household_scope(household_id: Optional[str]):
+    """Run a block as `household_id` (the default household when None)"""
+    token = set_household(household_id or DEFAULT_HOUSEHOLD)
+    try:
+        yield
+    finally:
+        reset_household(token)
+
+def parse_household(value: Optional[str]) -> Optional[str]:
+    """Validated household id from a header value, or None if it isn't one"""
+    if value is None:
+        return None
+    value = value.strip()
+    return value if HOUSEHOLD_ID.match(value) else None
+
+def _error_response(status_code: int, message: str, path: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": True,
+            "message": message,
+            "status_code": status_code,
+            "timestamp": datetime.now().isoformat(),
+            "path": path
+        }
+    )
+
+class HouseholdMiddleware:
+    """Scopes each request to the household named in `X-Household-Id`.
+
+    An auth proxy in front of the API is expected to set the header from the
+    signed-in user. Storage, upstream calls and caches read the household
+    from a contextvar, so handlers need no extra arguments. Without the
+    header requests belong to the default household, unless ``required``.
+    """
+
+    def __init__(self, app, required: bool = False, exempt_paths=("/api/webhooks", "/health", "/livez", "/readyz")):
+        self.app = app
+        self.required = required
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        raw = headers.get(HOUSEHOLD_HEADER.encode())
+        household = parse_household(raw.decode("latin-1")) if raw is not None else None
+        if raw is not None and household is None:
+            await _error_response(400, "Invalid X-Household-Id header", scope["path"])(scope, receive, send)
+            return
+        if household is None and self.required and not scope["path"].startswith(self.exempt_paths):
+            await _error_response(401, "X-Household-Id header is required", scope["path"])(scope, receive, send)
+            return
+
+        token = set_household(household or DEFAULT_HOUSEHOLD)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_household(token)
@@ -0,0 +1,206 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Bytes needed to recognise every container below
+SNIFF_BYTES = 12
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# ISO base media (MP4/MOV/3GP) files start with a box: 4-byte size + type
+ISO_BOX_TYPES = {b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot"}
+ASF_HEADER = bytes.fromhex("3026b2758e66cf11")
+EBML_HEADER = b"\x1a\x45\xdf\xa3"
+
+def sniff_container(head: bytes) -> Optional[str]:
+    """Identify a video container from its first bytes, or None if it isn't one"""
+    if len(head) >= 8 and head[4:8] in ISO_BOX_TYPES:
+        return "mp4"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "avi"
+    if head[:4] == EBML_HEADER:
+        return "matroska"
+    if head[:3] == b"FLV":
+        return "flv"
+    if head[:8] == ASF_HEADER:
+        return "asf"
+    return None
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+class MultipartInspector:
+    """Runs body chunks through a streaming multipart parser and checks every file part.
+
+    Each file part is sniffed as soon as its first bytes arrive and its size is
+    counted as it streams, so a bad upload is caught on the first offending chunk.
+    """
+
+    def __init__(self, boundary: bytes, max_file_size: int, max_files: Optional[int] = None):
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.rejection: Optional[UploadRejected] = None
+        self.files = 0
+        self._header_field = b""
+        self._header_value = b""
+        self._filename: Optional[str] = None
+        self._part_size = 0
+        self._head = b""
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes):
+        if chunk:
+            self.parser.write(chunk)
+        if self.rejection:
+            raise self.rejection
+
+    def _reject(self, status_code: int, message: str):
+        if self.rejection is None:
+            self.rejection = UploadRejected(status_code, message)
+
+    def _on_part_begin(self):
+        self._filename = None
+        self._part_size = 0
+        self._head = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            filename = options.get(b"filename")
+            if filename is not None:
+                self._filename = filename.decode("utf-8", errors="replace")
+                self.files += 1
+                if self.max_files is not None and self.files > self.max_files:
+                    self._reject(400, f"Too many files. At most {self.max_files} can be uploaded at once.")
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._filename is None or self.rejection:
+            return
+        self._part_size += end - start
+        if self._part_size > self.max_file_size:
+            size_mb = self.max_file_size / (1024 * 1024)
+            self._reject(413, f"File '{self._filename}' is too large. Maximum allowed size is {size_mb:.0f}MB.")
+            return
+        if len(self._head) < SNIFF_BYTES:
+            self._head += data[start:min(end, start + SNIFF_BYTES - len(self._head))]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_head()
+
+    def _on_part_end(self):
+        if self._filename is not None and len(self._head) < SNIFF_BYTES and not self.rejection:
+            # File shorter than a container header
+            self._check_head()
+
+    def _check_head(self):
+        if sniff_container(self._head) is None:
+            self._reject(400, "Invalid file type. Supported formats: MP4, AVI, MOV, WMV, FLV, WebM, MKV")
+
+class UploadGuardMiddleware:
+    """Rejects oversized or non-video uploads before they are spooled to disk.
+
+    Checks Content-Length up front, then counts and sniffs the multipart body as
+    it streams in. On rejection the error response is sent immediately with
+    `Connection: close` and the handler sees a disconnect, so the rest of the
+    body is never read.
+    """
+
+    def __init__(self, app, paths=("/api/upload",), max_file_size: int = 50 * 1024 * 1024,
+                 max_files: Optional[int] = None, max_body_size: Optional[int] = None):
+        self.app = app
+        self.paths = tuple(paths)
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.max_body_size = max_body_size or (max_file_size + MULTIPART_OVERHEAD) * (max_files or 1)
+        self.stats = {"rejected_content_length": 0, "rejected_streaming": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            self.stats["rejected_content_length"] += 1
+            size_mb = self.max_file_size * (self.max_files or 1) / (1024 * 1024)
+            await self._send_rejection(scope, send, UploadRejected(
+                413, f"Upload too large ({int(content_length) / (1024 * 1024):.1f}MB). "
+                     f"Maximum allowed size is {size_mb:.0f}MB."))
+            return
+
+        content_type, options = parse_options_header(headers.get(b"content-type", b""))
+        boundary = options.get(b"boundary")
+        inspector = MultipartInspector(boundary, self.max_file_size, self.max_files) \
+            if content_type == b"multipart/form-data" and boundary else None
+
+        received = 0
+        rejected: Optional[UploadRejected] = None
+
+        async def guarded_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                try:
+                    if received > self.max_body_size:
+                        raise UploadRejected(413, "Upload too large")
+                    if inspector:
+                        inspector.feed(body)
+                except UploadRejected as e:
+                    rejected = e
+                    self.stats["rejected_streaming"] += 1
+                    await self._send_rejection(scope, send, e)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # The rejection has already been answered; drop whatever the handler says
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, guarded_receive, guarded_send)
+        except Exception:
+            if rejected is None:
+                raise
+
+    async def _send_rejection(self, scope, send, rejection: UploadRejected):
+        logger.warning(f"🚫 Rejected upload to {scope['path']}: {rejection.message}")
+        response = JSONResponse(
+            status_code=rejection.status_code,
+            content={
+                "error": True,
+                "message": rejection.message,
+                "status_code": rejection.status_code,
+                "timestamp": datetime.now().isoformat(),
+                "path": scope["path"]
+            },
+            headers={"Connection": "close"}
+        )
+        await response(scope, None, send)
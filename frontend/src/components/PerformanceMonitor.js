@@ -1,5 +1,20 @@
 import React, { useState, useEffect } from 'react';
 
+// JSON Merge Patch (RFC 7396): null removes a key, objects merge recursively
+const applyMergePatch = (target, patch) => {
+  const result = { ...target };
+  Object.entries(patch).forEach(([key, value]) => {
+    if (value === null) {
+      delete result[key];
+    } else if (typeof value === 'object' && !Array.isArray(value) && typeof result[key] === 'object' && result[key] !== null) {
+      result[key] = applyMergePatch(result[key], value);
+    } else {
+      result[key] = value;
+    }
+  });
+  return result;
+};
+
 const PerformanceMonitor = () => {
   const [metrics, setMetrics] = useState(null);
   const [visible, setVisible] = useState(false);
@@ -7,18 +22,22 @@ const PerformanceMonitor = () => {
   useEffect(() => {
     // Show performance monitor in development
     if (process.env.NODE_ENV === 'development') {
-      const fetchMetrics = async () => {
-        try {
-          const response = await fetch('http://localhost:8000/api/admin/metrics');
-          const data = await response.json();
-          setMetrics(data);
-        } catch (error) {
-          console.error('Failed to fetch metrics:', error);
-        }
+      // One shared stream: a full snapshot first, then merge patches of what changed
+      const source = new EventSource('http://localhost:8000/api/admin/metrics/stream');
+
+      source.addEventListener('snapshot', (event) => {
+        setMetrics(JSON.parse(event.data));
+      });
+      source.addEventListener('delta', (event) => {
+        const patch = JSON.parse(event.data);
+        setMetrics((current) => (current ? applyMergePatch(current, patch) : current));
+      });
+      source.onerror = (error) => {
+        // EventSource reconnects on its own and the server starts with a fresh snapshot
+        console.error('Metrics stream error:', error);
       };
 
-      const interval = setInterval(fetchMetrics, 10000); // Update every 10 seconds
-      return () => clearInterval(interval);
+      return () => source.close();
     }
   }, []);
 
@@ -244,6 +244,11 @@ const SearchInterface = () => {
                       🎥 Video ID: {result.video_no.slice(0, 12)}...
                     </span>
                   )}
+                  {result.stale && (
+                    <span style={{ marginLeft: '15px' }} title="A fresh answer is being fetched in the background">
+                      🔄 Answer from {Math.round(result.age / 60)} min ago, refreshing
+                    </span>
+                  )}
                 </div>
               </div>
 
@@ -18,6 +18,15 @@ api.interceptors.request.use(
       ...config.params,
       _t: Date.now()
     };
+    // Tell the server how long we'll wait so it stops upstream work once we give up
+    if (config.timeout) {
+      config.headers['X-Request-Timeout'] = String(Math.max(1, config.timeout / 1000 - 2));
+    }
+    // Household whose objects and videos this browser works with
+    const householdId = process.env.REACT_APP_HOUSEHOLD_ID || localStorage.getItem('householdId');
+    if (householdId) {
+      config.headers['X-Household-Id'] = householdId;
+    }
     
     console.log(`🚀 API Request: ${config.method?.toUpperCase()} ${config.url}`);
     return config;
@@ -69,7 +78,7 @@ export const checkHealth = async () => {
   }
 };
 
-export const uploadVideo = async (file) => {
+export const uploadVideo = async (file, room) => {
   if (!file) {
     throw new Error('No file provided');
   }
@@ -84,6 +93,9 @@ export const uploadVideo = async (file) => {
   
   const formData = new FormData();
   formData.append('file', file);
+  if (room) {
+    formData.append('room', room);
+  }
   
   try {
     const response = await api.post('/api/upload', formData, {
@@ -106,6 +118,30 @@ export const uploadVideo = async (file) => {
   }
 };
 
+export const uploadVideos = async (files, room) => {
+  const videos = Array.from(files);
+  if (videos.length === 0) {
+    throw new Error('Please select at least one video file');
+  }
+  
+  const formData = new FormData();
+  videos.forEach((file) => formData.append('files', file));
+  if (room) {
+    formData.append('room', room);
+  }
+  
+  // One request for the whole batch; the server uploads the files in parallel
+  // and reports success or failure per file
+  const response = await api.post('/api/upload/batch', formData, {
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+    timeout: 300000, // 5 minute timeout for a batch
+  });
+  
+  return response.data;
+};
+
 export const teachObject = async (name, alias) => {
   if (!name || !alias) {
     throw new Error('Both object name and description are required');
@@ -141,7 +177,8 @@ export const deleteTrackedObject = async (objectId) => {
   return response.data;
 };
 
-export const searchForObject = async (query) => {
+// Optional scope: { room, since, until } (dates as ISO strings or Date objects)
+export const searchForObject = async (query, scope = {}) => {
   if (!query || query.trim().length === 0) {
     throw new Error('Search query cannot be empty');
   }
@@ -151,7 +188,8 @@ export const searchForObject = async (query) => {
   }
   
   const response = await api.post('/api/search/', {
-    query: query.trim()
+    query: query.trim(),
+    ...scope
   });
   
   return response.data;